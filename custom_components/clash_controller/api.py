@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
+from functools import partial
+from itertools import count
 from typing import Any, Optional
+from array import array
 import asyncio
+import hashlib
 import json
 import logging
 import random
 import re
 import ssl
 import time
+from urllib.parse import quote, urlsplit
 
 import aiohttp
 
@@ -29,12 +36,537 @@ SERVICE_TABLE = {
     },
 }
 
+SUMMARY_CHUNK_SIZE = 65536
+
+POOL_DEDICATED = "dedicated"
+POOL_SHARED = "shared"
+POOL_EXTERNAL = "home_assistant"
+DEFAULT_POOL_LIMIT_PER_HOST = 8
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+DEFAULT_DNS_CACHE_TTL = 300
+REQUEST_TIMEOUT = 15
+STATUS_REQUEST_TIMEOUT = 10
+DEFAULT_STREAM_INTERVAL = 1.0
+
+# Frame ids unique across every stream subscription.
+_FRAME_IDS = count(1)
+
+# Sessions shared by every ClashAPI with the same pool key, with a reference
+# count so the last user closes the pool.
+_SHARED_SESSIONS: dict[tuple[Any, ...], list[Any]] = {}
+
+# Polling cadence tier of every fetch_data key. Endpoints in slower tiers are
+# only requested once their tier interval has elapsed; in between, their last
+# good payload is reused.
+ENDPOINT_TIERS = {
+    "traffic": "fast",
+    "memory": "fast",
+    "connections": "medium",
+    "proxies": "medium",
+    "configs": "slow",
+    "providers_proxies": "slow",
+    "providers_rules": "slow",
+}
+CADENCE_TOLERANCE = 1.0
+
+# Endpoint of every fetch_data key kept in the cadence cache.
+PAYLOAD_ENDPOINTS = {
+    "traffic": "traffic",
+    "memory": "memory",
+    "connections": "connections",
+    "proxies": "proxies",
+    "configs": "configs",
+    "providers_proxies": "providers/proxies",
+    "providers_rules": "providers/rules",
+}
+
+# Read endpoints made stale by a successful write, keyed by the written
+# endpoint prefix. An empty tuple drops every cached read.
+WRITE_INVALIDATION = (
+    ("providers/proxies", ("providers/proxies", "proxies", "group")),
+    ("providers/rules", ("providers/rules", "rules")),
+    ("proxies", ("proxies", "providers/proxies", "group")),
+    ("group", ("group", "proxies", "providers/proxies")),
+    ("connections", ("connections",)),
+    ("configs", ()),
+    ("restart", ()),
+    ("upgrade", ()),
+)
+
+# Short-lived cache of plain GET responses shared by services and polling.
+READ_CACHE_ENDPOINTS = (
+    "rules",
+    "connections",
+    "proxies",
+    "group",
+    "configs",
+    "providers/",
+    "version",
+)
+READ_CACHE_TTL = 5.0
+READ_CACHE_MAX_ENTRIES = 32
+
+TRAFFIC_SAMPLE_CAPACITY = 3600
+
+_CONNECTIONS_ARRAY_RE = re.compile(rb'"connections"\s*:\s*\[')
+_CONNECTION_TOTALS_RE = re.compile(rb'"(uploadTotal|downloadTotal)"\s*:\s*(-?\d+)')
+_JSON_ESCAPE_RE = re.compile(rb"\\.", re.DOTALL)
+_JSON_NON_STRUCTURAL = bytes(b for b in range(256) if b not in b'"{}[]')
+_JSON_OPENERS = frozenset(b"{[")
+
+
+class ConnectionsSummaryParser:
+    """Incremental scanner summarizing a /connections snapshot.
+
+    Only the traffic totals and the number of connections are extracted.
+    Each chunk is reduced to its quotes and brackets with C-level bytes
+    operations, string contents are dropped by quote parity, and elements
+    of the connections array are counted from bracket depth. No
+    per-connection objects are built and nothing but a few counters is
+    carried between chunks.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty summary."""
+        self.upload_total: int | None = None
+        self.download_total: int | None = None
+        self.count = 0
+        self._state = "head"
+        self._head = b""
+        self._overlap = b""
+        self._pending_escape = b""
+        self._in_string = False
+        self._depth = 1
+
+    def feed(self, chunk: bytes) -> None:
+        """Consume the next chunk of the response body."""
+        window = self._overlap + chunk
+        for match in _CONNECTION_TOTALS_RE.finditer(window):
+            if match.group(1) == b"uploadTotal":
+                self.upload_total = int(match.group(2))
+            else:
+                self.download_total = int(match.group(2))
+        self._overlap = window[-64:]
+
+        if self._state == "head":
+            self._head += chunk
+            match = _CONNECTIONS_ARRAY_RE.search(self._head)
+            if match is None:
+                return
+            chunk = self._head[match.end() :]
+            self._head = b""
+            self._state = "array"
+        if self._state == "array":
+            self._scan(chunk)
+
+    def _scan(self, chunk: bytes) -> None:
+        # Escapes only occur inside strings, so dropping them keeps the
+        # structure intact and leaves every quote a string delimiter.
+        buffer = _JSON_ESCAPE_RE.sub(b"", self._pending_escape + chunk)
+        self._pending_escape = b""
+        if buffer.endswith(b"\\"):
+            buffer, self._pending_escape = buffer[:-1], b"\\"
+
+        segments = buffer.translate(None, _JSON_NON_STRUCTURAL).split(b'"')
+        structure = b"".join(segments[1 if self._in_string else 0 :: 2])
+        if len(segments) % 2 == 0:
+            self._in_string = not self._in_string
+
+        depth = self._depth
+        count = self.count
+        for char in structure:
+            if char in _JSON_OPENERS:
+                depth += 1
+                if depth == 2:
+                    count += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    self._state = "done"
+                    break
+        self._depth = depth
+        self.count = count
+
+    def result(self) -> dict[str, Any]:
+        """Return the summary in the shape of a /connections response."""
+        if self._state == "head" and self.upload_total is None and self.download_total is None:
+            return {}
+        return {
+            "uploadTotal": self.upload_total,
+            "downloadTotal": self.download_total,
+            "connectionCount": self.count,
+        }
+
+
+def summarize_connections(payload: str | bytes) -> dict[str, Any]:
+    """Summarize a complete /connections payload."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    parser = ConnectionsSummaryParser()
+    parser.feed(payload)
+    return parser.result()
+
+
+def _acquire_shared_session(
+    key: tuple[Any, ...], factory: Callable[[], aiohttp.ClientSession]
+) -> aiohttp.ClientSession:
+    """Return the shared session for a pool key, creating it if needed."""
+    entry = _SHARED_SESSIONS.get(key)
+    if entry is None or entry[0].closed:
+        entry = [factory(), 0]
+        _SHARED_SESSIONS[key] = entry
+    entry[1] += 1
+    return entry[0]
+
+
+async def _release_shared_session(key: tuple[Any, ...]) -> None:
+    """Drop one reference to a shared session and close it when unused."""
+    entry = _SHARED_SESSIONS.get(key)
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] <= 0:
+        _SHARED_SESSIONS.pop(key, None)
+        await entry[0].close()
+
+
+class CircuitBreaker:
+    """Fail fast while a core is known to be unreachable.
+
+    After FAILURE_THRESHOLD consecutive connectivity failures the circuit
+    opens and requests are rejected without touching the network. Once
+    RESET_TIMEOUT has elapsed a single probe request is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    FAILURE_THRESHOLD = 3
+    RESET_TIMEOUT = 30.0
+
+    def __init__(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def retry_in(self) -> float:
+        """Return seconds until the next probe is allowed while open."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.RESET_TIMEOUT - time.monotonic())
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_in <= 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the circuit after the core answered."""
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a connectivity failure and open the circuit if needed."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.FAILURE_THRESHOLD:
+            if self.state != self.OPEN:
+                _LOGGER.debug("Circuit opened after %d failures.", self.failures)
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self) -> None:
+        """Let another request probe when the current probe had no verdict."""
+        self._probing = False
+
+
+class RequestLoadStats:
+    """Smoothed latency and error rate of recent HTTP requests to one core."""
+
+    ALPHA = 0.3
+
+    def __init__(self) -> None:
+        self.latency: float = 0.0
+        self.error_rate: float = 0.0
+        self.samples = 0
+
+    def record(self, latency: float | None, failed: bool) -> None:
+        """Fold one request outcome into the moving averages."""
+        alpha = self.ALPHA if self.samples else 1.0
+        self.samples += 1
+        self.error_rate += alpha * ((1.0 if failed else 0.0) - self.error_rate)
+        if latency is not None:
+            self.latency += alpha * (latency - self.latency)
+
+
+class TrafficSampler:
+    """Fixed-size ring buffer of /traffic samples with per-window statistics.
+
+    Samples live in preallocated arrays, so memory stays constant however
+    long the stream runs; a window longer than the capacity keeps only the
+    most recent samples.
+    """
+
+    def __init__(self, capacity: int = TRAFFIC_SAMPLE_CAPACITY) -> None:
+        self.capacity = capacity
+        self._up = array("q", bytes(8 * capacity))
+        self._down = array("q", bytes(8 * capacity))
+        self._written = 0
+        self._window_start = 0
+
+    def add(self, up: int, down: int) -> None:
+        """Append one sample, overwriting the oldest when full."""
+        index = self._written % self.capacity
+        self._up[index] = up
+        self._down[index] = down
+        self._written += 1
+
+    def _window_values(self, buffer: array, start: int, count: int) -> list[int]:
+        offset = start % self.capacity
+        if offset + count <= self.capacity:
+            return buffer[offset : offset + count].tolist()
+        return (buffer[offset:] + buffer[: offset + count - self.capacity]).tolist()
+
+    @staticmethod
+    def _summarize(values: list[int]) -> tuple[float, int, int]:
+        values.sort()
+        p95 = values[max(0, -(-len(values) * 95 // 100) - 1)]
+        return sum(values) / len(values), p95, values[-1]
+
+    def window(self) -> dict[str, Any]:
+        """Return mean, p95 and max of the samples since the previous call."""
+        start = max(self._window_start, self._written - self.capacity)
+        count = self._written - start
+        self._window_start = self._written
+        if count <= 0:
+            return {}
+        stats: dict[str, Any] = {"samples": count}
+        for name, buffer in (("up", self._up), ("down", self._down)):
+            mean, p95, peak = self._summarize(self._window_values(buffer, start, count))
+            stats[f"{name}_mean"] = round(mean, 1)
+            stats[f"{name}_p95"] = p95
+            stats[f"{name}_max"] = peak
+        return stats
+
+
+class ClashStreamSubscription:
+    """Long-lived stream subscription holding the latest frame.
+
+    Frames arrive as websocket messages, or as lines of a streaming HTTP
+    response with the http transport.
+    """
+
+    HEARTBEAT = 30
+    RECONNECT_BASE = 1
+    RECONNECT_MAX = 60
+
+    def __init__(
+        self,
+        api: ClashAPI,
+        key: str,
+        endpoint: str,
+        decoder: Callable[[str | bytes], dict[str, Any]] | None = None,
+        transport: str = "ws",
+    ) -> None:
+        """Initialize the subscription without connecting."""
+        self.api = api
+        self.key = key
+        self.endpoint = endpoint
+        self.decoder = decoder
+        self.transport = transport
+        self.frame_count = 0
+        self.frame_id = 0
+        self.connect_count = 0
+        self._connection_frames = 0
+        self._raw: str | bytes | None = None
+        self._frame: dict[str, Any] | None = None
+        self._received_at: float | None = None
+        self._frame_event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._listeners: list[Callable[[str], None]] = []
+
+    @property
+    def running(self) -> bool:
+        """Return whether the background reader is active."""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def age(self) -> float | None:
+        """Return seconds since the latest frame was received."""
+        if self._received_at is None:
+            return None
+        return time.monotonic() - self._received_at
+
+    @property
+    def frame(self) -> dict[str, Any]:
+        """Return the latest frame.
+
+        Frames reduced by a decoder are small and decoded once. Plain JSON
+        frames, such as full /connections snapshots, are decoded on every
+        access so only the raw message is retained.
+        """
+        if self._frame is not None or self._raw is None:
+            return self._frame or {}
+        raw = self._raw
+        try:
+            if self.decoder is not None:
+                payload = self.decoder(raw)
+            else:
+                if isinstance(raw, bytes):
+                    raw = raw.decode("utf-8")
+                payload = json.loads(raw.strip())
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            payload = {}
+        payload = payload if isinstance(payload, dict) else {}
+        if self.decoder is not None:
+            self._frame = payload
+        return payload
+
+    def add_listener(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """Call listener with the stream key on every frame; return a remover."""
+        self._listeners.append(listener)
+
+        def remove_listener() -> None:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return remove_listener
+
+    def start(self) -> None:
+        """Start the background reader if it is not running."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(), name=f"clash_controller stream {self.endpoint}"
+            )
+
+    async def async_stop(self) -> None:
+        """Stop the background reader and drop the websocket."""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def async_wait_frame(
+        self,
+        timeout: float,
+        min_frames: int = 1,
+        max_age: float | None = None,
+    ) -> dict[str, Any]:
+        """Return the latest frame, waiting up to timeout for a usable one."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            age = self.age
+            if (
+                age is not None
+                and self._connection_frames >= min_frames
+                and (max_age is None or age <= max_age)
+            ):
+                frame = self.frame
+                if frame:
+                    return frame
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return {}
+            try:
+                await asyncio.wait_for(self._frame_event.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return {}
+
+    def _store(self, data: str | bytes) -> None:
+        self._raw = data
+        self._frame = None
+        self._received_at = time.monotonic()
+        self.frame_count += 1
+        self.frame_id = next(_FRAME_IDS)
+        self._connection_frames += 1
+        event, self._frame_event = self._frame_event, asyncio.Event()
+        event.set()
+        for listener in list(self._listeners):
+            try:
+                listener(self.key)
+            except Exception:
+                _LOGGER.exception("Error in listener for stream %s", self.endpoint)
+
+    async def _consume(self) -> None:
+        if self.api._stream_session is None:
+            await self.api._establish_stream_session()
+
+        if self.transport == "http":
+            await self._consume_http()
+            return
+
+        async with self.api._stream_session.ws_connect(
+            self.api._build_ws_url(self.endpoint),
+            headers=self.api._ws_headers(),
+            heartbeat=self.HEARTBEAT,
+            max_msg_size=0,
+        ) as websocket:
+            self.connect_count += 1
+            self._connection_frames = 0
+            async for message in websocket:
+                if message.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    self._store(message.data)
+                elif message.type == aiohttp.WSMsgType.ERROR:
+                    raise APIConnectionError(
+                        f"Websocket error on {self.endpoint}: {websocket.exception()}"
+                    )
+
+    async def _consume_http(self) -> None:
+        async with self.api._stream_session.get(
+            f"{self.api.host}{self.endpoint}",
+            headers=self.api._request_headers(),
+            timeout=aiohttp.ClientTimeout(total=None, sock_read=self.HEARTBEAT),
+        ) as response:
+            response.raise_for_status()
+            self.connect_count += 1
+            self._connection_frames = 0
+            async for line in response.content:
+                if line.strip():
+                    self._store(line)
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            frames_before = self.frame_count
+            try:
+                await self._consume()
+                _LOGGER.debug("Stream %s closed by remote.", self.endpoint)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                _LOGGER.debug("Stream %s disconnected: %s", self.endpoint, err)
+            attempt = 1 if self.frame_count > frames_before else attempt + 1
+            backoff = min(self.RECONNECT_MAX, self.RECONNECT_BASE * (2 ** (attempt - 1)))
+            await asyncio.sleep(random.uniform(backoff / 2, backoff))
+
 
 class ClashAPI:
     """A utility class to interact with the Clash API."""
 
     MAX_RETRIES = 2
     BACKOFF_BASE = 1
+    STREAM_WAIT_TIMEOUT = 3
+    STREAM_MAX_AGE = 5
+    WS_REPROMOTE_BASE = 30
+    WS_REPROMOTE_MAX = 3600
+    BULK_CLOSE_MAX_CONCURRENCY = 64
+    BULK_CLOSE_SLOW_LATENCY = 1.0
+    DELAY_TEST_SLACK = 2.0
 
     def __init__(
         self,
@@ -43,23 +575,73 @@ class ClashAPI:
         allow_unsafe: bool = False,
         available_endpoints: Optional[list[tuple[str, dict[str, Any]]]] = None,
         capabilities: Optional[dict[str, bool]] = None,
+        capabilities_fingerprint: Optional[str] = None,
+        pool_mode: str = POOL_DEDICATED,
+        pool_limit_per_host: int = DEFAULT_POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = DEFAULT_DNS_CACHE_TTL,
+        session: Optional[aiohttp.ClientSession] = None,
+        stream_interval: float = DEFAULT_STREAM_INTERVAL,
     ):
-        """Initialize the ClashAPI instance."""
+        """Initialize the ClashAPI instance.
+
+        pool_mode selects a dedicated connection pool, one pool shared by every
+        instance pointing at the same host, or the externally managed session.
+        stream_interval is the period in seconds at which the core is asked to
+        push /connections snapshots.
+        """
         self.host = host
         self.token = token
         self.allow_unsafe = allow_unsafe
+        self.pool_mode = POOL_EXTERNAL if session is not None else pool_mode
+        self.pool_limit_per_host = pool_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.stream_interval = stream_interval
+        self._external_session = session
+        self._session_keys: dict[str, tuple[Any, ...]] = {}
         self.device_id = (
             re.sub(r"[^a-zA-Z0-9]", "_", self.host.strip().lower().rstrip("_"))
             + "_device"
         )
         self._session: Optional[aiohttp.ClientSession] = None
         self._status_session: Optional[aiohttp.ClientSession] = None
+        self._stream_session: Optional[aiohttp.ClientSession] = None
         self._available_endpoints: Optional[list[tuple[str, dict[str, Any]]]] = (
             available_endpoints
         )
         self._capabilities: Optional[dict[str, bool]] = (
             dict(capabilities) if capabilities else None
         )
+        self._fingerprint = capabilities_fingerprint
+        self._fingerprint_checked = False
+        self._reprobe_task: Optional[asyncio.Task] = None
+        self._streams: dict[str, ClashStreamSubscription] = {}
+        self._ws_demoted: dict[str, tuple[float, int]] = {}
+        self.traffic_sampler: Optional[TrafficSampler] = None
+        self._sampler_stream: Optional[ClashStreamSubscription] = None
+        self._sampler_started = 0.0
+        self._stopping_streams: set[asyncio.Task] = set()
+        self._ws_demotions = 0
+        self._ws_promotions = 0
+        self._payload_cache: dict[str, tuple[float, Any]] = {}
+        self.load_stats = RequestLoadStats()
+        self.breaker = CircuitBreaker()
+        self._inflight: dict[tuple[Any, ...], asyncio.Future] = {}
+        self._read_cache: OrderedDict[tuple[Any, ...], tuple[float, Any]] = (
+            OrderedDict()
+        )
+        self._cache_generation = 0
+        # Bumped whenever cached configs or rules are dropped by a write.
+        self.rules_generation = 0
+        self.last_fetched: set[str] = set()
+        # Id of the stream frame each key was last served from, if any.
+        self.frame_ids: dict[str, int] = {}
+        self._payload_sources: dict[str, str] = {}
+        self.stale_keys: set[str] = set()
+        self._late_fetches: dict[str, asyncio.Future] = {}
+        self._stale_total = 0
+        self._late_total = 0
 
     @property
     def available_endpoints(self) -> Optional[list[tuple[str, dict[str, Any]]]]:
@@ -71,6 +653,86 @@ class ClashAPI:
         """Return endpoint capability matrix."""
         return self._capabilities
 
+    @property
+    def streams(self) -> dict[str, ClashStreamSubscription]:
+        """Return active websocket subscriptions keyed by data key."""
+        return self._streams
+
+    def _get_stream(
+        self,
+        key: str,
+        endpoint: str,
+        decoder: Callable[[str | bytes], dict[str, Any]] | None = None,
+    ) -> ClashStreamSubscription:
+        """Return the running subscription for a stream, starting it if needed."""
+        stream = self._streams.get(key)
+        if stream is None or stream.endpoint != endpoint:
+            stream = ClashStreamSubscription(self, key, endpoint, decoder)
+            self._streams[key] = stream
+        elif stream.decoder is not decoder:
+            stream.decoder = decoder
+            stream._frame = None
+        stream.start()
+        return stream
+
+    def invalidate_cache(self, prefixes: Optional[tuple[str, ...]] = None) -> None:
+        """Drop cached reads and fetch_data payloads under endpoint prefixes.
+
+        Without prefixes every cached response is dropped.
+        """
+        self._cache_generation += 1
+        if prefixes is None or "rules".startswith(prefixes):
+            self.rules_generation += 1
+        if prefixes is None:
+            self._payload_cache.clear()
+            self._read_cache.clear()
+            return
+        for key in list(self._payload_cache):
+            if PAYLOAD_ENDPOINTS.get(key, key).startswith(prefixes):
+                del self._payload_cache[key]
+        for key in list(self._read_cache):
+            if self._cache_path(key[0]).startswith(prefixes):
+                del self._read_cache[key]
+
+    def _invalidate_for_request(self, method: str, endpoint: str) -> None:
+        """Invalidate cached responses that a request may have changed."""
+        path = self._cache_path(endpoint)
+        if method.upper() == "GET" and not path.endswith(("/delay", "/healthcheck")):
+            return
+        for prefix, stale in WRITE_INVALIDATION:
+            if path.startswith(prefix):
+                self.invalidate_cache(stale or None)
+                return
+
+    @staticmethod
+    def _cache_path(endpoint: str) -> str:
+        return endpoint.split("?", 1)[0].strip("/")
+
+    def _read_cache_get(self, key: tuple[Any, ...]) -> tuple[bool, Any]:
+        """Return whether a fresh cached read exists and its payload."""
+        entry = self._read_cache.get(key)
+        if entry is None:
+            return False, None
+        if time.monotonic() - entry[0] > READ_CACHE_TTL:
+            del self._read_cache[key]
+            return False, None
+        self._read_cache.move_to_end(key)
+        return True, entry[1]
+
+    def _read_cache_put(self, key: tuple[Any, ...], value: Any) -> None:
+        self._read_cache[key] = (time.monotonic(), value)
+        self._read_cache.move_to_end(key)
+        while len(self._read_cache) > READ_CACHE_MAX_ENTRIES:
+            self._read_cache.popitem(last=False)
+
+    async def async_stop_streams(self) -> None:
+        """Stop all websocket subscriptions."""
+        streams = list(self._streams.values())
+        self._streams.clear()
+        await asyncio.gather(
+            *(stream.async_stop() for stream in streams), return_exceptions=True
+        )
+
     def _request_headers(self) -> dict[str, str]:
         return {
             "Authorization": f"Bearer {self.token}",
@@ -89,38 +751,112 @@ class ClashAPI:
             base = self.host
         return f"{base}{endpoint}"
 
+    @property
+    def connections_ws_endpoint(self) -> str:
+        """Return the /connections stream endpoint at the configured interval."""
+        # The core takes the push interval in milliseconds.
+        return f"connections?interval={max(1, round(self.stream_interval * 1000))}"
+
+    def _build_session(
+        self, total_timeout: float | None, ssl_context: ssl.SSLContext | None = None
+    ) -> aiohttp.ClientSession:
+        """Create a session over a connector tuned by the pool options."""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                ssl=ssl_context,
+                limit_per_host=self.pool_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            ),
+            timeout=aiohttp.ClientTimeout(total=total_timeout),
+        )
+
+    def _open_session(
+        self, role: str, pool_key: tuple[Any, ...], factory: Callable[[], aiohttp.ClientSession]
+    ) -> aiohttp.ClientSession:
+        """Return a session for a role according to the pool mode."""
+        if self.pool_mode == POOL_EXTERNAL and self._external_session is not None:
+            return self._external_session
+        if self.pool_mode == POOL_SHARED:
+            key = (
+                role,
+                *pool_key,
+                self.pool_limit_per_host,
+                self.keepalive_timeout,
+                self.dns_cache_ttl,
+            )
+            self._session_keys[role] = key
+            return _acquire_shared_session(key, factory)
+        return factory()
+
+    async def _release_session(
+        self, role: str, session: aiohttp.ClientSession
+    ) -> None:
+        """Close a session or give it back to the pool it came from."""
+        key = self._session_keys.pop(role, None)
+        if key is not None:
+            await _release_shared_session(key)
+        elif session is not self._external_session:
+            await session.close()
+
+    def _ssl_context(self) -> ssl.SSLContext | None:
+        if not self.allow_unsafe:
+            return None
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        return ssl_context
+
     async def _establish_session(self):
         """Establish a session with given configuration."""
-        ssl_context = None
-        if self.allow_unsafe:
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-
+        ssl_context = self._ssl_context()
         new_session = None
         try:
-            new_session = aiohttp.ClientSession(
-                connector=aiohttp.TCPConnector(ssl=ssl_context),
-                timeout=aiohttp.ClientTimeout(total=15),
+            origin = urlsplit(self.host)
+            new_session = self._open_session(
+                "api",
+                (origin.scheme, origin.netloc.lower(), self.allow_unsafe),
+                lambda: self._build_session(REQUEST_TIMEOUT, ssl_context),
             )
             self._session = new_session
             _LOGGER.debug("Session created successfully.")
         except Exception as err:
             if new_session:
-                await new_session.close()
+                await self._release_session("api", new_session)
             raise APIClientError(f"Error creating HTTP session: {err}") from err
 
+    async def _establish_stream_session(self):
+        """Establish the session of long-lived stream subscriptions.
+
+        Streams get their own connection pool, so tearing down the request
+        session after an HTTP failure leaves them connected.
+        """
+        ssl_context = self._ssl_context()
+        new_session = None
+        try:
+            origin = urlsplit(self.host)
+            new_session = self._open_session(
+                "stream",
+                (origin.scheme, origin.netloc.lower(), self.allow_unsafe),
+                lambda: self._build_session(None, ssl_context),
+            )
+            self._stream_session = new_session
+        except Exception as err:
+            if new_session:
+                await self._release_session("stream", new_session)
+            raise APIClientError(f"Error creating stream session: {err}") from err
+
     async def _establish_status_session(self):
-        """Establish a dedicated session for third-party URL probes."""
+        """Establish a session for third-party URL probes."""
         new_session = None
         try:
-            new_session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=10),
+            new_session = self._open_session(
+                "status", (), lambda: self._build_session(STATUS_REQUEST_TIMEOUT)
             )
             self._status_session = new_session
         except Exception as err:
             if new_session:
-                await new_session.close()
+                await self._release_session("status", new_session)
             raise APIClientError(f"Error creating status probe session: {err}") from err
 
     async def _request(
@@ -130,12 +866,99 @@ class ClashAPI:
         params: dict[str, Any] | None = None,
         json_data: dict[str, Any] | None = None,
         read_line: int = 0,
+        summarize: bool = False,
+        track_load: bool = True,
     ) -> Any:
-        """General method for making requests."""
+        """General method for making requests.
+
+        Concurrent identical GETs share one in-flight request and its parsed
+        result, and plain reads of slow-changing endpoints are served from a
+        short-lived cache, so callers must treat the returned payload as
+        read-only. A GET with an empty body counts as a plain read. Requests
+        made with track_load=False, such as delay tests whose failures and
+        latency say nothing about the core, are left out of the load
+        statistics.
+        """
+        if method.upper() != "GET" or json_data:
+            return await self._send_request(
+                method, endpoint, params, json_data, read_line, summarize, track_load
+            )
+        try:
+            key = (
+                endpoint,
+                tuple(sorted((params or {}).items())),
+                read_line,
+                summarize,
+            )
+            hash(key)
+        except TypeError:
+            return await self._send_request(
+                method, endpoint, params, None, read_line, summarize, track_load
+            )
+
+        path = self._cache_path(endpoint)
+        cacheable = (
+            read_line < 1
+            and path.startswith(READ_CACHE_ENDPOINTS)
+            and not path.endswith(("/delay", "/healthcheck"))
+        )
+        if cacheable:
+            hit, value = self._read_cache_get(key)
+            if hit:
+                return value
+
+        # Requests started before the last write are not joined, so a read
+        # issued after a write always observes it.
+        flight_key = (*key, self._cache_generation)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._send_request(
+                    method, endpoint, params, None, read_line, summarize, track_load
+                )
+            )
+            self._inflight[flight_key] = task
+            task.add_done_callback(partial(self._finish_inflight, flight_key, cacheable))
+        else:
+            _LOGGER.debug("Joining in-flight GET request to %s.", endpoint)
+        # Shielded so one caller giving up does not cancel the others.
+        return await asyncio.shield(task)
+
+    def _finish_inflight(
+        self, flight_key: tuple[Any, ...], cacheable: bool, task: asyncio.Future
+    ) -> None:
+        """Forget a finished in-flight request and cache its result.
+
+        Results are only cached if no write invalidated the cache while the
+        request was in flight.
+        """
+        if self._inflight.get(flight_key) is task:
+            del self._inflight[flight_key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if cacheable and flight_key[-1] == self._cache_generation:
+            self._read_cache_put(flight_key[:-1], task.result())
+
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict[str, Any] | None = None,
+        json_data: dict[str, Any] | None = None,
+        read_line: int = 0,
+        summarize: bool = False,
+        track_load: bool = True,
+    ) -> Any:
+        """Send one request and parse its response."""
 
         async def handle_response_format(response: aiohttp.ClientResponse) -> Any:
             if response.status == 204:
                 return None
+            if summarize:
+                parser = ConnectionsSummaryParser()
+                async for chunk in response.content.iter_chunked(SUMMARY_CHUNK_SIZE):
+                    parser.feed(chunk)
+                return parser.result()
             if read_line < 1:
                 return await response.json()
             line_counter = 0
@@ -145,12 +968,27 @@ class ClashAPI:
                     return json.loads(line.decode("utf-8").strip())
             return None
 
-        if self._session is None:
-            await self._establish_session()
+        if not self.breaker.allow():
+            raise APICircuitOpenError(
+                f"Circuit open, core unreachable; next probe in {self.breaker.retry_in:.0f}s"
+            )
+
+        try:
+            if self._session is None:
+                await self._establish_session()
+        except BaseException:
+            self.breaker.release()
+            raise
 
         url = f"{self.host}{endpoint}"
         _LOGGER.debug("Making %s request to %s, read line: %s.", method, url, read_line)
 
+        # Streamed endpoints block until the core emits a line, so only plain
+        # responses contribute latency samples; every request counts for errors.
+        started = time.monotonic()
+        overloaded = False
+        answered = False
+        unreachable = False
         try:
             async with self._session.request(
                 method,
@@ -158,8 +996,12 @@ class ClashAPI:
                 params=params,
                 json=json_data,
                 headers=self._request_headers(),
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
             ) as response:
+                answered = True
+                overloaded = response.status >= 500
                 response.raise_for_status()
+                self._invalidate_for_request(method, endpoint)
                 try:
                     return await handle_response_format(response)
                 except (json.JSONDecodeError, UnicodeDecodeError) as err:
@@ -173,14 +1015,27 @@ class ClashAPI:
                 raise APIAuthError("Invalid API credentials.") from err
             raise APIClientError(f"API request got an invalid response: {err}") from err
         except asyncio.TimeoutError as err:
-            await self.close_session()
+            overloaded = unreachable = True
+            await self._close_sessions()
             raise APITimeoutError(f"API request timed out: {err}") from err
         except aiohttp.ClientConnectionError as err:
-            await self.close_session()
+            overloaded = unreachable = True
+            await self._close_sessions()
             raise APIConnectionError(f"API request connection error: {err}") from err
         except Exception as err:
-            await self.close_session()
+            await self._close_sessions()
             raise APIClientError(f"API request generic failure: {err}") from err
+        finally:
+            if track_load:
+                self.load_stats.record(
+                    time.monotonic() - started if read_line < 1 else None, overloaded
+                )
+            if unreachable:
+                self.breaker.record_failure()
+            elif answered:
+                self.breaker.record_success()
+            else:
+                self.breaker.release()
 
     async def async_ws_request(
         self,
@@ -272,13 +1127,55 @@ class ClashAPI:
         except Exception:
             return False
 
+    @property
+    def capabilities_fingerprint(self) -> Optional[str]:
+        """Return the core fingerprint the capability matrix was probed for."""
+        return self._fingerprint
+
+    async def async_fingerprint(self) -> Optional[str]:
+        """Return a short hash of /version."""
+        version = await self.async_request("GET", "version")
+        if not version:
+            return None
+        source: dict[str, Any] = {"version": version}
+        digest = hashlib.sha256(json.dumps(source, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
     async def async_detect_capabilities(
         self, force: bool = False
     ) -> dict[str, bool]:
-        """Probe API endpoints and websocket support."""
+        """Return endpoint capabilities, probing the core when needed.
+
+        Cached capabilities are checked against the core fingerprint until
+        the core answers once. A changed fingerprint keeps the cached matrix
+        in service while a full re-probe runs in the background.
+        """
         if self._capabilities and not force:
+            if not self._fingerprint_checked:
+                fingerprint = await self.async_fingerprint()
+                # An unreachable core is checked again on the next call.
+                self._fingerprint_checked = fingerprint is not None
+                if fingerprint is not None and fingerprint != self._fingerprint:
+                    _LOGGER.debug(
+                        "Core fingerprint of %s changed, re-probing capabilities.",
+                        self.host,
+                    )
+                    self._reprobe_task = asyncio.create_task(
+                        self._async_probe_capabilities(fingerprint)
+                    )
             return self._capabilities
 
+        fingerprint, capabilities = await asyncio.gather(
+            self.async_fingerprint(), self._async_probe_capabilities()
+        )
+        self._fingerprint = fingerprint
+        self._fingerprint_checked = True
+        return capabilities
+
+    async def _async_probe_capabilities(
+        self, fingerprint: Optional[str] = None
+    ) -> dict[str, bool]:
+        """Probe API endpoints and websocket support."""
         probe_tasks = {
             "proxies": self._probe_http_endpoint("GET", "proxies"),
             "connections": self._probe_http_endpoint("GET", "connections"),
@@ -322,7 +1219,7 @@ class ClashAPI:
         ws_results = await asyncio.gather(
             self._probe_ws_endpoint("traffic"),
             self._probe_ws_endpoint("memory"),
-            self._probe_ws_endpoint("connections?interval=1"),
+            self._probe_ws_endpoint(self.connections_ws_endpoint),
             return_exceptions=True,
         )
         ws_traffic, ws_memory, ws_connections = (
@@ -370,26 +1267,46 @@ class ClashAPI:
         if supported:
             _LOGGER.debug("Detected capabilities for %s: %s", self.host, supported)
 
+        if fingerprint is not None:
+            self._fingerprint = fingerprint
         return capabilities
 
     async def close_session(self):
-        """Safely close sessions."""
+        """Stop subscriptions and safely close sessions."""
+        if self._reprobe_task is not None and not self._reprobe_task.done():
+            self._reprobe_task.cancel()
+        for task in list(self._late_fetches.values()):
+            task.cancel()
+        if self._sampler_stream is not None:
+            await self._sampler_stream.async_stop()
+            self._sampler_stream = None
+        if self._stopping_streams:
+            await asyncio.gather(*self._stopping_streams, return_exceptions=True)
+        await self.async_stop_streams()
+        await self._close_sessions()
+        if self._stream_session is not None:
+            session, self._stream_session = self._stream_session, None
+            try:
+                await self._release_session("stream", session)
+            except Exception as err:
+                _LOGGER.warning(f"Failed to close stream session: {err}")
+
+    async def _close_sessions(self):
+        """Safely close request sessions; streams keep their own session."""
         if self._session is not None:
+            session, self._session = self._session, None
             try:
-                await self._session.close()
+                await self._release_session("api", session)
                 _LOGGER.debug("Session closed successfully.")
             except Exception as err:
                 _LOGGER.warning(f"Failed to close session: {err}")
-            finally:
-                self._session = None
 
         if self._status_session is not None:
+            session, self._status_session = self._status_session, None
             try:
-                await self._status_session.close()
+                await self._release_session("status", session)
             except Exception as err:
                 _LOGGER.warning(f"Failed to close status probe session: {err}")
-            finally:
-                self._status_session = None
 
     async def async_request(
         self,
@@ -399,6 +1316,8 @@ class ClashAPI:
         json_data: dict[str, Any] | None = None,
         read_line: int = 0,
         suppress_errors: bool = True,
+        summarize: bool = False,
+        track_load: bool = True,
     ) -> dict[str, Any]:
         """General async request method."""
         try:
@@ -408,6 +1327,8 @@ class ClashAPI:
                 params=params,
                 json_data=json_data,
                 read_line=read_line,
+                summarize=summarize,
+                track_load=track_load,
             )
         except Exception:
             if suppress_errors:
@@ -423,6 +1344,7 @@ class ClashAPI:
         json_data: dict[str, Any] | None = None,
         read_line: int = 0,
         suppress_errors: bool = True,
+        summarize: bool = False,
     ) -> dict[str, Any]:
         """Async request with retry and backoff for connectivity issues."""
         last_exc = None
@@ -435,8 +1357,12 @@ class ClashAPI:
                     params=params,
                     json_data=json_data,
                     read_line=read_line,
+                    summarize=summarize,
                 )
                 return response or {}
+            except APICircuitOpenError as err:
+                last_exc = err
+                break
             except (APITimeoutError, APIConnectionError) as err:
                 last_exc = err
                 _LOGGER.debug(
@@ -459,6 +1385,126 @@ class ClashAPI:
             return {}
         raise last_exc
 
+    async def async_close_connections(
+        self,
+        connection_ids: list[str],
+        initial_concurrency: int = 5,
+    ) -> dict[str, Any]:
+        """Close connections one by one under AIMD-tuned concurrency.
+
+        The number of DELETEs in flight grows by about one per round trip while
+        closes succeed quickly, and is halved at most once per round trip when
+        a close times out, fails to connect or answers slowly. Transient
+        failures are retried; every id is reported as closed or with its error.
+        """
+        queue = deque(dict.fromkeys(connection_ids))
+        attempts: dict[str, int] = {}
+        results: dict[str, str] = {}
+        limit = float(max(1, initial_concurrency))
+        peak = limit
+        retried = 0
+        last_decrease = 0.0
+        started = time.monotonic()
+
+        async def close(conn_id: str) -> tuple[str, float, Exception | None]:
+            sent = time.monotonic()
+            try:
+                await self._request("DELETE", f"connections/{quote(conn_id, safe='')}")
+            except Exception as err:  # noqa: BLE001
+                return conn_id, time.monotonic() - sent, err
+            return conn_id, time.monotonic() - sent, None
+
+        in_flight: set[asyncio.Future] = set()
+        try:
+            while queue or in_flight:
+                while queue and len(in_flight) < int(limit):
+                    conn_id = queue.popleft()
+                    attempts[conn_id] = attempts.get(conn_id, 0) + 1
+                    in_flight.add(asyncio.ensure_future(close(conn_id)))
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    conn_id, latency, err = task.result()
+                    now = time.monotonic()
+                    congested = isinstance(err, (APITimeoutError, APIConnectionError)) or (
+                        latency > self.BULK_CLOSE_SLOW_LATENCY
+                    )
+                    if congested and now - last_decrease > latency:
+                        limit = max(1.0, limit / 2)
+                        last_decrease = now
+                    elif err is None and not congested:
+                        limit = min(self.BULK_CLOSE_MAX_CONCURRENCY, limit + 1 / limit)
+                        peak = max(peak, limit)
+
+                    if err is None:
+                        results[conn_id] = "closed"
+                    elif (
+                        isinstance(err, (APITimeoutError, APIConnectionError))
+                        and not isinstance(err, APICircuitOpenError)
+                        and attempts[conn_id] <= self.MAX_RETRIES
+                    ):
+                        retried += 1
+                        queue.append(conn_id)
+                    else:
+                        results[conn_id] = str(err) or type(err).__name__
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        elapsed = time.monotonic() - started
+        closed = sum(1 for outcome in results.values() if outcome == "closed")
+        return {
+            "requested": len(results),
+            "closed": closed,
+            "failed": len(results) - closed,
+            "retried": retried,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(closed / elapsed, 1) if elapsed > 0 else None,
+            "peak_concurrency": int(peak),
+            "results": results,
+        }
+
+    async def async_test_delays(
+        self,
+        names: list[str],
+        url: str,
+        timeout: int,
+        max_concurrency: int = 10,
+    ) -> dict[str, dict[str, Any]]:
+        """Test the delay of each proxy once with bounded concurrency.
+
+        Every call is bounded by the test timeout plus a little slack, so a
+        core that stops answering cannot hold the batch open. Each name maps
+        to its delay in milliseconds or to the error that replaced it.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        deadline = timeout / 1000 + self.DELAY_TEST_SLACK
+
+        async def test(name: str) -> tuple[str, dict[str, Any]]:
+            async with semaphore:
+                try:
+                    response = await asyncio.wait_for(
+                        self._request(
+                            "GET",
+                            f"proxies/{quote(name, safe='')}/delay",
+                            params={"url": url, "timeout": timeout},
+                            track_load=False,
+                        ),
+                        deadline,
+                    )
+                except asyncio.TimeoutError:
+                    return name, {"delay": None, "error": "deadline exceeded"}
+                except Exception as err:  # noqa: BLE001
+                    return name, {"delay": None, "error": str(err) or type(err).__name__}
+            delay = response.get("delay") if isinstance(response, dict) else None
+            if not isinstance(delay, (int, float)) or delay <= 0:
+                return name, {"delay": None, "error": "no delay reported"}
+            return name, {"delay": delay}
+
+        results = await asyncio.gather(*(test(name) for name in dict.fromkeys(names)))
+        return dict(results)
+
     async def connected(self, suppress_errors: bool = True) -> bool:
         """Check if API connection is successful by reading /version."""
         try:
@@ -536,7 +1582,11 @@ class ClashAPI:
         request_headers = headers or {}
         start_time = time.monotonic()
         try:
-            async with self._status_session.get(url, headers=request_headers) as response:
+            async with self._status_session.get(
+                url,
+                headers=request_headers,
+                timeout=aiohttp.ClientTimeout(total=STATUS_REQUEST_TIMEOUT),
+            ) as response:
                 duration = time.monotonic() - start_time
                 return {"latency": duration, "status_code": response.status}
         except asyncio.TimeoutError:
@@ -554,6 +1604,139 @@ class ClashAPI:
         await self.async_detect_capabilities()
         return self._available_endpoints or []
 
+    def _ensure_traffic_sampling(self, capabilities: dict[str, bool]) -> None:
+        """Keep a /traffic stream feeding the sampler, preferring websockets.
+
+        A websocket stream that stays silent is demoted to streaming HTTP and
+        retried with the same backoff as the other streams. The stream is
+        registered with the other streams, so push updates deliver its frames
+        too.
+        """
+        if self.traffic_sampler is None:
+            self.traffic_sampler = TrafficSampler()
+        stream = self._sampler_stream
+        if stream is not None and stream.transport == "ws":
+            age = stream.age
+            silent_for = (
+                age if age is not None else time.monotonic() - self._sampler_started
+            )
+            if silent_for > self.STREAM_MAX_AGE:
+                _LOGGER.debug("Traffic sampling stream is silent, switching to HTTP.")
+                self._retire_sampler_stream(stream)
+                self._demote_ws("traffic")
+                stream = None
+            elif age is not None and self._ws_demoted.pop("traffic", None) is not None:
+                self._ws_promotions += 1
+                _LOGGER.debug("Websocket transport for traffic sampling restored.")
+        elif (
+            stream is not None
+            and capabilities.get("ws_traffic")
+            and self._ws_transport_due("traffic")
+        ):
+            _LOGGER.debug("Retrying websocket transport for traffic sampling.")
+            self._retire_sampler_stream(stream)
+            stream = None
+        if stream is None:
+            transport = (
+                "ws"
+                if capabilities.get("ws_traffic") and self._ws_transport_due("traffic")
+                else "http"
+            )
+            stream = ClashStreamSubscription(
+                self, "traffic", "traffic", transport=transport
+            )
+            stream.add_listener(self._sample_traffic_frame)
+            self._sampler_stream = stream
+            self._sampler_started = time.monotonic()
+        self._streams["traffic"] = stream
+        stream.start()
+
+    def _retire_sampler_stream(self, stream: ClashStreamSubscription) -> None:
+        """Stop a replaced sampler stream; close_session awaits the stop."""
+        if self._streams.get("traffic") is stream:
+            del self._streams["traffic"]
+        task = asyncio.get_running_loop().create_task(stream.async_stop())
+        self._stopping_streams.add(task)
+        task.add_done_callback(self._stopping_streams.discard)
+
+    def _sample_traffic_frame(self, key: str) -> None:
+        stream = self._sampler_stream
+        if stream is None or self.traffic_sampler is None:
+            return
+        frame = stream.frame
+        up, down = frame.get("up"), frame.get("down")
+        if isinstance(up, int) and isinstance(down, int):
+            self.traffic_sampler.add(up, down)
+
+    @property
+    def poll_stats(self) -> dict[str, Any]:
+        """Return stale and late endpoint counters of the poll deadline."""
+        return {
+            "stale_endpoints": sorted(self.stale_keys),
+            "stale_total": self._stale_total,
+            "late_total": self._late_total,
+        }
+
+    def compact_payload(self, key: str, payload: Any) -> None:
+        """Replace a payload kept for cadence reuse with a smaller form of it.
+
+        Cached reads of the endpoint it came from are dropped too, so the full
+        payload is not kept alive by the read cache.
+        """
+        entry = self._payload_cache.get(key)
+        if entry is not None:
+            self._payload_cache[key] = (entry[0], payload)
+        source = self._payload_sources.get(key)
+        if source is not None:
+            for read_key in [
+                read_key for read_key in self._read_cache if read_key[0] == source
+            ]:
+                del self._read_cache[read_key]
+
+    def _store_late_payload(self, key: str, task: asyncio.Future) -> None:
+        """Keep the result of a fetch that finished after its cycle deadline."""
+        if self._late_fetches.get(key) is task:
+            del self._late_fetches[key]
+        if task.cancelled():
+            return
+        self._late_total += 1
+        if task.exception() is None and task.result():
+            self._payload_cache[key] = (time.monotonic(), task.result())
+
+    def _release_late_check(self, key: str, task: asyncio.Future) -> None:
+        """Forget a background check that finished after its cycle deadline."""
+        if self._late_fetches.get(key) is task:
+            del self._late_fetches[key]
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.debug("Late %s check failed: %s", key, task.exception())
+
+    @property
+    def transport_stats(self) -> dict[str, Any]:
+        """Return websocket demotion and re-promotion counters."""
+        return {
+            "ws_demotions": self._ws_demotions,
+            "ws_promotions": self._ws_promotions,
+            "ws_demoted": sorted(self._ws_demoted),
+        }
+
+    def _ws_transport_due(self, key: str) -> bool:
+        """Return whether the websocket transport should be used or retried."""
+        demoted = self._ws_demoted.get(key)
+        return demoted is None or time.monotonic() >= demoted[0]
+
+    def _demote_ws(self, key: str) -> None:
+        """Fall back to HTTP for a stream and schedule a websocket retry."""
+        previous = self._ws_demoted.get(key)
+        attempt = previous[1] + 1 if previous else 1
+        if previous is None:
+            self._ws_demotions += 1
+        delay = min(self.WS_REPROMOTE_BASE * (2 ** (attempt - 1)), self.WS_REPROMOTE_MAX)
+        delay = random.uniform(delay / 2, delay)
+        self._ws_demoted[key] = (time.monotonic() + delay, attempt)
+        _LOGGER.debug(
+            "Websocket transport for %s demoted to HTTP, retrying in %.0fs.", key, delay
+        )
+
     async def _fetch_endpoint_with_fallback(
         self,
         key: str,
@@ -562,37 +1745,84 @@ class ClashAPI:
         read_line: int,
         ws_endpoint: str | None,
         suppress_errors: bool,
+        summarize: bool = False,
+        frame_interval: float = 0.0,
     ) -> dict[str, Any]:
-        if ws_endpoint and self._capabilities and self._capabilities.get(f"ws_{key}", False):
-            try:
-                ws_response = await asyncio.wait_for(
-                    self.async_ws_request(
-                        ws_endpoint,
-                        suppress_errors=True,
-                        timeout=3,
-                    ),
-                    timeout=4,
-                )
-            except Exception:
-                ws_response = {}
+        """Read an endpoint from its stream when possible, else over HTTP.
+
+        A streamed frame is usable while it is younger than STREAM_MAX_AGE on
+        top of the period at which the core pushes frames.
+        """
+        if (
+            ws_endpoint
+            and self._capabilities
+            and self._capabilities.get(f"ws_{key}", False)
+            and self._ws_transport_due(key)
+        ):
+            stream = self._get_stream(
+                key,
+                ws_endpoint,
+                decoder=summarize_connections if summarize else None,
+            )
+            ws_response = await stream.async_wait_frame(
+                timeout=self.STREAM_WAIT_TIMEOUT,
+                min_frames=max(read_line, 1),
+                max_age=self.STREAM_MAX_AGE + frame_interval,
+            )
             if ws_response:
+                self.frame_ids[key] = stream.frame_id
+                if self._ws_demoted.pop(key, None) is not None:
+                    self._ws_promotions += 1
+                    _LOGGER.debug("Websocket transport for %s restored.", key)
                 return ws_response
-            self._capabilities[f"ws_{key}"] = False
+            self._streams.pop(key, None)
+            await stream.async_stop()
+            self._demote_ws(key)
 
+        self.frame_ids.pop(key, None)
         return await self.async_retryable_request(
             "GET",
             endpoint,
             params=params,
             read_line=read_line,
             suppress_errors=suppress_errors,
+            summarize=summarize,
         )
 
+    @staticmethod
+    async def _as_proxies_payload(request: Awaitable[Any]) -> Any:
+        """Reshape the /group list into the name-keyed layout of /proxies."""
+        result = await request
+        groups = result.get("proxies") if isinstance(result, dict) else None
+        if not isinstance(groups, list):
+            return result
+        return {
+            "proxies": {
+                group["name"]: group
+                for group in groups
+                if isinstance(group, dict) and group.get("name")
+            }
+        }
+
     async def fetch_data(
         self,
         streaming_detection: bool = False,
         suppress_errors: bool = True,
+        summarize_connections: bool = True,
+        tier_intervals: Optional[dict[str, float]] = None,
+        deadline: Optional[float] = None,
+        traffic_sampling: bool = False,
     ) -> dict[str, Any]:
-        """Get all endpoint data needed by the coordinator."""
+        """Get all endpoint data needed by the coordinator.
+
+        With tier_intervals, endpoints whose cadence tier is not due yet reuse
+        their last good payload instead of being requested. With a deadline,
+        endpoints still running when it expires keep running in the background
+        and their last good payload is returned and reported as stale; the
+        fingerprint check and streaming detection share the same budget. With
+        traffic_sampling, /traffic is consumed continuously and statistics of
+        the samples since the previous call are returned as traffic_stats.
+        """
 
         async def fetch_streaming_service_data():
             results = await asyncio.gather(
@@ -610,21 +1840,54 @@ class ClashAPI:
                         raise APIClientError("Missing streaming detection data")
             return dict(zip((service for service in SERVICE_TABLE), results))
 
-        capabilities = await self.async_detect_capabilities()
+        loop = asyncio.get_running_loop()
+        cutoff = None if deadline is None else loop.time() + deadline
+
+        def remaining() -> Optional[float]:
+            return None if cutoff is None else max(0.0, cutoff - loop.time())
+
+        if deadline is not None and self._capabilities and not self._fingerprint_checked:
+            # The fingerprint check counts against the deadline; the cached
+            # matrix serves while a slow check finishes in the background.
+            capabilities = self._capabilities
+            if "capabilities" not in self._late_fetches:
+                check = asyncio.ensure_future(self.async_detect_capabilities())
+                done, _ = await asyncio.wait({check}, timeout=remaining())
+                if done:
+                    capabilities = check.result()
+                else:
+                    self._late_fetches["capabilities"] = check
+                    check.add_done_callback(
+                        partial(self._release_late_check, "capabilities")
+                    )
+        else:
+            capabilities = await self.async_detect_capabilities()
         read_line_map = {
             endpoint: int(params.get("read_line", 0))
             for endpoint, params in (self._available_endpoints or [])
         }
         endpoint_specs: list[dict[str, Any]] = []
-
-        if capabilities.get("traffic"):
+        sampled: dict[str, Any] = {}
+
+        if capabilities.get("traffic") and traffic_sampling:
+            self._ensure_traffic_sampling(capabilities)
+            stream = self._sampler_stream
+            age = stream.age if stream else None
+            if age is not None and age <= self.STREAM_MAX_AGE and stream.frame:
+                sampled["traffic"] = stream.frame
+            stats = self.traffic_sampler.window()
+            if stats:
+                sampled["traffic_stats"] = stats
+
+        if capabilities.get("traffic") and "traffic" not in sampled:
             endpoint_specs.append(
                 {
                     "key": "traffic",
                     "endpoint": "traffic",
                     "params": None,
                     "read_line": read_line_map.get("traffic", 1),
-                    "ws_endpoint": "traffic",
+                    # The sampler owns the /traffic stream; fall back to a read.
+                    "ws_endpoint": None if traffic_sampling else "traffic",
                 }
             )
         if capabilities.get("memory"):
@@ -644,14 +1907,18 @@ class ClashAPI:
                     "endpoint": "connections",
                     "params": None,
                     "read_line": 0,
-                    "ws_endpoint": "connections?interval=1",
+                    "ws_endpoint": self.connections_ws_endpoint,
+                    "frame_interval": self.stream_interval,
+                    "summarize": summarize_connections,
                 }
             )
         if capabilities.get("proxies"):
+            # Entities only use proxy groups; /group leaves out the leaf nodes
+            # and their delay history, by far the bulk of /proxies.
             endpoint_specs.append(
                 {
                     "key": "proxies",
-                    "endpoint": "proxies",
+                    "endpoint": "group" if capabilities.get("group_detail") else "proxies",
                     "params": None,
                     "read_line": 0,
                     "ws_endpoint": None,
@@ -688,37 +1955,108 @@ class ClashAPI:
                 }
             )
 
-        results = await asyncio.gather(
-            *[
-                self._fetch_endpoint_with_fallback(
-                    key=spec["key"],
-                    endpoint=spec["endpoint"],
-                    params=spec["params"],
-                    read_line=spec["read_line"],
-                    ws_endpoint=spec["ws_endpoint"],
-                    suppress_errors=suppress_errors,
-                )
-                for spec in endpoint_specs
-            ],
-            return_exceptions=True,
-        )
+        now = time.monotonic()
+        cached: dict[str, Any] = {}
+        stale: set[str] = set()
+        due_specs = []
+        for spec in endpoint_specs:
+            key = spec["key"]
+            entry = self._payload_cache.get(key)
+            if key in self._late_fetches:
+                # Still running past an earlier deadline; do not pile up requests.
+                stale.add(key)
+                if entry:
+                    cached[key] = entry[1]
+                continue
+            if tier_intervals:
+                interval = tier_intervals.get(ENDPOINT_TIERS.get(key, ""), 0)
+                if entry and now - entry[0] + CADENCE_TOLERANCE < interval:
+                    cached[key] = entry[1]
+                    continue
+            due_specs.append(spec)
+        endpoint_specs = due_specs
+
+        def fetch(spec: dict[str, Any]) -> Awaitable[Any]:
+            request = self._fetch_endpoint_with_fallback(
+                key=spec["key"],
+                endpoint=spec["endpoint"],
+                params=spec["params"],
+                read_line=spec["read_line"],
+                ws_endpoint=spec["ws_endpoint"],
+                suppress_errors=suppress_errors,
+                summarize=spec.get("summarize", False),
+                frame_interval=spec.get("frame_interval", 0.0),
+            )
+            if spec["endpoint"] == "group":
+                return self._as_proxies_payload(request)
+            return request
+
+        tasks = [asyncio.ensure_future(fetch(spec)) for spec in endpoint_specs]
+        waited = list(tasks)
+        streaming_task: Optional[asyncio.Future] = None
+        if streaming_detection and "streaming" not in self._late_fetches:
+            streaming_task = asyncio.ensure_future(fetch_streaming_service_data())
+            waited.append(streaming_task)
+        pending: set[asyncio.Future] = set()
+        try:
+            if waited:
+                _, pending = await asyncio.wait(waited, timeout=remaining())
+        except asyncio.CancelledError:
+            for task in waited:
+                task.cancel()
+            raise
 
         data: dict[str, Any] = {}
-        for spec, result in zip(endpoint_specs, results):
+        self.last_fetched = set()
+        for spec, task in zip(endpoint_specs, tasks):
             key = spec["key"]
+            if task in pending:
+                # Missed the cycle deadline: finish in the background and serve
+                # the last good payload meanwhile.
+                self._late_fetches[key] = task
+                task.add_done_callback(partial(self._store_late_payload, key))
+                stale.add(key)
+                entry = self._payload_cache.get(key)
+                if entry:
+                    cached[key] = entry[1]
+                elif not suppress_errors:
+                    raise APITimeoutError(f"{key} endpoint missed the poll deadline")
+                continue
+            result = task.exception() or task.result()
             if isinstance(result, Exception):
                 if not suppress_errors:
                     raise result
                 continue
             if result:
                 data[key] = result
+                self.last_fetched.add(key)
+                self._payload_cache[key] = (now, result)
+                self._payload_sources[key] = spec["endpoint"]
             elif not suppress_errors:
                 raise APIClientError(f"Missing data from {key} endpoint")
 
         if streaming_detection:
-            streaming_data = await fetch_streaming_service_data()
-            data["streaming"] = streaming_data
-            _LOGGER.debug("Streaming detection data: %s", streaming_data)
+            if streaming_task is None or streaming_task in pending:
+                if streaming_task is not None:
+                    self._late_fetches["streaming"] = streaming_task
+                    streaming_task.add_done_callback(
+                        partial(self._store_late_payload, "streaming")
+                    )
+                stale.add("streaming")
+                entry = self._payload_cache.get("streaming")
+                if entry:
+                    cached["streaming"] = entry[1]
+                elif not suppress_errors:
+                    raise APITimeoutError("Streaming detection missed the poll deadline")
+            else:
+                streaming_data = streaming_task.result()
+                data["streaming"] = streaming_data
+                self._payload_cache["streaming"] = (now, streaming_data)
+                _LOGGER.debug("Streaming detection data: %s", streaming_data)
+
+        data = {**cached, **data, **sampled}
+        self.stale_keys = stale
+        self._stale_total += len(stale)
 
         return data
 
@@ -737,3 +2075,7 @@ class APITimeoutError(Exception):
 
 class APIConnectionError(Exception):
     """Exception class for connection error."""
+
+
+class APICircuitOpenError(APIConnectionError):
+    """Exception class for requests rejected while the circuit is open."""
@@ -1,6 +1,7 @@
 """Base entity for Clash Controller."""
 
 import logging
+from typing import Any
 
 from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
@@ -37,6 +38,7 @@ class BaseEntity(CoordinatorEntity):
             self._attr_entity_registry_enabled_default = self.entity_data.enabled_default
         self._attr_entity_category = self.entity_data.entity_category
         self._attr_available = True
+        self._written_fingerprint: tuple[Any, ...] | None = None
 
         entity_label = (
             self._entity_name
@@ -55,8 +57,26 @@ class BaseEntity(CoordinatorEntity):
             self._attr_available = True
         else:
             self._attr_available = False
+
+        # Skip the write when neither availability nor the data changed.
+        fingerprint = new_data.fingerprint if new_data else None
+        written = (self._attr_available, self.available, fingerprint)
+        if written == self._written_fingerprint and (not new_data or fingerprint is not None):
+            return
+        self._written_fingerprint = written
+        self.async_write_ha_state()
+
+    @callback
+    def async_write_local_state(self) -> None:
+        """Write a state changed outside a coordinator refresh.
+
+        The next refresh is always written and merged into the entity data,
+        even if it matches the data from before the local change.
+        """
+        self.entity_data.fingerprint = None
+        self._written_fingerprint = None
         self.async_write_ha_state()
-    
+
     @property
     def extra_state_attributes(self):
         """Default extra state attributes for base sensor."""
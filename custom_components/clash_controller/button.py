@@ -53,4 +53,4 @@ class ButtonEntityBase(BaseEntity, ButtonEntity):
         if method is None:
             raise HomeAssistantError("No action defined for this button.")
         await method(*args, **kwargs)
-        self.async_write_ha_state()
+        self.async_write_local_state()
@@ -23,6 +23,12 @@ from .api import (
     APIAuthError,
     APIClientError,
     APIConnectionError,
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_POOL_LIMIT_PER_HOST,
+    POOL_DEDICATED,
+    POOL_EXTERNAL,
+    POOL_SHARED,
     ClashAPI,
 )
 from .const import (
@@ -30,13 +36,34 @@ from .const import (
     CONF_API_URL,
     CONF_BEAR_TOKEN,
     CONF_CONCURRENT_CONNECTIONS,
+    CONF_CONNECTION_TRACKING,
+    CONF_DNS_CACHE_TTL,
+    CONF_KEEPALIVE_TIMEOUT,
+    CONF_MEDIUM_SCAN_INTERVAL,
+    CONF_POLL_DEADLINE,
+    CONF_POOL_LIMIT_PER_HOST,
+    CONF_POOL_MODE,
+    CONF_PUSH_INTERVAL,
+    CONF_PUSH_UPDATES,
+    CONF_SLOW_SCAN_INTERVAL,
     CONF_STREAMING_DETECTION,
+    CONF_TRAFFIC_SAMPLING,
     CONF_USE_SSL,
     DEFAULT_CONCURRENT_CONNECTIONS,
+    DEFAULT_CONNECTION_TRACKING,
+    DEFAULT_MEDIUM_SCAN_INTERVAL,
+    DEFAULT_POLL_DEADLINE,
+    DEFAULT_PUSH_INTERVAL,
+    DEFAULT_PUSH_UPDATES,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
     DEFAULT_STREAMING_DETECTION,
+    DEFAULT_TRAFFIC_SAMPLING,
     DOMAIN,
     MIN_CONCURRENT_CONNECTIONS,
+    MIN_POLL_DEADLINE,
+    MIN_POOL_LIMIT_PER_HOST,
+    MIN_PUSH_INTERVAL,
     MIN_SCAN_INTERVAL,
 )
 
@@ -149,8 +176,19 @@ class ClashControllerOptionsFlow(OptionsFlow):
             if errors.get("base") != "invalid_token":
                 options = dict(config_entry.options)
                 options[CONF_SCAN_INTERVAL] = user_input[CONF_SCAN_INTERVAL]
+                options[CONF_MEDIUM_SCAN_INTERVAL] = user_input[CONF_MEDIUM_SCAN_INTERVAL]
+                options[CONF_SLOW_SCAN_INTERVAL] = user_input[CONF_SLOW_SCAN_INTERVAL]
+                options[CONF_POLL_DEADLINE] = user_input[CONF_POLL_DEADLINE]
                 options[CONF_CONCURRENT_CONNECTIONS] = user_input[CONF_CONCURRENT_CONNECTIONS]
                 options[CONF_STREAMING_DETECTION] = user_input[CONF_STREAMING_DETECTION]
+                options[CONF_TRAFFIC_SAMPLING] = user_input[CONF_TRAFFIC_SAMPLING]
+                options[CONF_CONNECTION_TRACKING] = user_input[CONF_CONNECTION_TRACKING]
+                options[CONF_PUSH_UPDATES] = user_input[CONF_PUSH_UPDATES]
+                options[CONF_PUSH_INTERVAL] = user_input[CONF_PUSH_INTERVAL]
+                options[CONF_POOL_MODE] = user_input[CONF_POOL_MODE]
+                options[CONF_POOL_LIMIT_PER_HOST] = user_input[CONF_POOL_LIMIT_PER_HOST]
+                options[CONF_KEEPALIVE_TIMEOUT] = user_input[CONF_KEEPALIVE_TIMEOUT]
+                options[CONF_DNS_CACHE_TTL] = user_input[CONF_DNS_CACHE_TTL]
 
                 if token:
                     data = dict(config_entry.data)
@@ -166,6 +204,18 @@ class ClashControllerOptionsFlow(OptionsFlow):
                     CONF_SCAN_INTERVAL,
                     default=self.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
                 ): vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL)),
+                vol.Required(
+                    CONF_MEDIUM_SCAN_INTERVAL,
+                    default=self.options.get(CONF_MEDIUM_SCAN_INTERVAL, DEFAULT_MEDIUM_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Clamp(min=0)),
+                vol.Required(
+                    CONF_SLOW_SCAN_INTERVAL,
+                    default=self.options.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL)),
+                vol.Required(
+                    CONF_POLL_DEADLINE,
+                    default=self.options.get(CONF_POLL_DEADLINE, DEFAULT_POLL_DEADLINE),
+                ): vol.All(vol.Coerce(float), vol.Clamp(min=MIN_POLL_DEADLINE)),
                 vol.Required(
                     CONF_CONCURRENT_CONNECTIONS,
                     default=self.options.get(CONF_CONCURRENT_CONNECTIONS, DEFAULT_CONCURRENT_CONNECTIONS),
@@ -178,6 +228,38 @@ class ClashControllerOptionsFlow(OptionsFlow):
                     CONF_STREAMING_DETECTION,
                     default=self.options.get(CONF_STREAMING_DETECTION, DEFAULT_STREAMING_DETECTION)
                 ): cv.boolean,
+                vol.Optional(
+                    CONF_TRAFFIC_SAMPLING,
+                    default=self.options.get(CONF_TRAFFIC_SAMPLING, DEFAULT_TRAFFIC_SAMPLING)
+                ): cv.boolean,
+                vol.Optional(
+                    CONF_CONNECTION_TRACKING,
+                    default=self.options.get(CONF_CONNECTION_TRACKING, DEFAULT_CONNECTION_TRACKING)
+                ): cv.boolean,
+                vol.Optional(
+                    CONF_PUSH_UPDATES,
+                    default=self.options.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES)
+                ): cv.boolean,
+                vol.Required(
+                    CONF_PUSH_INTERVAL,
+                    default=self.options.get(CONF_PUSH_INTERVAL, DEFAULT_PUSH_INTERVAL),
+                ): vol.All(vol.Coerce(float), vol.Clamp(min=MIN_PUSH_INTERVAL)),
+                vol.Required(
+                    CONF_POOL_MODE,
+                    default=self.options.get(CONF_POOL_MODE, POOL_DEDICATED),
+                ): vol.In([POOL_DEDICATED, POOL_SHARED, POOL_EXTERNAL]),
+                vol.Required(
+                    CONF_POOL_LIMIT_PER_HOST,
+                    default=self.options.get(CONF_POOL_LIMIT_PER_HOST, DEFAULT_POOL_LIMIT_PER_HOST),
+                ): vol.All(vol.Coerce(int), vol.Clamp(min=MIN_POOL_LIMIT_PER_HOST)),
+                vol.Required(
+                    CONF_KEEPALIVE_TIMEOUT,
+                    default=self.options.get(CONF_KEEPALIVE_TIMEOUT, DEFAULT_KEEPALIVE_TIMEOUT),
+                ): vol.All(vol.Coerce(float), vol.Clamp(min=1)),
+                vol.Required(
+                    CONF_DNS_CACHE_TTL,
+                    default=self.options.get(CONF_DNS_CACHE_TTL, DEFAULT_DNS_CACHE_TTL),
+                ): vol.All(vol.Coerce(int), vol.Clamp(min=0)),
             }),
             errors=errors,
         )
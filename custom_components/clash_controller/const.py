@@ -14,6 +14,19 @@ CONF_ALLOW_UNSAFE = "allow_unsafe"
 MIN_SCAN_INTERVAL = 10
 DEFAULT_SCAN_INTERVAL = 60
 
+# Adaptive polling stretches the scan interval up to this multiple of the
+# configured one while the core is slow or failing.
+ADAPTIVE_INTERVAL_MAX_FACTOR = 8
+ADAPTIVE_SLOW_LATENCY = 2.0
+ADAPTIVE_ERROR_RATE = 0.25
+
+# 0 polls connections and proxies on every scan, like before tiered polling.
+DEFAULT_MEDIUM_SCAN_INTERVAL = 0
+CONF_MEDIUM_SCAN_INTERVAL = "medium_scan_interval"
+
+DEFAULT_SLOW_SCAN_INTERVAL = 300
+CONF_SLOW_SCAN_INTERVAL = "slow_scan_interval"
+
 MIN_CONCURRENT_CONNECTIONS = 1
 DEFAULT_CONCURRENT_CONNECTIONS = 5
 CONF_CONCURRENT_CONNECTIONS = "concurrent_connections"
@@ -21,11 +34,44 @@ CONF_CONCURRENT_CONNECTIONS = "concurrent_connections"
 CONF_STREAMING_DETECTION = "streaming_detection"
 DEFAULT_STREAMING_DETECTION = False
 
+CONF_TRAFFIC_SAMPLING = "traffic_sampling"
+DEFAULT_TRAFFIC_SAMPLING = False
+
+CONF_CONNECTION_TRACKING = "connection_tracking"
+DEFAULT_CONNECTION_TRACKING = False
+
+CONF_PUSH_UPDATES = "push_updates"
+DEFAULT_PUSH_UPDATES = False
+
+MIN_PUSH_INTERVAL = 0.5
+DEFAULT_PUSH_INTERVAL = 1.0
+CONF_PUSH_INTERVAL = "push_interval"
+
+MIN_POLL_DEADLINE = 1
+DEFAULT_POLL_DEADLINE = 10
+CONF_POLL_DEADLINE = "poll_deadline"
+
+CONF_POOL_MODE = "pool_mode"
+CONF_POOL_LIMIT_PER_HOST = "pool_limit_per_host"
+CONF_KEEPALIVE_TIMEOUT = "keepalive_timeout"
+CONF_DNS_CACHE_TTL = "dns_cache_ttl"
+MIN_POOL_LIMIT_PER_HOST = 1
+
+# Batch latency results stay readable this long without re-testing.
+LATENCY_CACHE_TTL = 300
+DEFAULT_LATENCY_CONCURRENCY = 10
+MAX_LATENCY_CONCURRENCY = 64
+
+# Delay samples kept per proxy for rolling latency statistics.
+LATENCY_HISTORY_SIZE = 120
+
 # Service names
 
 API_CALL_SERVICE_NAME = "api_call_service"
+BATCH_LATENCY_SERVICE_NAME = "batch_latency_service"
 DNS_QUERY_SERVICE_NAME = "dns_query_service"
 FILTER_CONNECTION_SERVICE_NAME = "filter_connection_service"
 GET_LATENCY_SERVICE_NAME = "get_latency_service"
 GET_RULE_SERVICE_NAME = "get_rule_service"
+MATCH_RULE_SERVICE_NAME = "match_rule_service"
 REBOOT_CORE_SERVICE_NAME = "reboot_core_service"
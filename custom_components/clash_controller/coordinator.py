@@ -2,32 +2,80 @@
 
 from __future__ import annotations
 
+import asyncio
+from array import array
 from dataclasses import dataclass
+import hashlib
+import heapq
+import json
 import logging
 import re
+import time
 from datetime import timedelta
+from collections import deque
+from collections.abc import Container
 from typing import Any
 from urllib.parse import quote
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_SCAN_INTERVAL
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .api import ClashAPI, SERVICE_TABLE
+from .api import (
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_POOL_LIMIT_PER_HOST,
+    POOL_DEDICATED,
+    POOL_EXTERNAL,
+    ClashAPI,
+    ClashStreamSubscription,
+    SERVICE_TABLE,
+)
+from .graph import ProxyGraph
+from .rules import RuleMatcher, RuleTable
 from .const import (
     DOMAIN,
+    ADAPTIVE_ERROR_RATE,
+    ADAPTIVE_INTERVAL_MAX_FACTOR,
+    ADAPTIVE_SLOW_LATENCY,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_CONCURRENT_CONNECTIONS,
     DEFAULT_STREAMING_DETECTION,
+    DEFAULT_CONNECTION_TRACKING,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_PUSH_INTERVAL,
+    DEFAULT_MEDIUM_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
     CONF_CONCURRENT_CONNECTIONS,
     CONF_STREAMING_DETECTION,
+    CONF_CONNECTION_TRACKING,
+    CONF_PUSH_UPDATES,
+    CONF_PUSH_INTERVAL,
+    CONF_MEDIUM_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_POOL_MODE,
+    CONF_POOL_LIMIT_PER_HOST,
+    CONF_KEEPALIVE_TIMEOUT,
+    CONF_DNS_CACHE_TTL,
+    CONF_POLL_DEADLINE,
+    DEFAULT_POLL_DEADLINE,
+    DEFAULT_LATENCY_CONCURRENCY,
+    LATENCY_CACHE_TTL,
+    LATENCY_HISTORY_SIZE,
+    CONF_TRAFFIC_SAMPLING,
+    DEFAULT_TRAFFIC_SAMPLING,
 )
 
 _LOGGER = logging.getLogger(__name__)
 DEFAULT_HEALTHCHECK_TIMEOUT_MS = 5000
+# Built-in outbounds that have no meaningful delay.
+UNTESTABLE_PROXY_TYPES = frozenset({"Direct", "Reject", "RejectDrop", "Pass", "Compatible"})
+
 CORE_DATA_KEYS = frozenset(
     {
         "traffic",
@@ -58,6 +106,227 @@ class ClashEntityData:
     action: dict[str, Any] | None = None
     unique_key: str | None = None
     unique_id: str = ""
+    fingerprint: int | None = None
+
+
+# Fields the fingerprint covers; the others are refreshed on every poll.
+FINGERPRINTED_FIELDS = ("state", "attributes", "options", "icon")
+UNFINGERPRINTED_FIELDS = tuple(
+    field
+    for field in ClashEntityData.__slots__
+    if field not in FINGERPRINTED_FIELDS and field != "fingerprint"
+)
+
+
+class ConnectionDeltaTracker:
+    """Diff consecutive /connections snapshots using a compact index.
+
+    The previous snapshot is kept as an id to row mapping over parallel
+    arrays of upload, download and start time, so no connection dicts are
+    retained between polls.
+    """
+
+    TOP_CONNECTIONS = 5
+
+    def __init__(self) -> None:
+        """Initialize an empty tracker."""
+        self._index: dict[str, int] = {}
+        self._upload = array("q")
+        self._download = array("q")
+        self._start = array("d")
+        self._taken_at: float | None = None
+        self.stats: dict[str, Any] = {}
+
+    @staticmethod
+    def _parse_start(value: Any, fallback: float) -> float:
+        parsed = dt_util.parse_datetime(value) if isinstance(value, str) else None
+        return parsed.timestamp() if parsed else fallback
+
+    def update(self, connections: list[dict[str, Any]]) -> dict[str, Any]:
+        """Diff a snapshot against the previous one and return rate stats."""
+        now = time.monotonic()
+        wall_now = time.time()
+        elapsed = now - self._taken_at if self._taken_at is not None else None
+
+        old_index = self._index
+        old_upload = self._upload
+        old_download = self._download
+        old_start = self._start
+        index: dict[str, int] = {}
+        upload = array("q")
+        download = array("q")
+        start = array("d")
+        opened = 0
+        transferred = 0
+        top: list[tuple[float, str, Any]] = []
+        top_floor = -1.0
+
+        for conn in connections:
+            conn_id = conn.get("id")
+            if not conn_id or conn_id in index:
+                continue
+            up = conn.get("upload") or 0
+            down = conn.get("download") or 0
+            row = old_index.get(conn_id)
+            if row is None:
+                opened += 1
+                started = self._parse_start(conn.get("start"), wall_now)
+                delta = up + down
+                window = min(wall_now - started, elapsed or 0.0)
+            else:
+                started = old_start[row]
+                delta = up - old_upload[row] + down - old_download[row]
+                window = elapsed
+
+            index[conn_id] = len(upload)
+            upload.append(up)
+            download.append(down)
+            start.append(started)
+
+            if elapsed:
+                transferred += delta
+                rate = delta / (window if window > 1.0 else 1.0)
+                if rate > top_floor:
+                    entry = (rate, conn_id, conn.get("metadata"))
+                    if len(top) < self.TOP_CONNECTIONS:
+                        heapq.heappush(top, entry)
+                    else:
+                        heapq.heapreplace(top, entry)
+                    if len(top) == self.TOP_CONNECTIONS:
+                        top_floor = top[0][0]
+
+        self._index = index
+        self._upload = upload
+        self._download = download
+        self._start = start
+        self._taken_at = now
+
+        if not elapsed:
+            self.stats = {"live": len(index)}
+            return self.stats
+
+        live = len(index)
+        closed = len(old_index) - (live - opened)
+        self.stats = {
+            "live": live,
+            "opened_rate": round(opened / elapsed, 3),
+            "closed_rate": round(closed / elapsed, 3),
+            "throughput_avg": round(transferred / elapsed / live, 1) if live else 0.0,
+            "throughput_max": round(max(top)[0], 1) if top else 0.0,
+            "top_connections": [
+                {
+                    "id": conn_id,
+                    "host": (metadata or {}).get("host")
+                    or (metadata or {}).get("destinationIP"),
+                    "rate": round(rate, 1),
+                }
+                for rate, conn_id, metadata in sorted(
+                    top, key=lambda item: item[0], reverse=True
+                )
+            ],
+        }
+        return self.stats
+
+
+class LatencyHistory:
+    """Per-proxy ring buffers of delay samples with rolling statistics.
+
+    Samples come from the history lists in /proxies and from latency tests
+    run through the services. Each proxy keeps a preallocated array of
+    delays in milliseconds, 0 marking a failed test, so memory stays bounded
+    however long the integration runs.
+    """
+
+    def __init__(self, capacity: int = LATENCY_HISTORY_SIZE) -> None:
+        """Initialize an empty history."""
+        self.capacity = capacity
+        self._samples: dict[str, array] = {}
+        self._written: dict[str, int] = {}
+        self._last_entry: dict[str, Any] = {}
+        self._pending: dict[str, deque[int]] = {}
+        self._stats: dict[str, dict[str, Any]] = {}
+
+    @staticmethod
+    def _delay(delay: Any) -> int:
+        """Return a delay in milliseconds, 0 for a failed test."""
+        return int(delay) if isinstance(delay, (int, float)) and delay > 0 else 0
+
+    def add(self, name: str, delay: Any) -> None:
+        """Append one sample, overwriting the oldest when full."""
+        buffer = self._samples.get(name)
+        if buffer is None:
+            buffer = self._samples[name] = array("i", bytes(4 * self.capacity))
+        written = self._written.get(name, 0)
+        buffer[written % self.capacity] = self._delay(delay)
+        self._written[name] = written + 1
+        self._stats.pop(name, None)
+
+    def record(self, name: str, delay: Any) -> None:
+        """Add a result measured through the services.
+
+        The core appends the same result to its own history, so the next
+        history entry with that delay is not counted again.
+        """
+        self.add(name, delay)
+        pending = self._pending.get(name)
+        if pending is None:
+            pending = self._pending[name] = deque(maxlen=self.capacity)
+        pending.append(self._delay(delay))
+
+    def ingest_proxies(self, proxies: dict[str, Any]) -> None:
+        """Add history entries after the last one ingested.
+
+        The core appends to each history list in order, so entries are
+        located by the core's own timestamp of the last one ingested.
+        """
+        for name, item in (proxies.get("proxies") or {}).items():
+            entries = item.get("history") or ()
+            if not entries:
+                continue
+            last_entry = self._last_entry.get(name)
+            start = 0
+            if last_entry is not None:
+                for index in range(len(entries) - 1, -1, -1):
+                    if entries[index].get("time") == last_entry:
+                        start = index + 1
+                        break
+            self._last_entry[name] = entries[-1].get("time")
+            pending = self._pending.get(name)
+            for entry in entries[start:]:
+                delay = self._delay(entry.get("delay"))
+                if pending and delay in pending:
+                    pending.remove(delay)
+                    continue
+                self.add(name, delay)
+
+    def prune(self, known: Container[str]) -> None:
+        """Forget proxies that are no longer known."""
+        for name in [name for name in self._samples if name not in known]:
+            del self._samples[name]
+            self._written.pop(name, None)
+            self._last_entry.pop(name, None)
+            self._pending.pop(name, None)
+            self._stats.pop(name, None)
+
+    def stats(self, name: str) -> dict[str, Any]:
+        """Return p50, p95 and loss rate over the retained samples of a proxy."""
+        cached = self._stats.get(name)
+        if cached is not None:
+            return cached
+        count = min(self._written.get(name, 0), self.capacity)
+        if not count:
+            return {}
+        values = self._samples[name][:count].tolist()
+        delays = sorted(value for value in values if value > 0)
+        stats: dict[str, Any] = {
+            "latency_samples": count,
+            "loss_rate": round(1 - len(delays) / count, 3),
+        }
+        if delays:
+            stats["latency_p50"] = delays[(len(delays) - 1) // 2]
+            stats["latency_p95"] = delays[max(0, -(-len(delays) * 95 // 100) - 1)]
+        self._stats[name] = stats
+        return stats
 
 
 class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
@@ -81,6 +350,31 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
         self.streaming_detection = config_entry.options.get(
             CONF_STREAMING_DETECTION, DEFAULT_STREAMING_DETECTION
         )
+        self.traffic_sampling = config_entry.options.get(
+            CONF_TRAFFIC_SAMPLING, DEFAULT_TRAFFIC_SAMPLING
+        )
+        self.connection_tracking = config_entry.options.get(
+            CONF_CONNECTION_TRACKING, DEFAULT_CONNECTION_TRACKING
+        )
+        self.push_updates = config_entry.options.get(
+            CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES
+        )
+        self.push_interval = config_entry.options.get(
+            CONF_PUSH_INTERVAL, DEFAULT_PUSH_INTERVAL
+        )
+        self.effective_interval = float(self.poll_interval)
+        self.poll_deadline = config_entry.options.get(
+            CONF_POLL_DEADLINE, DEFAULT_POLL_DEADLINE
+        )
+        self.tier_intervals = {
+            "fast": 0,
+            "medium": config_entry.options.get(
+                CONF_MEDIUM_SCAN_INTERVAL, DEFAULT_MEDIUM_SCAN_INTERVAL
+            ),
+            "slow": config_entry.options.get(
+                CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL
+            ),
+        }
 
         super().__init__(
             hass,
@@ -98,15 +392,54 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
         capabilities = (
             dict(stored_capabilities) if isinstance(stored_capabilities, dict) else None
         )
+        pool_mode = config_entry.options.get(CONF_POOL_MODE, POOL_DEDICATED)
         self.api = ClashAPI(
             host=self.host,
             token=self.token,
             allow_unsafe=self.allow_unsafe,
             available_endpoints=available_endpoints,
             capabilities=capabilities,
+            capabilities_fingerprint=self.config_entry.data.get(
+                "capabilities_fingerprint"
+            ),
+            pool_mode=pool_mode,
+            pool_limit_per_host=config_entry.options.get(
+                CONF_POOL_LIMIT_PER_HOST, DEFAULT_POOL_LIMIT_PER_HOST
+            ),
+            keepalive_timeout=config_entry.options.get(
+                CONF_KEEPALIVE_TIMEOUT, DEFAULT_KEEPALIVE_TIMEOUT
+            ),
+            dns_cache_ttl=config_entry.options.get(
+                CONF_DNS_CACHE_TTL, DEFAULT_DNS_CACHE_TTL
+            ),
+            session=(
+                async_get_clientsession(hass, verify_ssl=not self.allow_unsafe)
+                if pool_mode == POOL_EXTERNAL
+                else None
+            ),
+            # Streamed snapshots are only consumed once per publish or poll.
+            stream_interval=(
+                self.push_interval if self.push_updates else self.poll_interval
+            ),
         )
         self._data_by_name: dict[str, ClashEntityData] = {}
         self._data_by_unique_id: dict[str, ClashEntityData] = {}
+        self._proxy_entity_cache: dict[str, list[Any]] = {}
+        self._last_response: dict[str, Any] = {}
+        self.rule_table: RuleTable | None = None
+        self._rule_table_generation = 0
+        self._rule_table_checked = 0.0
+        self._latency_cache: dict[tuple[Any, ...], tuple[float, dict[str, Any]]] = {}
+        self._delay_cache: dict[tuple[Any, ...], tuple[float, dict[str, Any]]] = {}
+        self.connection_tracker = ConnectionDeltaTracker()
+        self._tracked_frame_id: int | None = None
+        self.latency_history = LatencyHistory()
+        self.proxy_graph = ProxyGraph()
+        self._push_listeners: dict[
+            str, tuple[ClashStreamSubscription, CALLBACK_TYPE]
+        ] = {}
+        self._push_pending: set[str] = set()
+        self._push_timer: asyncio.TimerHandle | None = None
         _LOGGER.debug(f"Clash API initialized for coordinator {self.name}")
 
     async def _get_device(self) -> DeviceInfo:
@@ -145,48 +478,475 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
             response = await self.api.fetch_data(
                 streaming_detection=self.streaming_detection,
                 suppress_errors=True,
+                summarize_connections=not self.connection_tracking,
+                tier_intervals=self.tier_intervals,
+                deadline=self.poll_deadline,
+                traffic_sampling=self.traffic_sampling,
             )
             if not CORE_DATA_KEYS.intersection(response):
                 raise UpdateFailed("No data returned from Clash core.")
             if not self.device:
                 self.device = await self._get_device()
         except Exception as err:
+            self._adapt_update_interval(failed=True)
             raise UpdateFailed(err) from err
 
+        self._adapt_update_interval()
+        self._ingest_connections(
+            response,
+            fresh="connections" in self.api.last_fetched,
+            frame_id=self.api.frame_ids.get("connections"),
+        )
+        self._ingest_proxies(response)
         data = self._build_entity_data(response)
         real_entities = [
-            item for item in data if item.entity_type not in {"fakeip_flush_button", "dns_flush_button"}
+            item
+            for item in data
+            if item.entity_type
+            not in {"fakeip_flush_button", "dns_flush_button", "poll_interval_sensor"}
         ]
         if not real_entities:
             raise UpdateFailed("Empty response")
 
+        self._last_response = response
+        # A background re-probe after a core upgrade lands here; storing it
+        # reloads the entry through the update listener to pick up changes.
+        if self.api.capabilities_fingerprint != self.config_entry.data.get(
+            "capabilities_fingerprint"
+        ):
+            self.async_store_capabilities()
+        if self.push_updates:
+            self._async_attach_push_listeners()
         return data
 
+    @callback
+    def async_store_capabilities(self) -> None:
+        """Persist probed capabilities and their core fingerprint when changed."""
+        capabilities = self.api.capabilities or {}
+        fingerprint = self.api.capabilities_fingerprint
+        normalized_endpoints = [list(item) for item in self.api.available_endpoints or []]
+        data = self.config_entry.data
+        if (
+            data.get("capabilities") == capabilities
+            and data.get("available_endpoints") == normalized_endpoints
+            and data.get("capabilities_fingerprint") == fingerprint
+        ):
+            return
+        self.hass.config_entries.async_update_entry(
+            self.config_entry,
+            data={
+                **data,
+                "available_endpoints": normalized_endpoints,
+                "capabilities": capabilities,
+                "capabilities_fingerprint": fingerprint,
+            },
+        )
+
+    def _rule_table_signature(self) -> tuple[Any, ...]:
+        """Return what the loaded rule set depends on.
+
+        Rules only change with the running config or a rule provider refresh,
+        so the table is keyed on the core fingerprint, a digest of the last
+        polled configs and the rule providers' updatedAt stamps.
+        """
+        configs = self._last_response.get("configs")
+        config_digest = (
+            hashlib.sha256(
+                json.dumps(configs, sort_keys=True, default=str).encode()
+            ).hexdigest()[:16]
+            if configs
+            else None
+        )
+        providers = (self._last_response.get("providers_rules") or {}).get(
+            "providers"
+        ) or {}
+        provider_stamps = tuple(
+            sorted(
+                (str(name), str((info or {}).get("updatedAt", "")))
+                for name, info in providers.items()
+            )
+        )
+        return (self.api.capabilities_fingerprint, config_digest, provider_stamps)
+
+    async def async_get_rule_table(self) -> RuleTable:
+        """Return the indexed rule table, fetching /rules only when stale.
+
+        The table is dropped whenever a write invalidates the cached configs
+        or rules. Its content digest is re-checked once per slow tier, so
+        rules reloaded outside Home Assistant are picked up too.
+        """
+        if self._rule_table_generation != self.api.rules_generation:
+            self._rule_table_generation = self.api.rules_generation
+            self.rule_table = None
+        signature = self._rule_table_signature()
+        now = time.monotonic()
+        if (
+            self.rule_table is not None
+            and self.rule_table.signature == signature
+            and now - self._rule_table_checked < self.tier_intervals["slow"]
+        ):
+            return self.rule_table
+        response = await self.api.async_request(
+            method="GET", endpoint="rules", suppress_errors=False
+        )
+        rules = response.get("rules", [])
+        digest = await self.hass.async_add_executor_job(RuleTable.content_digest, rules)
+        self._rule_table_checked = now
+        if self.rule_table is not None and self.rule_table.digest == digest:
+            # A provider refresh that left the rules as they were keeps the
+            # built indexes and matcher.
+            self.rule_table.signature = signature
+            return self.rule_table
+        self.rule_table = await self.hass.async_add_executor_job(
+            RuleTable, rules, signature, digest
+        )
+        return self.rule_table
+
+    async def async_get_rule_matcher(self) -> RuleMatcher:
+        """Return the first-match evaluator for the current rule table."""
+        table = await self.async_get_rule_table()
+        return await self.hass.async_add_executor_job(lambda: table.matcher)
+
+    @staticmethod
+    def _select_names(
+        candidates: list[str], wanted: list[str] | None, pattern: str | None
+    ) -> list[str]:
+        """Pick names listed explicitly, matching a regex, or all with "all"."""
+        if wanted and any(name.lower() == "all" for name in wanted):
+            return list(candidates)
+        selected = [name for name in wanted or [] if name in candidates]
+        if pattern:
+            regex = re.compile(pattern)
+            selected.extend(name for name in candidates if regex.search(name))
+        return list(dict.fromkeys(selected))
+
+    async def async_batch_latency(
+        self,
+        groups: list[str] | None = None,
+        nodes: list[str] | None = None,
+        group_pattern: str | None = None,
+        node_pattern: str | None = None,
+        url: str = "http://www.gstatic.com/generate_204",
+        timeout: int = 5000,
+        max_concurrency: int = DEFAULT_LATENCY_CONCURRENCY,
+        use_cache: bool = True,
+    ) -> dict[str, Any]:
+        """Test many groups and nodes at once and rank the results.
+
+        Groups are expanded to their members so that a node shared by several
+        groups is tested once. Responses are cached per selection and delays
+        per node for LATENCY_CACHE_TTL seconds; a repeated selection is
+        answered before any proxy data is fetched, and a new one only tests
+        the nodes without a cached delay. Rolling statistics of the tested
+        nodes are returned under stats.
+        """
+        now = time.monotonic()
+        self._latency_cache = {
+            k: v for k, v in self._latency_cache.items() if now - v[0] <= LATENCY_CACHE_TTL
+        }
+        self._delay_cache = {
+            k: v for k, v in self._delay_cache.items() if now - v[0] <= LATENCY_CACHE_TTL
+        }
+        selection = (
+            tuple(groups or ()),
+            tuple(nodes or ()),
+            group_pattern,
+            node_pattern,
+            url,
+            timeout,
+        )
+        cached = self._latency_cache.get(selection) if use_cache else None
+        if cached is not None:
+            return {
+                **cached[1],
+                "stats": self._latency_stats(cached[1]),
+                "cached": True,
+                "age": round(now - cached[0], 1),
+            }
+
+        graph = self.proxy_graph
+        if (self.api.capabilities or {}).get("group_detail"):
+            # Polling /group leaves nodes defined inline in the config out of
+            # the graph; only provider nodes reach it.
+            proxies = await self.api.async_request(
+                method="GET", endpoint="proxies", suppress_errors=False
+            )
+            self.latency_history.ingest_proxies(proxies)
+            graph.update_proxies(proxies.get("proxies") or {})
+            self.latency_history.prune(graph.known_names())
+
+        def testable(name: str) -> bool:
+            return (graph.get(name) or {}).get("type") not in UNTESTABLE_PROXY_TYPES
+
+        group_names = [name for name, _ in graph.groups() if name != "GLOBAL"]
+        node_names = [name for name, _ in graph.nodes() if testable(name)]
+        selected_groups = self._select_names(group_names, groups, group_pattern)
+        selected_nodes = self._select_names(node_names, nodes, node_pattern)
+        members = {
+            group: [name for name in graph.members(group) if testable(name)]
+            for group in selected_groups
+        }
+        targets = list(
+            dict.fromkeys(
+                [name for group in selected_groups for name in members[group]]
+                + selected_nodes
+            )
+        )
+
+        results: dict[str, dict[str, Any]] = {}
+        tested_at: dict[str, float] = {}
+        if use_cache:
+            for name in targets:
+                hit = self._delay_cache.get((name, url, timeout))
+                if hit is not None:
+                    tested_at[name], results[name] = hit
+        missing = [name for name in targets if name not in results]
+        if missing:
+            fresh = await self.api.async_test_delays(
+                missing, url, timeout, max_concurrency
+            )
+            now = time.monotonic()
+            for name in missing:
+                results[name] = fresh[name]
+                tested_at[name] = now
+                self._delay_cache[(name, url, timeout)] = (now, fresh[name])
+                self.latency_history.record(name, fresh[name]["delay"])
+
+        def ranked(names: list[str]) -> dict[str, Any]:
+            alive = sorted(
+                (
+                    (name, results[name]["delay"])
+                    for name in names
+                    if results[name]["delay"]
+                ),
+                key=lambda x: x[1],
+            )
+            return {
+                "fastest_node": alive[0][0] if alive else None,
+                "latency": [list(item) for item in alive],
+            }
+
+        response = {
+            **ranked(targets),
+            "failed": {
+                name: results[name]["error"]
+                for name in targets
+                if not results[name]["delay"]
+            },
+            "groups": {group: ranked(members[group]) for group in selected_groups},
+            "tested": len(targets),
+            "tested_at": dt_util.utcnow().isoformat(),
+        }
+        oldest = min(tested_at.values(), default=now)
+        self._latency_cache[selection] = (oldest, response)
+        return {
+            **response,
+            "stats": self._latency_stats(response),
+            "cached": not missing,
+            "age": round(time.monotonic() - oldest, 1),
+        }
+
+    def _latency_stats(self, response: dict[str, Any]) -> dict[str, Any]:
+        """Return the rolling latency statistics of the nodes in a response."""
+        names = [name for name, _ in response["latency"]] + list(response["failed"])
+        return {
+            name: stats for name in names if (stats := self.latency_history.stats(name))
+        }
+
+    def _adapt_update_interval(self, failed: bool = False) -> None:
+        """Stretch the poll interval while the core is struggling.
+
+        The interval doubles when requests are slow or failing and decays back
+        toward the configured scan interval once the core answers promptly.
+        """
+        stats = self.api.load_stats
+        floor = float(self.poll_interval)
+        current = self.effective_interval
+        if (
+            failed
+            or stats.error_rate >= ADAPTIVE_ERROR_RATE
+            or stats.latency >= ADAPTIVE_SLOW_LATENCY
+        ):
+            target = min(current * 2, floor * ADAPTIVE_INTERVAL_MAX_FACTOR)
+        elif stats.error_rate < ADAPTIVE_ERROR_RATE / 2 and (
+            stats.latency < ADAPTIVE_SLOW_LATENCY / 2
+        ):
+            target = max(current * 0.75, floor)
+        else:
+            target = current
+        if target == current:
+            return
+
+        _LOGGER.debug(
+            "Adjusting poll interval from %.1fs to %.1fs (latency %.2fs, error rate %.2f).",
+            current,
+            target,
+            stats.latency,
+            stats.error_rate,
+        )
+        self.effective_interval = target
+        self.update_interval = timedelta(seconds=target)
+
+    @callback
+    def _async_attach_push_listeners(self) -> None:
+        """Feed frames of every running websocket stream into push updates."""
+        for key, stream in self.api.streams.items():
+            attached = self._push_listeners.get(key)
+            if attached and attached[0] is stream:
+                continue
+            if attached:
+                attached[1]()
+            self._push_listeners[key] = (
+                stream,
+                stream.add_listener(self._async_handle_stream_frame),
+            )
+
+    @callback
+    def _async_handle_stream_frame(self, key: str) -> None:
+        """Queue a streamed frame and schedule one coalesced publish."""
+        self._push_pending.add(key)
+        if self._push_timer is None:
+            self._push_timer = self.hass.loop.call_later(
+                self.push_interval, self._async_flush_push_updates
+            )
+
+    @callback
+    def _async_flush_push_updates(self) -> None:
+        """Publish the latest streamed frames merged into the last poll."""
+        self._push_timer = None
+        keys, self._push_pending = self._push_pending, set()
+        if not self._last_response or not self.last_update_success:
+            return
+
+        response = dict(self._last_response)
+        frame_ids: dict[str, int] = {}
+        for key in keys:
+            stream = self.api.streams.get(key)
+            frame = stream.frame if stream else None
+            if frame:
+                response[key] = frame
+                frame_ids[key] = stream.frame_id
+        self._ingest_connections(response, frame_id=frame_ids.get("connections"))
+        self._last_response = response
+
+        # async_set_updated_data would reschedule the regular poll on every
+        # frame and starve /proxies, /configs and /providers of refreshes.
+        self.data = self._build_entity_data(response)
+        self.async_update_listeners()
+
+    async def async_shutdown(self) -> None:
+        """Detach push listeners and cancel pending publishes."""
+        for _, remove_listener in self._push_listeners.values():
+            remove_listener()
+        self._push_listeners.clear()
+        self._push_pending.clear()
+        if self._push_timer is not None:
+            self._push_timer.cancel()
+            self._push_timer = None
+        await super().async_shutdown()
+
+    def _ingest_connections(
+        self,
+        response: dict[str, Any],
+        fresh: bool = True,
+        frame_id: int | None = None,
+    ) -> None:
+        """Feed full connection lists to the tracker and keep only a summary.
+
+        Payloads reused from the cadence cache, and stream frames already fed
+        by the poll or a push update, are not fed again, so the tracker only
+        measures churn between real snapshots. The summary also replaces the
+        payload kept for cadence reuse.
+        """
+        connections = response.get("connections")
+        if not isinstance(connections, dict) or "connectionCount" in connections:
+            return
+        conn_list = connections.get("connections") or []
+        if (
+            self.connection_tracking
+            and fresh
+            and (frame_id is None or frame_id != self._tracked_frame_id)
+        ):
+            self.connection_tracker.update(conn_list)
+            self._tracked_frame_id = frame_id
+        response["connections"] = {
+            "uploadTotal": connections.get("uploadTotal"),
+            "downloadTotal": connections.get("downloadTotal"),
+            "connectionCount": len(conn_list),
+        }
+        self.api.compact_payload("connections", response["connections"])
+
+    def _ingest_proxies(self, response: dict[str, Any]) -> None:
+        """Fold raw proxy payloads into the proxy graph and keep only summaries.
+
+        The summaries also replace the payloads kept for cadence reuse, so
+        node objects are held once, by the graph.
+        """
+        group_only = bool((self.api.capabilities or {}).get("group_detail"))
+        proxies = response.get("proxies")
+        raw_proxies = isinstance(proxies, dict) and isinstance(proxies.get("proxies"), dict)
+        providers = response.get("providers_proxies")
+        raw_providers = isinstance(providers, dict) and any(
+            isinstance(info, dict) and "proxies" in info
+            for info in (providers.get("providers") or {}).values()
+        )
+        if raw_providers:
+            response["providers_proxies"] = {
+                "providers": self.proxy_graph.update_providers(providers["providers"])
+            }
+            self.api.compact_payload("providers_proxies", response["providers_proxies"])
+        if raw_proxies:
+            self.latency_history.ingest_proxies(proxies)
+            self.proxy_graph.update_proxies(proxies["proxies"], groups_only=group_only)
+        if raw_proxies or raw_providers:
+            self.latency_history.prune(self.proxy_graph.known_names())
+        if raw_proxies or (raw_providers and "proxies" in response):
+            response["proxies"] = self.proxy_graph.summary()
+            self.api.compact_payload("proxies", response["proxies"])
+
     @staticmethod
     def _slugify(value: str) -> str:
         return re.sub(r"[^a-z0-9_]+", "_", value.lower().replace(" ", "_")).strip("_")
 
     def _build_entity_data(self, response: dict[str, Any]) -> list[ClashEntityData]:
-        """Construct entity descriptions from API response."""
+        """Construct entity descriptions from API response.
+
+        Descriptions persist across polls, keyed by unique_id. A rebuilt
+        description is merged into the existing object: fields outside the
+        fingerprint, such as actions, are always copied, the rest only when
+        the fingerprint changed.
+        """
         capabilities = self.api.capabilities or {}
         entity_data: list[ClashEntityData] = []
 
         if capabilities.get("traffic"):
-            entity_data.extend(self._build_traffic_entities(response.get("traffic", {})))
+            entity_data.extend(
+                self._build_traffic_entities(
+                    response.get("traffic", {}), response.get("traffic_stats")
+                )
+            )
         if capabilities.get("connections"):
             entity_data.extend(
                 self._build_connection_entities(response.get("connections", {}))
             )
+        if capabilities.get("connections") and self.connection_tracking:
+            entity_data.extend(
+                self._build_connection_delta_entities(self.connection_tracker.stats)
+            )
         if capabilities.get("memory"):
             entity_data.extend(self._build_memory_entities(response.get("memory", {})))
         if capabilities.get("proxies"):
-            entity_data.extend(self._build_proxy_entities(response.get("proxies", {})))
+            entity_data.extend(
+                self._build_proxy_entities(
+                    self.proxy_graph, self.latency_history, self._proxy_entity_cache
+                )
+            )
         if capabilities.get("configs"):
             entity_data.extend(self._build_config_entities(response.get("configs", {})))
         if capabilities.get("providers_proxies") or capabilities.get("providers_rules"):
             entity_data.extend(
                 self._build_provider_entities(
-                    response.get("providers_proxies", {}),
+                    {"providers": self.proxy_graph.provider_info()},
                     response.get("providers_rules", {}),
                     provider_healthcheck_enabled=capabilities.get(
                         "provider_healthcheck", False
@@ -195,12 +955,21 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
             )
         entity_data.extend(self._build_streaming_entities(response.get("streaming", {})))
 
+        entity_data.append(self._build_poll_interval_entity())
+
         if capabilities.get("cache_fakeip_flush"):
             entity_data.append(self._build_fakeip_button())
         if capabilities.get("cache_dns_flush"):
             entity_data.append(self._build_dns_flush_button())
 
+        registry = self._data_by_unique_id
+        reindex_names = False
+        merged: list[ClashEntityData] = []
         for item in entity_data:
+            if item.unique_id and registry.get(item.unique_id) is item:
+                # Reused unchanged by its builder.
+                merged.append(item)
+                continue
             id_source = (
                 item.unique_key
                 or item.name
@@ -212,20 +981,60 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
                 f"_{item.entity_type}"
                 f"_{id_source.lower().replace(' ', '_')}"
             )
+            # Lets entities skip state writes when nothing they show changed.
+            item.fingerprint = hash(
+                repr(tuple(getattr(item, field) for field in FINGERPRINTED_FIELDS))
+            )
+            existing = registry.get(item.unique_id)
+            if existing is None:
+                registry[item.unique_id] = item
+                reindex_names = True
+                merged.append(item)
+                continue
+            reindex_names = reindex_names or existing.name != item.name
+            fields = (
+                ClashEntityData.__slots__
+                if existing.fingerprint != item.fingerprint
+                else UNFINGERPRINTED_FIELDS
+            )
+            for field in fields:
+                setattr(existing, field, getattr(item, field))
+            cached = self._proxy_entity_cache.get(item.name or "")
+            if cached is not None and cached[4] is item:
+                cached[4] = existing
+            merged.append(existing)
 
-        self._data_by_name = {}
-        for item in entity_data:
-            if item.name and item.name not in self._data_by_name:
-                self._data_by_name[item.name] = item
-        self._data_by_unique_id = {item.unique_id: item for item in entity_data}
-        return entity_data
+        if len(registry) != len(merged):
+            self._data_by_unique_id = {item.unique_id: item for item in merged}
+            reindex_names = True
+        if reindex_names:
+            self._data_by_name = {}
+            for item in merged:
+                if item.name and item.name not in self._data_by_name:
+                    self._data_by_name[item.name] = item
+        return merged
 
     @staticmethod
-    def _build_traffic_entities(traffic: dict[str, Any]) -> list[ClashEntityData]:
-        """Create traffic related entities."""
+    def _build_traffic_entities(
+        traffic: dict[str, Any], stats: dict[str, Any] | None = None
+    ) -> list[ClashEntityData]:
+        """Create traffic related entities.
+
+        Sampled window statistics, when available, become attributes.
+        """
         if not traffic:
             return []
 
+        def _window(direction: str) -> dict[str, Any] | None:
+            if not stats:
+                return None
+            return {
+                "mean": stats.get(f"{direction}_mean"),
+                "p95": stats.get(f"{direction}_p95"),
+                "max": stats.get(f"{direction}_max"),
+                "samples": stats.get("samples"),
+            }
+
         return [
             ClashEntityData(
                 name=None,
@@ -233,6 +1042,7 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
                 entity_type="traffic_sensor",
                 icon="mdi:arrow-up",
                 translation_key="up_speed",
+                attributes=_window("up"),
                 unique_key="upload_speed",
             ),
             ClashEntityData(
@@ -241,6 +1051,7 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
                 entity_type="traffic_sensor",
                 icon="mdi:arrow-down",
                 translation_key="down_speed",
+                attributes=_window("down"),
                 unique_key="download_speed",
             ),
         ]
@@ -253,6 +1064,10 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
         if not connections:
             return []
 
+        connection_count = connections.get("connectionCount")
+        if connection_count is None:
+            connection_count = len(connections.get("connections", []) or [])
+
         return [
             ClashEntityData(
                 name=None,
@@ -272,7 +1087,7 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
             ),
             ClashEntityData(
                 name=None,
-                state=len(connections.get("connections", []) or []),
+                state=connection_count,
                 entity_type="connection_sensor",
                 icon="mdi:transit-connection",
                 translation_key="connection_number",
@@ -280,6 +1095,50 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
             ),
         ]
 
+    @staticmethod
+    def _build_connection_delta_entities(
+        stats: dict[str, Any],
+    ) -> list[ClashEntityData]:
+        """Create entities for connection churn and per-connection throughput."""
+        if not stats:
+            return []
+
+        return [
+            ClashEntityData(
+                name=None,
+                state=stats.get("opened_rate"),
+                entity_type="connection_rate_sensor",
+                icon="mdi:lan-connect",
+                translation_key="connections_opened_rate",
+                unique_key="connections_opened_rate",
+            ),
+            ClashEntityData(
+                name=None,
+                state=stats.get("closed_rate"),
+                entity_type="connection_rate_sensor",
+                icon="mdi:lan-disconnect",
+                translation_key="connections_closed_rate",
+                unique_key="connections_closed_rate",
+            ),
+            ClashEntityData(
+                name=None,
+                state=stats.get("throughput_avg"),
+                entity_type="connection_throughput_sensor",
+                icon="mdi:speedometer-medium",
+                translation_key="connection_throughput_avg",
+                unique_key="connection_throughput_avg",
+            ),
+            ClashEntityData(
+                name=None,
+                state=stats.get("throughput_max"),
+                entity_type="connection_throughput_sensor",
+                icon="mdi:speedometer",
+                translation_key="connection_throughput_max",
+                attributes={"top_connections": stats.get("top_connections", [])},
+                unique_key="connection_throughput_max",
+            ),
+        ]
+
     @staticmethod
     def _build_memory_entities(memory: dict[str, Any]) -> list[ClashEntityData]:
         """Create memory related entities."""
@@ -297,6 +1156,27 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
             )
         ]
 
+    def _build_poll_interval_entity(self) -> ClashEntityData:
+        """Create the effective poll interval diagnostic sensor."""
+        stats = self.api.load_stats
+        return ClashEntityData(
+            name=None,
+            state=self.effective_interval,
+            entity_type="poll_interval_sensor",
+            icon="mdi:timer-sync-outline",
+            translation_key="effective_poll_interval",
+            entity_category=EntityCategory.DIAGNOSTIC,
+            attributes={
+                "configured_interval": self.poll_interval,
+                "request_latency": round(stats.latency, 3),
+                "request_error_rate": round(stats.error_rate, 3),
+                "circuit_state": self.api.breaker.state,
+                **self.api.transport_stats,
+                **self.api.poll_stats,
+            },
+            unique_key="effective_poll_interval",
+        )
+
     def _build_fakeip_button(self) -> ClashEntityData:
         """Create FakeIP cache flush button entity."""
         return ClashEntityData(
@@ -330,44 +1210,90 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
         )
 
     @staticmethod
-    def _build_proxy_entities(proxies: dict[str, Any]) -> list[ClashEntityData]:
-        """Create entities for proxy groups."""
+    def _build_proxy_entities(
+        graph: ProxyGraph,
+        latency_history: LatencyHistory | None = None,
+        cache: dict[str, list[Any]] | None = None,
+    ) -> list[ClashEntityData]:
+        """Create entities for proxy groups.
+
+        Raw delay history is summarized from the latency history rather than
+        copied into attributes on every poll. With a cache, a group whose
+        graph data, outbound and latency statistics are unchanged reuses its
+        previous entity instead of building a new one.
+        """
         entity_data: list[ClashEntityData] = []
-        group_selector_items = ["tfo", "type", "udp", "xudp", "alive", "history"]
-        group_sensor_items = group_selector_items + ["all"]
-        urltest_items = group_sensor_items + ["expectedStatus", "testUrl", "lastTestTime"]
+        group_selector_items = ["tfo", "type", "udp", "xudp", "alive"]
+        urltest_items = group_selector_items + ["expectedStatus", "testUrl", "lastTestTime"]
+
+        def latency_stats(name: str) -> dict[str, Any]:
+            if latency_history is None:
+                return {}
+            return latency_history.stats(name)
+
+        for name, item in graph.groups():
+            member_rows = graph.member_rows(name)
+            outbound = graph.outbound(name)
+            stats = latency_stats(name)
+            if cache is not None:
+                hit = cache.get(name)
+                if (
+                    hit is not None
+                    and hit[0] is item
+                    and hit[1] is member_rows
+                    and hit[2] == outbound
+                    and hit[3] == stats
+                    and hit[4].fingerprint is not None
+                ):
+                    entity_data.append(hit[4])
+                    continue
 
-        for item in proxies.get("proxies", {}).values():
             if item.get("type") in ["Selector", "Fallback"]:
                 entity_data.append(
                     ClashEntityData(
-                        name=item.get("name", ""),
+                        name=item.get("name", name),
                         state=item.get("now"),
                         entity_type="proxy_group_selector",
                         icon="mdi:network-outline",
-                        options=item.get("all"),
-                        attributes={k: item[k] for k in group_selector_items if k in item},
+                        options=graph.members(name),
+                        attributes={
+                            **{k: item[k] for k in group_selector_items if k in item},
+                            "outbound": outbound,
+                            **stats,
+                        },
                     )
                 )
             elif item.get("type") == "URLTest":
                 fixed_value = item.get("fixed")
                 supports_fixed = "fixed" in item
+                members = graph.members(name)
                 attributes = {k: item[k] for k in urltest_items if k in item}
+                attributes["all"] = members
+                attributes["outbound"] = outbound
+                attributes.update(stats)
                 if supports_fixed:
                     attributes["fixed"] = bool(fixed_value)
                 entity_data.append(
                     ClashEntityData(
-                        name=item.get("name", ""),
+                        name=item.get("name", name),
                         state=item.get("now"),
                         entity_type=(
                             "proxy_group_selector" if supports_fixed else "proxy_group_sensor"
                         ),
                         icon="mdi:network-outline",
-                        options=item.get("all") if supports_fixed else None,
+                        options=members if supports_fixed else None,
                         attributes=attributes,
                     )
                 )
+            else:
+                continue
+            if cache is not None:
+                cache[name] = [item, member_rows, outbound, stats, entity_data[-1]]
 
+        if cache is not None and len(cache) > len(entity_data):
+            names = {entity.name for entity in entity_data}
+            for name in [name for name in cache if name not in names]:
+                del cache[name]
         return entity_data
 
     def _build_config_entities(self, configs: dict[str, Any]) -> list[ClashEntityData]:
@@ -482,7 +1408,11 @@ class ClashControllerCoordinator(DataUpdateCoordinator[list[ClashEntityData]]):
                 action = {
                     "method": self.api.async_request,
                     "args": ("GET", f"providers/proxies/{encoded}/healthcheck"),
-                    "kwargs": {"params": common_params, "suppress_errors": False},
+                    "kwargs": {
+                        "params": common_params,
+                        "suppress_errors": False,
+                        "track_load": False,
+                    },
                 }
                 entity_data.append(
                     ClashEntityData(
@@ -0,0 +1,293 @@
+"""Compiled connection filters for Clash Controller."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+import ipaddress
+from typing import Any
+
+FILTER_FIELDS = (
+    "host",
+    "src_hostname",
+    "des_hostname",
+    "domain",
+    "chain",
+    "rule",
+    "network",
+    "process",
+    "port",
+)
+
+# Below this many patterns plain substring checks beat walking the automaton.
+AUTOMATON_MIN_PATTERNS = 8
+
+
+def parse_keywords(value: str | None) -> tuple[str, ...]:
+    """Split a comma separated keyword string into sorted lowercase items."""
+    if not value:
+        return ()
+    return tuple(sorted({item.strip().lower() for item in value.split(",") if item.strip()}))
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton answering whether any pattern occurs in a text.
+
+    Patterns may carry a rank; first() then returns the lowest rank among the
+    patterns occurring in a text.
+    """
+
+    def __init__(self, patterns: Iterable[str], ranks: Iterable[int] | None = None) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._terminal: list[bool] = [False]
+        self._rank: list[int | None] = [None]
+        ranks = iter(ranks) if ranks is not None else None
+        for pattern in patterns:
+            self._add(pattern, next(ranks) if ranks is not None else None)
+        self._link()
+
+    def _add(self, pattern: str, rank: int | None = None) -> None:
+        state = 0
+        for char in pattern:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(False)
+                self._rank.append(None)
+            state = following
+        self._terminal[state] = True
+        if rank is not None and (self._rank[state] is None or rank < self._rank[state]):
+            self._rank[state] = rank
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[following] = target if target != following else 0
+                if self._terminal[self._fail[following]]:
+                    self._terminal[following] = True
+                inherited = self._rank[self._fail[following]]
+                if inherited is not None and (
+                    self._rank[following] is None or inherited < self._rank[following]
+                ):
+                    self._rank[following] = inherited
+
+    def search(self, text: str) -> bool:
+        """Return whether any pattern is a substring of text."""
+        goto, fail, terminal = self._goto, self._fail, self._terminal
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
+    def first(self, text: str) -> int | None:
+        """Return the lowest rank of the patterns occurring in text."""
+        goto, fail, rank = self._goto, self._fail, self._rank
+        state = 0
+        best = None
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = rank[state]
+            if found is not None and (best is None or found < best):
+                best = found
+        return best
+
+
+def _substring_matcher(patterns: tuple[str, ...]) -> Callable[[str], bool]:
+    if len(patterns) < AUTOMATON_MIN_PATTERNS:
+        return lambda text: any(pattern in text for pattern in patterns)
+    return AhoCorasick(patterns).search
+
+
+class CidrMatcher:
+    """Match addresses against many networks, grouped by prefix length."""
+
+    def __init__(self, networks: Iterable[ipaddress.IPv4Network | ipaddress.IPv6Network]) -> None:
+        self._buckets: dict[tuple[int, int], set[int]] = {}
+        for network in networks:
+            key = (network.version, network.prefixlen)
+            self._buckets.setdefault(key, set()).add(int(network.network_address))
+
+    def __bool__(self) -> bool:
+        return bool(self._buckets)
+
+    def match(self, value: str) -> bool:
+        """Return whether an address string falls in any network."""
+        try:
+            address = ipaddress.ip_address(value)
+        except ValueError:
+            return False
+        bits = 32 if address.version == 4 else 128
+        number = int(address)
+        for (version, prefixlen), prefixes in self._buckets.items():
+            if version == address.version and (
+                number >> (bits - prefixlen) << (bits - prefixlen)
+            ) in prefixes:
+                return True
+        return False
+
+
+def _address_matcher(keywords: tuple[str, ...]) -> Callable[[str], bool]:
+    """Match CIDR keywords by network and every other keyword as a substring."""
+    networks = []
+    substrings = []
+    for keyword in keywords:
+        if "/" in keyword:
+            try:
+                networks.append(ipaddress.ip_network(keyword, strict=False))
+                continue
+            except ValueError:
+                pass
+        substrings.append(keyword)
+    cidr = CidrMatcher(networks)
+    substring = _substring_matcher(tuple(substrings)) if substrings else None
+    if not cidr:
+        return substring
+    if substring is None:
+        return cidr.match
+    return lambda value: cidr.match(value) or substring(value)
+
+
+def _domain_matcher(domains: tuple[str, ...]) -> Callable[[str], bool]:
+    """Match a host equal to, or a subdomain of, any domain."""
+    suffixes = frozenset(domain.lstrip(".") for domain in domains)
+
+    def match(host: str) -> bool:
+        while host:
+            if host in suffixes:
+                return True
+            _, _, host = host.partition(".")
+        return False
+
+    return match
+
+
+def _port_matcher(keywords: tuple[str, ...]) -> Callable[[str], bool]:
+    """Match destination ports against single ports and inclusive ranges."""
+    ports: set[int] = set()
+    ranges: list[tuple[int, int]] = []
+    for keyword in keywords:
+        low, sep, high = keyword.partition("-")
+        try:
+            if sep:
+                ranges.append((int(low), int(high)))
+            else:
+                ports.add(int(low))
+        except ValueError:
+            continue
+
+    def match(value: str) -> bool:
+        try:
+            port = int(value)
+        except (TypeError, ValueError):
+            return False
+        return port in ports or any(low <= port <= high for low, high in ranges)
+
+    return match
+
+
+def _metadata(field: str) -> Callable[[dict[str, Any]], str]:
+    return lambda conn: str((conn.get("metadata") or {}).get(field) or "").lower()
+
+
+class ConnectionFilter:
+    """Matcher compiled from one set of filter keywords.
+
+    Each criterion is a field extractor and a predicate. Results are memoized
+    per distinct field value during a filter run, since many connections
+    share hosts, addresses and chains.
+    """
+
+    def __init__(self, criteria: tuple[tuple[str, tuple[str, ...]], ...]) -> None:
+        self.criteria = dict(criteria)
+        self._checks: list[tuple[Callable[[dict[str, Any]], Any], Callable[[Any], bool]]] = []
+        for field, keywords in criteria:
+            if keywords:
+                self._checks.append(self._compile(field, keywords))
+
+    @staticmethod
+    def _compile(
+        field: str, keywords: tuple[str, ...]
+    ) -> tuple[Callable[[dict[str, Any]], Any], Callable[[Any], bool]]:
+        wanted = frozenset(keywords)
+        if field == "host":
+            return _metadata("host"), _substring_matcher(keywords)
+        if field == "src_hostname":
+            return _metadata("sourceIP"), _address_matcher(keywords)
+        if field == "des_hostname":
+            return _metadata("destinationIP"), _address_matcher(keywords)
+        if field == "domain":
+            return _metadata("host"), _domain_matcher(keywords)
+        if field == "chain":
+            return (
+                lambda conn: tuple(str(chain).lower() for chain in conn.get("chains") or ()),
+                lambda chains: not wanted.isdisjoint(chains),
+            )
+        if field == "rule":
+            return (
+                lambda conn: (
+                    str(conn.get("rule") or "").lower(),
+                    str(conn.get("rulePayload") or "").lower(),
+                ),
+                lambda rule: not wanted.isdisjoint(rule),
+            )
+        if field == "network":
+            return _metadata("network"), wanted.__contains__
+        if field == "process":
+            return _metadata("process"), wanted.__contains__
+        if field == "port":
+            return _metadata("destinationPort"), _port_matcher(keywords)
+        raise ValueError(f"Unknown connection filter field: {field}")
+
+    def __bool__(self) -> bool:
+        return bool(self._checks)
+
+    def filter(self, connections: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Return the connections matching every criterion."""
+        if not self._checks:
+            return list(connections)
+        checks = [(extract, test, {}) for extract, test in self._checks]
+        matched = []
+        for conn in connections:
+            for extract, test, memo in checks:
+                value = extract(conn)
+                result = memo.get(value)
+                if result is None:
+                    result = memo[value] = test(value)
+                if not result:
+                    break
+            else:
+                matched.append(conn)
+        return matched
+
+
+@lru_cache(maxsize=32)
+def _compile_filter(criteria: tuple[tuple[str, tuple[str, ...]], ...]) -> ConnectionFilter:
+    return ConnectionFilter(criteria)
+
+
+def get_connection_filter(values: dict[str, str | None]) -> ConnectionFilter:
+    """Return the cached compiled filter for comma separated keyword values."""
+    criteria = tuple(
+        (field, keywords)
+        for field in FILTER_FIELDS
+        if (keywords := parse_keywords(values.get(field)))
+    )
+    return _compile_filter(criteria)
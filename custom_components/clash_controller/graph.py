@@ -0,0 +1,246 @@
+"""Normalized proxy graph for Clash Controller."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Iterator
+import sys
+from typing import Any
+
+# Bulky or structural keys kept out of the stored proxy objects: members are
+# held as index arrays, delay history lives in the latency history.
+_DROPPED_KEYS = frozenset({"all", "history", "extra"})
+
+
+class ProxyGraph:
+    """Proxies from /proxies, /group and /providers/proxies, each stored once.
+
+    Every proxy name is interned and mapped to a row. Groups keep their
+    members and providers their nodes as arrays of rows, so a node listed by
+    a provider, by /proxies and by several groups costs one object. Updates
+    are incremental: rows whose data did not change keep their object.
+
+    The final outbound of every group, found by following "now" through
+    nested groups, is memoized. A changed selection only invalidates the
+    groups that route through it, found via a reverse index of "now".
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty graph."""
+        self._index: dict[str, int] = {}
+        self._names: list[str] = []
+        self._items: list[dict[str, Any] | None] = []
+        self._members: dict[int, array] = {}
+        self._providers: dict[str, tuple[dict[str, Any], array]] = {}
+        self._now: dict[int, int] = {}
+        self._selected_by: dict[int, set[int]] = {}
+        self._outbound: dict[int, int | None] = {}
+
+    def __contains__(self, name: str) -> bool:
+        row = self._index.get(name)
+        return row is not None and self._items[row] is not None
+
+    def _row(self, name: str) -> int:
+        row = self._index.get(name)
+        if row is None:
+            row = self._index[sys.intern(name)] = len(self._names)
+            self._names.append(sys.intern(name))
+            self._items.append(None)
+        return row
+
+    def _store(self, name: str, item: dict[str, Any]) -> int:
+        """Store a proxy's data, keeping the old object when nothing changed."""
+        row = self._row(name)
+        slim = {key: value for key, value in item.items() if key not in _DROPPED_KEYS}
+        if self._items[row] != slim:
+            self._items[row] = slim
+        members = item.get("all")
+        if isinstance(members, list):
+            rows = array("i", (self._row(str(member)) for member in members))
+            if self._members.get(row) != rows:
+                self._members[row] = rows
+            selected = item.get("now")
+            self._set_now(row, self._row(str(selected)) if selected else None)
+        return row
+
+    def _forget(self, rows: Iterable[int]) -> None:
+        for row in list(rows):
+            self._items[row] = None
+            self._members.pop(row, None)
+            self._set_now(row, None)
+            self._invalidate(row)
+
+    def _set_now(self, row: int, selected: int | None) -> None:
+        previous = self._now.get(row)
+        if previous == selected:
+            return
+        if previous is not None:
+            self._selected_by[previous].discard(row)
+        if selected is None:
+            self._now.pop(row, None)
+        else:
+            self._now[row] = selected
+            self._selected_by.setdefault(selected, set()).add(row)
+        self._invalidate(row)
+
+    def _invalidate(self, row: int) -> None:
+        """Drop the memoized outbound of a group and of every group routed through it."""
+        stack = [row]
+        while stack:
+            current = stack.pop()
+            self._outbound.pop(current, None)
+            stack.extend(
+                dependent
+                for dependent in self._selected_by.get(current, ())
+                if dependent in self._outbound
+            )
+
+    def outbound(self, name: str) -> str | None:
+        """Return the node a group finally routes through, or None if unresolved.
+
+        Selections that loop back to a group already on the path resolve to
+        None.
+        """
+        row = self._index.get(name)
+        if row is None:
+            return None
+        path: list[int] = []
+        on_path: set[int] = set()
+        current: int | None = row
+        while (
+            current is not None
+            and current in self._members
+            and current not in self._outbound
+        ):
+            if current in on_path:
+                current = None
+                break
+            path.append(current)
+            on_path.add(current)
+            current = self._now.get(current)
+        if current is None:
+            result = None
+        elif current in self._outbound:
+            result = self._outbound[current]
+        else:
+            result = current
+        for group in path:
+            self._outbound[group] = result
+        if row not in self._members:
+            return self._names[row]
+        return None if result is None else self._names[result]
+
+    def update_proxies(self, proxies: dict[str, Any], groups_only: bool = False) -> None:
+        """Apply a name-keyed /proxies (or reshaped /group) map.
+
+        Proxies missing from the map are dropped; with groups_only only
+        groups are, since the map never lists plain nodes.
+        """
+        seen = {
+            self._store(str(name), item)
+            for name, item in proxies.items()
+            if isinstance(item, dict)
+        }
+        provided = {row for _, rows in self._providers.values() for row in rows}
+        self._forget(
+            row
+            for row, item in enumerate(self._items)
+            if item is not None
+            and row not in seen
+            and row not in provided
+            and (not groups_only or row in self._members)
+        )
+
+    def update_providers(self, providers: dict[str, Any]) -> dict[str, dict[str, Any]]:
+        """Apply a /providers/proxies map and return provider info without nodes."""
+        updated: dict[str, tuple[dict[str, Any], array]] = {}
+        for name, info in providers.items():
+            if not isinstance(info, dict):
+                continue
+            meta = {key: value for key, value in info.items() if key != "proxies"}
+            rows = array(
+                "i",
+                (
+                    self._store(str(node["name"]), node)
+                    for node in info.get("proxies") or ()
+                    if isinstance(node, dict) and node.get("name")
+                ),
+            )
+            updated[sys.intern(str(name))] = (meta, rows)
+        provided = {row for _, rows in updated.values() for row in rows}
+        self._forget(
+            row
+            for _, rows in self._providers.values()
+            for row in rows
+            if row not in provided and row not in self._members
+        )
+        self._providers = updated
+        return self.provider_info()
+
+    def set_selected(self, group: str, node: str) -> None:
+        """Record a new selection made through the API."""
+        row = self._index.get(group)
+        if row is not None and self._items[row] is not None:
+            self._items[row] = {**self._items[row], "now": node}
+            self._set_now(row, self._row(node))
+
+    def get(self, name: str) -> dict[str, Any] | None:
+        """Return the stored data of a proxy."""
+        row = self._index.get(name)
+        return None if row is None else self._items[row]
+
+    def members(self, name: str) -> list[str]:
+        """Return the member names of a group, in order."""
+        row = self._index.get(name)
+        rows = self._members.get(row) if row is not None else None
+        return [self._names[member] for member in rows] if rows is not None else []
+
+    def member_rows(self, name: str) -> array | None:
+        """Return a group's member rows; the object only changes with the members."""
+        row = self._index.get(name)
+        return self._members.get(row) if row is not None else None
+
+    def is_group(self, name: str) -> bool:
+        row = self._index.get(name)
+        return row is not None and row in self._members and self._items[row] is not None
+
+    def groups(self) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Yield every group name with its data."""
+        for row in self._members:
+            item = self._items[row]
+            if item is not None:
+                yield self._names[row], item
+
+    def nodes(self) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Yield every proxy that is not a group."""
+        for row, item in enumerate(self._items):
+            if item is not None and row not in self._members:
+                yield self._names[row], item
+
+    def known_names(self) -> set[str]:
+        """Return the names of stored proxies and of every group member.
+
+        Group-only updates never list plain nodes, but their groups do.
+        """
+        rows = {row for row, item in enumerate(self._items) if item is not None}
+        for members in self._members.values():
+            rows.update(members)
+        return {self._names[row] for row in rows}
+
+    def provider_info(self) -> dict[str, dict[str, Any]]:
+        """Return provider data without their node lists."""
+        return {name: meta for name, (meta, _) in self._providers.items()}
+
+    def provider_nodes(self, name: str) -> list[str]:
+        """Return the node names of a provider."""
+        entry = self._providers.get(name)
+        return [self._names[row] for row in entry[1]] if entry else []
+
+    def summary(self) -> dict[str, int]:
+        """Return group, node and provider counts."""
+        groups = sum(1 for _ in self.groups())
+        return {
+            "groups": groups,
+            "nodes": sum(1 for item in self._items if item is not None) - groups,
+            "providers": len(self._providers),
+        }
@@ -0,0 +1,295 @@
+"""Indexed rule table for Clash Controller."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections.abc import Iterable
+import hashlib
+import ipaddress
+import re
+from typing import Any
+
+from .filters import AhoCorasick
+
+
+class RuleTable:
+    """Indexed view of the /rules list.
+
+    Types and target proxies are indexed by their distinct lowercase values,
+    which are few. Payloads are kept as one newline separated blob, so
+    keyword substring search runs as C-level str.find over all payloads at
+    once.
+    """
+
+    def __init__(
+        self,
+        rules: list[dict[str, Any]],
+        signature: Any = None,
+        digest: str | None = None,
+    ) -> None:
+        self.rules = rules
+        self.signature = signature
+        self.digest = digest or self.content_digest(rules)
+        self._by_type: dict[str, list[int]] = {}
+        self._by_proxy: dict[str, list[int]] = {}
+        payloads: list[str] = []
+        for row, rule in enumerate(rules):
+            self._by_type.setdefault(str(rule.get("type", "")).lower(), []).append(row)
+            self._by_proxy.setdefault(str(rule.get("proxy", "")).lower(), []).append(row)
+            payloads.append(str(rule.get("payload", "")).lower().replace("\n", " "))
+
+        self._payload_blob = "\n".join(payloads)
+        self._payload_starts: list[int] = []
+        offset = 0
+        for payload in payloads:
+            self._payload_starts.append(offset)
+            offset += len(payload) + 1
+        self._matcher: RuleMatcher | None = None
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @staticmethod
+    def content_digest(rules: list[dict[str, Any]]) -> str:
+        """Return a short hash of the type, payload and proxy of every rule."""
+        blob = "\n".join(
+            f"{rule.get('type', '')}\t{rule.get('payload', '')}\t{rule.get('proxy', '')}"
+            for rule in rules
+        )
+        return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+    @property
+    def matcher(self) -> RuleMatcher:
+        """Return the first-match evaluator, built on first use."""
+        if self._matcher is None:
+            self._matcher = RuleMatcher(self.rules)
+        return self._matcher
+
+    @staticmethod
+    def _keyed_rows(index: dict[str, list[int]], keywords: Iterable[str]) -> set[int]:
+        rows: set[int] = set()
+        for value, value_rows in index.items():
+            if any(keyword in value for keyword in keywords):
+                rows.update(value_rows)
+        return rows
+
+    def payload_rows(self, keyword: str) -> set[int]:
+        """Return rows whose payload contains keyword."""
+        blob, starts = self._payload_blob, self._payload_starts
+        rows: set[int] = set()
+        position = blob.find(keyword)
+        while position != -1:
+            row = bisect_right(starts, position) - 1
+            rows.add(row)
+            # Continue after the end of this payload; one hit per row is enough.
+            next_start = starts[row + 1] if row + 1 < len(starts) else len(blob)
+            position = blob.find(keyword, next_start)
+        return rows
+
+    def query(
+        self,
+        types: Iterable[str] | None = None,
+        payloads: Iterable[str] | None = None,
+        proxies: Iterable[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return rules matching every given keyword set, in rule order.
+
+        Keywords are lowercase and match as substrings, like the service
+        filters have always done.
+        """
+        candidates: set[int] | None = None
+        criteria = (
+            (types, lambda words: self._keyed_rows(self._by_type, words)),
+            (proxies, lambda words: self._keyed_rows(self._by_proxy, words)),
+            (
+                payloads,
+                lambda words: set().union(*(self.payload_rows(word) for word in words)),
+            ),
+        )
+        for keywords, lookup in criteria:
+            if not keywords:
+                continue
+            rows = lookup(keywords)
+            candidates = rows if candidates is None else candidates & rows
+            if not candidates:
+                return []
+        if candidates is None:
+            return list(self.rules)
+        return [self.rules[row] for row in sorted(candidates)]
+
+
+def _rule_kind(rule_type: str) -> str:
+    return rule_type.lower().replace("-", "").replace("_", "")
+
+
+class DomainSuffixTrie:
+    """Trie over reversed domain labels, keeping the earliest rule per node."""
+
+    def __init__(self) -> None:
+        self._root: dict[str, Any] = {}
+
+    def add(self, suffix: str, row: int) -> None:
+        node = self._root
+        for label in reversed(suffix.strip(".").split(".")):
+            node = node.setdefault(label, {})
+        if node.get("") is None or row < node[""]:
+            node[""] = row
+
+    def first(self, host: str) -> int | None:
+        """Return the earliest row whose suffix equals or is a parent of host."""
+        best = None
+        node = self._root
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            row = node.get("")
+            if row is not None and (best is None or row < best):
+                best = row
+        return best
+
+
+class CidrTable:
+    """Networks bucketed by prefix length, keeping the earliest rule per network."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[tuple[int, int], dict[int, int]] = {}
+
+    def add(self, network: ipaddress.IPv4Network | ipaddress.IPv6Network, row: int) -> None:
+        bucket = self._buckets.setdefault((network.version, network.prefixlen), {})
+        number = int(network.network_address)
+        if row < bucket.get(number, row + 1):
+            bucket[number] = row
+
+    def first(self, address: ipaddress.IPv4Address | ipaddress.IPv6Address) -> int | None:
+        """Return the earliest row whose network contains address."""
+        bits = 32 if address.version == 4 else 128
+        number = int(address)
+        best = None
+        for (version, prefixlen), bucket in self._buckets.items():
+            if version != address.version:
+                continue
+            row = bucket.get(number >> (bits - prefixlen) << (bits - prefixlen))
+            if row is not None and (best is None or row < best):
+                best = row
+        return best
+
+
+class RuleMatcher:
+    """First-match evaluation of hosts and addresses against a rule list.
+
+    Domain, domain suffix, keyword, regex, IP-CIDR and MATCH rules are
+    evaluated locally. Any other rule (rule sets, GeoIP, process, port...)
+    cannot be decided here, so a result also names the first such rule that
+    precedes the local match, since the core may stop there instead.
+    """
+
+    def __init__(self, rules: list[dict[str, Any]]) -> None:
+        self.rules = rules
+        self._domains: dict[str, int] = {}
+        self._suffixes = DomainSuffixTrie()
+        self._keywords: list[tuple[int, str]] = []
+        self._regexes: list[tuple[int, re.Pattern[str]]] = []
+        self._cidrs = CidrTable()
+        self._ip_rows: list[int] = []
+        self._undecided: list[int] = []
+        self._final: int | None = None
+        for row, rule in enumerate(rules):
+            kind = _rule_kind(str(rule.get("type", "")))
+            payload = str(rule.get("payload", "")).strip().lower()
+            if kind == "domain":
+                self._domains.setdefault(payload, row)
+            elif kind == "domainsuffix":
+                self._suffixes.add(payload, row)
+            elif kind == "domainkeyword":
+                self._keywords.append((row, payload))
+            elif kind == "domainregex":
+                try:
+                    self._regexes.append((row, re.compile(payload)))
+                except re.error:
+                    self._undecided.append(row)
+            elif kind in ("ipcidr", "ipcidr6"):
+                try:
+                    self._cidrs.add(ipaddress.ip_network(payload, strict=False), row)
+                    self._ip_rows.append(row)
+                except ValueError:
+                    self._undecided.append(row)
+            elif kind in ("match", "final"):
+                if self._final is None:
+                    self._final = row
+            else:
+                self._undecided.append(row)
+        self._keyword_automaton = AhoCorasick(
+            (keyword for _, keyword in self._keywords),
+            (row for row, _ in self._keywords),
+        )
+        # Hosts reach IP-CIDR rules only after the core resolves them.
+        self._undecided_for_hosts = sorted(self._undecided + self._ip_rows)
+
+    @staticmethod
+    def _earlier(best: int | None, rows: list[tuple[int, Any]], test) -> int | None:
+        for row, item in rows:
+            if best is not None and row >= best:
+                break
+            if test(item):
+                return row
+        return best
+
+    def _match_row(self, host: str) -> tuple[int | None, list[int]]:
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            address = None
+
+        if address is not None:
+            best = self._cidrs.first(address)
+            # IP-CIDR rules are decided for literal addresses; nothing else is.
+            unknown = self._undecided
+        else:
+            best = self._domains.get(host)
+            suffix = self._suffixes.first(host)
+            if suffix is not None and (best is None or suffix < best):
+                best = suffix
+            keyword = self._keyword_automaton.first(host) if self._keywords else None
+            if keyword is not None and (best is None or keyword < best):
+                best = keyword
+            best = self._earlier(
+                best, self._regexes, lambda pattern: pattern.search(host) is not None
+            )
+            unknown = self._undecided_for_hosts
+        if self._final is not None and (best is None or self._final < best):
+            best = self._final
+        return best, unknown
+
+    def _describe(self, row: int) -> dict[str, Any]:
+        rule = self.rules[row]
+        return {
+            "index": row,
+            "type": rule.get("type"),
+            "payload": rule.get("payload"),
+            "proxy": rule.get("proxy"),
+        }
+
+    def match(self, host: str) -> dict[str, Any]:
+        """Return the first rule that would route a host or IP address."""
+        host = host.strip().strip(".").lower()
+        row, unknown = self._match_row(host)
+        limit = len(self.rules) if row is None else row
+        preceding = unknown[0] if unknown and unknown[0] < limit else None
+        return {
+            "host": host,
+            "rule": None if row is None else self._describe(row),
+            "proxy": None if row is None else self.rules[row].get("proxy"),
+            "undecided_rule": None if preceding is None else self._describe(preceding),
+        }
+
+    def match_many(self, hosts: Iterable[str]) -> list[dict[str, Any]]:
+        """Match a batch of hosts, evaluating each distinct host once."""
+        memo: dict[str, dict[str, Any]] = {}
+        results = []
+        for host in hosts:
+            result = memo.get(host)
+            if result is None:
+                result = memo[host] = self.match(host)
+            results.append(result)
+        return results
@@ -73,8 +73,9 @@ class GroupSelect(SelectEntityBase):
             )
         except Exception as err:
             raise HomeAssistantError(f"Failed to set proxy group {group} to {node}.") from err
+        self.coordinator.proxy_graph.set_selected(group, node)
         self.entity_data.state = option
-        self.async_write_ha_state()
+        self.async_write_local_state()
 
 class CoreModeSelect(SelectEntityBase):
     """Implementation of core mode select."""
@@ -107,4 +108,4 @@ class CoreModeSelect(SelectEntityBase):
             except Exception as err:
                 raise HomeAssistantError(f"Failed to set mode to {mode}.") from err
         self.entity_data.state = mode
-        self.async_write_ha_state()
+        self.async_write_local_state()
@@ -8,7 +8,7 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfDataRate, UnitOfInformation
+from homeassistant.const import UnitOfDataRate, UnitOfInformation, UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -31,9 +31,12 @@ async def async_setup_entry(
         "memory_sensor": MemorySensor,
         "total_traffic_sensor": TotalTrafficSensor,
         "connection_sensor": ConnectionSensor,
+        "connection_rate_sensor": ConnectionRateSensor,
+        "connection_throughput_sensor": TrafficSensor,
         "provider_count_sensor": ProviderCountSensor,
         "proxy_group_sensor": GroupSensor,
         "streaming_detection": StreamingSensor,
+        "poll_interval_sensor": PollIntervalSensor,
     }
 
     sensors = [
@@ -93,6 +96,39 @@ class ConnectionSensor(SensorEntityBase):
         super().__init__(coordinator, entity_data)
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
+class ConnectionRateSensor(SensorEntityBase):
+    """Implementation of a connection open/close rate sensor."""
+
+    def __init__(
+        self, coordinator: ClashControllerCoordinator, entity_data: ClashEntityData
+    ) -> None:
+        super().__init__(coordinator, entity_data)
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = "connections/s"
+        self._attr_suggested_display_precision = 2
+
+    @property
+    def native_value(self) -> float | None:
+        value = self.entity_data.state
+        return float(value) if value is not None else None
+
+class PollIntervalSensor(SensorEntityBase):
+    """Implementation of the effective poll interval sensor."""
+
+    def __init__(
+        self, coordinator: ClashControllerCoordinator, entity_data: ClashEntityData
+    ) -> None:
+        super().__init__(coordinator, entity_data)
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.SECONDS
+        self._attr_suggested_display_precision = 0
+
+    @property
+    def native_value(self) -> float | None:
+        value = self.entity_data.state
+        return float(value) if value is not None else None
+
 class ProviderCountSensor(SensorEntityBase):
     """Implementation of provider count sensor."""
 
@@ -1,6 +1,5 @@
 """Services for the Clash Controller."""
 
-import asyncio
 import json
 from urllib.parse import quote
 import voluptuous as vol
@@ -16,15 +15,26 @@ from .const import (
     REBOOT_CORE_SERVICE_NAME,
     FILTER_CONNECTION_SERVICE_NAME,
     GET_LATENCY_SERVICE_NAME,
+    BATCH_LATENCY_SERVICE_NAME,
+    DEFAULT_LATENCY_CONCURRENCY,
+    MAX_LATENCY_CONCURRENCY,
     DNS_QUERY_SERVICE_NAME,
     GET_RULE_SERVICE_NAME,
+    MATCH_RULE_SERVICE_NAME,
     API_CALL_SERVICE_NAME,
 )
 from .coordinator import ClashControllerCoordinator
+from .filters import FILTER_FIELDS, get_connection_filter, parse_keywords
 
 HOST_KEYWORD = "host"
 SRC_HOSTNAME_KEYWORD = "src_hostname"
 DES_HOSTNAME_KEYWORD = "des_hostname"
+DOMAIN_KEYWORD = "domain"
+CHAIN_KEYWORD = "chain"
+RULE_KEYWORD = "rule"
+NETWORK_KEYWORD = "network"
+PROCESS_KEYWORD = "process"
+PORT_KEYWORD = "port"
 CLOSE_CONNECTION = "close_connection"
 
 GROUP_NAME = "group"
@@ -32,6 +42,13 @@ NODE_NAME = "node"
 TEST_URL = "url"
 TEST_TIMEOUT = "timeout"
 
+GROUP_NAMES = "groups"
+NODE_NAMES = "nodes"
+GROUP_PATTERN = "group_pattern"
+NODE_PATTERN = "node_pattern"
+TEST_CONCURRENCY = "concurrency"
+USE_CACHE = "use_cache"
+
 DOMAIN_NAME = "domain_name"
 RECORD_TYPE = "record_type"
 
@@ -39,6 +56,8 @@ RULE_TYPE = "rule_type"
 RULE_PAYLOAD = "rule_payload"
 RULE_PROXY = "rule_proxy"
 
+MATCH_HOSTS = "hosts"
+
 API_ENDPOINT = "api_endpoint"
 API_METHOD = "api_method"
 API_PARAMS = "api_params"
@@ -58,6 +77,12 @@ FILTER_CONNECTION_SCHEMA = vol.Schema(
         vol.Optional(HOST_KEYWORD): cv.string,
         vol.Optional(SRC_HOSTNAME_KEYWORD): cv.string,
         vol.Optional(DES_HOSTNAME_KEYWORD): cv.string,
+        vol.Optional(DOMAIN_KEYWORD): cv.string,
+        vol.Optional(CHAIN_KEYWORD): cv.string,
+        vol.Optional(RULE_KEYWORD): cv.string,
+        vol.Optional(NETWORK_KEYWORD): cv.string,
+        vol.Optional(PROCESS_KEYWORD): cv.string,
+        vol.Optional(PORT_KEYWORD): cv.string,
     }
 )
 
@@ -71,6 +96,22 @@ GET_LATENCY_SCHEMA = vol.Schema(
     }
 )
 
+BATCH_LATENCY_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_DEVICE_ID): cv.string,
+        vol.Optional(GROUP_NAMES): vol.Any(cv.string, [cv.string]),
+        vol.Optional(NODE_NAMES): vol.Any(cv.string, [cv.string]),
+        vol.Optional(GROUP_PATTERN): cv.is_regex,
+        vol.Optional(NODE_PATTERN): cv.is_regex,
+        vol.Optional(TEST_URL): cv.string,
+        vol.Optional(TEST_TIMEOUT): cv.positive_int,
+        vol.Optional(TEST_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_LATENCY_CONCURRENCY)
+        ),
+        vol.Optional(USE_CACHE): cv.boolean,
+    }
+)
+
 DNS_QUERY_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_DEVICE_ID): cv.string,
@@ -88,6 +129,13 @@ GET_RULE_SCHEMA = vol.Schema(
     }
 )
 
+MATCH_RULE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_DEVICE_ID): cv.string,
+        vol.Required(MATCH_HOSTS): vol.Any(cv.string, [cv.string]),
+    }
+)
+
 API_CALL_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_DEVICE_ID): cv.string,
@@ -144,6 +192,12 @@ class ClashServicesSetup:
             GET_LATENCY_SCHEMA,
             supports_response=SupportsResponse.ONLY,
         )
+        _register(
+            BATCH_LATENCY_SERVICE_NAME,
+            self.async_batch_latency_service,
+            BATCH_LATENCY_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
         _register(
             DNS_QUERY_SERVICE_NAME,
             self.async_dns_query_service,
@@ -156,6 +210,12 @@ class ClashServicesSetup:
             GET_RULE_SCHEMA,
             supports_response=SupportsResponse.ONLY,
         )
+        _register(
+            MATCH_RULE_SERVICE_NAME,
+            self.async_match_rule_service,
+            MATCH_RULE_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
         _register(
             API_CALL_SERVICE_NAME,
             self.async_api_call_service,
@@ -193,38 +253,9 @@ class ClashServicesSetup:
 
         coordinator = self._get_coordinator(service_call.data[CONF_DEVICE_ID])
 
-        def parse_filter(key):
-            value_str = service_call.data.get(key)
-            return (
-                {item.strip().lower() for item in value_str.split(",") if item.strip()}
-                if value_str
-                else None
-            )
-
-        def filter_connection(conn):
-            meta = conn.get("metadata", {})
-            host = meta.get("host", "").lower()
-            src_ip = meta.get("sourceIP", "").lower()
-            des_ip = meta.get("destinationIP", "").lower()
-            if hosts and not any(h in host for h in hosts):
-                return False
-            if src_hosts and not any(h in src_ip for h in src_hosts):
-                return False
-            if des_hosts and not any(h in des_ip for h in des_hosts):
-                return False
-            return True
-
-        async def delete_connection(conn_id):
-            async with semaphore:
-                await coordinator.api.async_request(
-                    "DELETE",
-                    f"connections/{conn_id}",
-                    suppress_errors=False,
-                )
-
-        hosts = parse_filter(HOST_KEYWORD)
-        src_hosts = parse_filter(SRC_HOSTNAME_KEYWORD)
-        des_hosts = parse_filter(DES_HOSTNAME_KEYWORD)
+        connection_filter = get_connection_filter(
+            {field: service_call.data.get(field) for field in FILTER_FIELDS}
+        )
         close_connection = service_call.data.get(CLOSE_CONNECTION, False)
 
         try:
@@ -233,7 +264,7 @@ class ClashServicesSetup:
             raise HomeAssistantError(f"Error getting connections: {err}") from err
 
         connections = response.get("connections", []) or []
-        filtered_connections = [conn for conn in connections if filter_connection(conn)]
+        filtered_connections = connection_filter.filter(connections)
 
         service_response = {
             "connection_number": len(filtered_connections),
@@ -244,18 +275,19 @@ class ClashServicesSetup:
         if not close_connection:
             return service_response
 
+        if connection_filter:
+            service_response["close_report"] = await coordinator.api.async_close_connections(
+                [conn["id"] for conn in filtered_connections if conn.get("id")],
+                initial_concurrency=coordinator.concurrent_connections,
+            )
+            return service_response
+
         try:
-            if hosts or src_hosts or des_hosts:
-                semaphore = asyncio.Semaphore(coordinator.concurrent_connections)
-                await asyncio.gather(*[
-                    delete_connection(conn["id"]) for conn in filtered_connections
-                ])
-            else:
-                await coordinator.api.async_request(
-                    "DELETE",
-                    "connections",
-                    suppress_errors=False,
-                )
+            await coordinator.api.async_request(
+                "DELETE",
+                "connections",
+                suppress_errors=False,
+            )
         except Exception as err:
             raise HomeAssistantError(f"Error closing connection: {err}") from err
 
@@ -292,15 +324,60 @@ class ClashServicesSetup:
                     else f"proxies/{quote(node, safe='')}/delay"
                 ),
                 params={"url": url,"timeout": timeout},
-                suppress_errors=False
+                suppress_errors=False,
+                track_load=False,
             )
         except Exception as err:
             raise HomeAssistantError(f"Error getting latency: {err}") from err
         
+        history = coordinator.latency_history
         if group:
-            return sort_group(response)
+            for name, delay in response.items():
+                history.record(name, delay)
+            return {
+                **sort_group(response),
+                "stats": {name: history.stats(name) for name in response},
+            }
         else:
-            return {"latency": {node: response.get("delay", [])}}
+            history.record(node, response.get("delay"))
+            return {
+                "latency": {node: response.get("delay", [])},
+                "stats": {node: history.stats(node)},
+            }
+
+    async def async_batch_latency_service(self, service_call: ServiceCall) -> dict:
+        """Execute service call for testing the latency of many groups and nodes."""
+
+        coordinator = self._get_coordinator(service_call.data[CONF_DEVICE_ID])
+
+        def parse_names(key):
+            value = service_call.data.get(key)
+            if isinstance(value, str):
+                value = value.split(",")
+            return [item.strip() for item in value or [] if item.strip()]
+
+        groups = parse_names(GROUP_NAMES)
+        nodes = parse_names(NODE_NAMES)
+        group_pattern = service_call.data.get(GROUP_PATTERN)
+        node_pattern = service_call.data.get(NODE_PATTERN)
+        if not (groups or nodes or group_pattern or node_pattern):
+            raise HomeAssistantError("At least one group or node selection should be provided.")
+
+        try:
+            return await coordinator.async_batch_latency(
+                groups=groups,
+                nodes=nodes,
+                group_pattern=group_pattern,
+                node_pattern=node_pattern,
+                url=service_call.data.get(TEST_URL, "http://www.gstatic.com/generate_204"),
+                timeout=service_call.data.get(TEST_TIMEOUT, 5000),
+                max_concurrency=service_call.data.get(
+                    TEST_CONCURRENCY, DEFAULT_LATENCY_CONCURRENCY
+                ),
+                use_cache=service_call.data.get(USE_CACHE, True),
+            )
+        except Exception as err:
+            raise HomeAssistantError(f"Error getting latency: {err}") from err
 
     async def async_dns_query_service(self, service_call: ServiceCall) -> dict:
         """Execute service call for performing a DNS query."""
@@ -325,41 +402,38 @@ class ClashServicesSetup:
 
         coordinator = self._get_coordinator(service_call.data[CONF_DEVICE_ID])
 
-        def parse_filter(key):
-            value_str = service_call.data.get(key)
-            return (
-                {item.strip().lower() for item in value_str.split(",") if item.strip()}
-                if value_str
-                else None
-            )
-
-        def filter_rule(rule):
-            rule_type = rule.get("type", "").lower()
-            rule_payload = rule.get("payload", "").lower()
-            rule_proxy = rule.get("proxy", "").lower()
-            if rule_types and not any(h in rule_type for h in rule_types):
-                return False
-            if rule_payloads and not any(h in rule_payload for h in rule_payloads):
-                return False
-            if rule_proxys and not any(h in rule_proxy for h in rule_proxys):
-                return False
-            return True
-
-        rule_types = parse_filter(RULE_TYPE)
-        rule_payloads = parse_filter(RULE_PAYLOAD)
-        rule_proxys = parse_filter(RULE_PROXY)
-
         try:
-            response = await coordinator.api.async_request(method="GET",endpoint="rules",suppress_errors=False)
+            rule_table = await coordinator.async_get_rule_table()
         except Exception as err:
             raise HomeAssistantError(f"Error getting rules: {err}") from err
 
-        rules = response.get("rules", [])
-        filtered_rules = [rule for rule in rules if filter_rule(rule)]
+        filtered_rules = rule_table.query(
+            types=parse_keywords(service_call.data.get(RULE_TYPE)),
+            payloads=parse_keywords(service_call.data.get(RULE_PAYLOAD)),
+            proxies=parse_keywords(service_call.data.get(RULE_PROXY)),
+        )
         service_response = {"rules": filtered_rules}
 
         return service_response
 
+    async def async_match_rule_service(self, service_call: ServiceCall) -> dict:
+        """Execute service call for finding the rules that would route hosts."""
+
+        coordinator = self._get_coordinator(service_call.data[CONF_DEVICE_ID])
+        hosts = service_call.data[MATCH_HOSTS]
+        if isinstance(hosts, str):
+            hosts = hosts.replace(",", " ").split()
+        hosts = [host for host in (item.strip() for item in hosts) if host]
+        if not hosts:
+            raise HomeAssistantError("At least one host or IP address is required.")
+
+        try:
+            matcher = await coordinator.async_get_rule_matcher()
+        except Exception as err:
+            raise HomeAssistantError(f"Error getting rules: {err}") from err
+
+        return {"results": matcher.match_many(hosts)}
+
     async def async_api_call_service(self, service_call: ServiceCall) -> None:
         """Execute service call for calling API."""
 
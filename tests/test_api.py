@@ -2,9 +2,31 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+from types import SimpleNamespace
+
+import aiohttp
 import pytest
 
-from custom_components.clash_controller.api import ClashAPI
+from custom_components.clash_controller.api import (
+    DEFAULT_POOL_LIMIT_PER_HOST,
+    POOL_SHARED,
+    SERVICE_TABLE,
+    APICircuitOpenError,
+    APIClientError,
+    APITimeoutError,
+    CircuitBreaker,
+    ClashAPI,
+    ClashStreamSubscription,
+    ConnectionsSummaryParser,
+    TrafficSampler,
+    summarize_connections,
+)
+from custom_components.clash_controller.const import (
+    DEFAULT_MEDIUM_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+)
 
 
 def test_infer_core_model_prefers_reported_name() -> None:
@@ -39,8 +61,12 @@ async def test_detect_capabilities_probes_when_cached_capabilities_empty(monkeyp
         ws_calls += 1
         return False
 
+    async def fake_fingerprint():  # noqa: ANN202
+        return "fp"
+
     monkeypatch.setattr(api, "_probe_http_endpoint", fake_probe_http)
     monkeypatch.setattr(api, "_probe_ws_endpoint", fake_probe_ws)
+    monkeypatch.setattr(api, "async_fingerprint", fake_fingerprint)
 
     capabilities = await api.async_detect_capabilities()
 
@@ -64,10 +90,14 @@ async def test_detect_capabilities_accepts_ws_only_stream_endpoints(monkeypatch)
         return endpoint in {"proxies", "configs"}
 
     async def fake_probe_ws(endpoint, timeout=1.5):  # noqa: ANN001
-        return endpoint in {"traffic", "memory", "connections?interval=1"}
+        return endpoint in {"traffic", "memory", "connections?interval=1000"}
+
+    async def fake_fingerprint():  # noqa: ANN202
+        return "fp"
 
     monkeypatch.setattr(api, "_probe_http_endpoint", fake_probe_http)
     monkeypatch.setattr(api, "_probe_ws_endpoint", fake_probe_ws)
+    monkeypatch.setattr(api, "async_fingerprint", fake_fingerprint)
 
     capabilities = await api.async_detect_capabilities(force=True)
 
@@ -78,3 +108,838 @@ async def test_detect_capabilities_accepts_ws_only_stream_endpoints(monkeypatch)
     assert capabilities["ws_memory"] is True
     assert capabilities["ws_connections"] is True
     assert api.available_endpoints == [("proxies", {})]
+
+
+@pytest.mark.asyncio
+async def test_stream_subscription_serves_cached_frames(monkeypatch) -> None:
+    """Websocket streams should be opened once and read from the latest frame."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        capabilities={"traffic": True, "ws_traffic": True},
+    )
+    connects = 0
+
+    async def fake_consume(self):  # noqa: ANN001
+        nonlocal connects
+        connects += 1
+        self._connection_frames = 0
+        self._store('{"up": 10, "down": 20}')
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(ClashStreamSubscription, "_consume", fake_consume)
+
+    for _ in range(3):
+        result = await api._fetch_endpoint_with_fallback(
+            key="traffic",
+            endpoint="traffic",
+            params=None,
+            read_line=1,
+            ws_endpoint="traffic",
+            suppress_errors=True,
+        )
+        assert result == {"up": 10, "down": 20}
+
+    assert connects == 1
+    assert api.streams["traffic"].running
+
+    await api.close_session()
+    assert not api.streams
+
+
+@pytest.mark.asyncio
+async def test_http_failures_leave_streams_connected() -> None:
+    """Request errors should only reset the request session, not the streams."""
+    api = ClashAPI("http://127.0.0.1:9090/", "token", stream_interval=2.5)
+    assert api.connections_ws_endpoint == "connections?interval=2500"
+
+    class Session:
+        closed = False
+
+        def request(self, *args, **kwargs):  # noqa: ANN002, ANN003
+            raise aiohttp.ClientConnectionError("refused")
+
+        def ws_connect(self, url, **kwargs):  # noqa: ANN001, ANN003
+            session = self
+
+            class Websocket:
+                async def __aenter__(self):
+                    return self
+
+                async def __aexit__(self, *args):  # noqa: ANN002
+                    return None
+
+                async def __aiter__(self):
+                    session.ws_url = url
+                    yield SimpleNamespace(type=aiohttp.WSMsgType.TEXT, data='{"n": 1}')
+                    await asyncio.Event().wait()
+
+            return Websocket()
+
+        async def close(self) -> None:
+            self.closed = True
+
+    request_session, stream_session = Session(), Session()
+    api._session = request_session
+    api._stream_session = stream_session
+    stream = api._get_stream("connections", api.connections_ws_endpoint)
+    assert await stream.async_wait_frame(timeout=1) == {"n": 1}
+
+    await api.async_request("GET", "version")
+
+    assert request_session.closed and api._session is None
+    assert api._stream_session is stream_session and not stream_session.closed
+    assert stream.running and stream.connect_count == 1
+    assert stream_session.ws_url.endswith("connections?interval=2500")
+
+    await api.close_session()
+    assert stream_session.closed and not stream.running
+
+
+@pytest.mark.asyncio
+async def test_full_connection_payloads_are_not_retained(monkeypatch) -> None:
+    """Compacting a payload drops its cached reads; plain stream frames keep only raw data."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        available_endpoints=[],
+        capabilities={"connections": True},
+    )
+    api._fingerprint_checked = True
+    full = {"connections": [{"id": "a"}], "uploadTotal": 1, "downloadTotal": 2}
+
+    async def fake_send(method, endpoint, params, json_data, read_line, summarize, track_load):  # noqa: ANN001
+        return full
+
+    monkeypatch.setattr(api, "_send_request", fake_send)
+    data = await api.fetch_data(summarize_connections=False)
+    assert data["connections"] is full
+    assert any(key[0] == "connections" for key in api._read_cache)
+
+    summary = {"uploadTotal": 1, "downloadTotal": 2, "connectionCount": 1}
+    api.compact_payload("connections", summary)
+    assert api._payload_cache["connections"][1] is summary
+    assert not any(key[0] == "connections" for key in api._read_cache)
+
+    stream = ClashStreamSubscription(api, "connections", "connections")
+    stream._store(json.dumps(full))
+    assert stream.frame == full
+    assert stream._frame is None
+    summarized = ClashStreamSubscription(
+        api, "connections", "connections", decoder=summarize_connections
+    )
+    summarized._store(json.dumps(full))
+    assert summarized.frame is summarized.frame
+    assert stream.frame_id < summarized.frame_id
+
+
+def test_connections_summary_parser_counts_across_chunks() -> None:
+    """Summary parsing should match a full decode regardless of chunk boundaries."""
+    payload = {
+        "downloadTotal": 2048,
+        "connections": [
+            {
+                "id": f"conn-{index}",
+                "metadata": {"host": 'odd "{[host]}" \\ name', "sourceIP": "10.0.0.2"},
+                "chains": ["[HK] Node", "Proxy"],
+                "upload": index,
+            }
+            for index in range(25)
+        ],
+        "uploadTotal": 1024,
+    }
+    raw = json.dumps(payload).encode("utf-8")
+
+    for chunk_size in (1, 7, 64, len(raw)):
+        parser = ConnectionsSummaryParser()
+        for start in range(0, len(raw), chunk_size):
+            parser.feed(raw[start : start + chunk_size])
+        assert parser.result() == {
+            "uploadTotal": 1024,
+            "downloadTotal": 2048,
+            "connectionCount": 25,
+        }
+
+    assert summarize_connections(
+        '{"downloadTotal":0,"uploadTotal":0,"connections":null}'
+    ) == {"uploadTotal": 0, "downloadTotal": 0, "connectionCount": 0}
+
+
+@pytest.mark.asyncio
+async def test_fetch_data_reuses_payloads_until_tier_due(monkeypatch) -> None:
+    """Slow-tier endpoints should be reused between ticks until a write invalidates them."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        available_endpoints=[],
+        capabilities={"traffic": True, "proxies": True, "configs": True},
+    )
+    requested: list[str] = []
+
+    async def fake_fetch(key, endpoint, **kwargs):  # noqa: ANN001
+        requested.append(key)
+        return {"key": key, "tick": len(requested)}
+
+    monkeypatch.setattr(api, "_fetch_endpoint_with_fallback", fake_fetch)
+    tiers = {
+        "fast": 0,
+        "medium": DEFAULT_MEDIUM_SCAN_INTERVAL,
+        "slow": DEFAULT_SLOW_SCAN_INTERVAL,
+    }
+
+    first = await api.fetch_data(tier_intervals=tiers)
+    second = await api.fetch_data(tier_intervals=tiers)
+
+    # The medium tier defaults to every scan; only the slow tier is reused.
+    assert requested == ["traffic", "proxies", "configs", "traffic", "proxies"]
+    assert second["configs"] == first["configs"]
+    assert api.last_fetched == {"traffic", "proxies"}
+
+    api._invalidate_for_request("PATCH", "configs")
+    await api.fetch_data(tier_intervals=tiers)
+    assert requested[-3:] == ["traffic", "proxies", "configs"]
+    assert api.rules_generation == 1
+
+    api._invalidate_for_request("GET", "configs")
+    api._invalidate_for_request("PUT", "proxies/HK")
+    await api.fetch_data(tier_intervals=tiers)
+    assert requested[-1] == "proxies"
+    assert api.rules_generation == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_pool_is_reference_counted_per_host() -> None:
+    """Instances pointing at the same host should share one pool until the last one closes."""
+    first = ClashAPI("http://127.0.0.1:9090/", "a", pool_mode=POOL_SHARED)
+    second = ClashAPI("http://127.0.0.1:9090/", "b", pool_mode=POOL_SHARED)
+    other = ClashAPI("http://10.0.0.1:9090/", "c", pool_mode=POOL_SHARED)
+    for api in (first, second, other):
+        await api._establish_session()
+
+    assert first._session is second._session
+    assert other._session is not first._session
+    assert first._session.connector.limit_per_host == DEFAULT_POOL_LIMIT_PER_HOST
+
+    shared = first._session
+    await first.close_session()
+    assert not shared.closed
+    await second.close_session()
+    assert shared.closed
+    await other.close_session()
+
+
+@pytest.mark.asyncio
+async def test_external_session_is_never_closed() -> None:
+    """A Home Assistant managed session should be reused and left open on close."""
+    session = aiohttp.ClientSession()
+    api = ClashAPI("http://127.0.0.1:9090/", "token", session=session)
+
+    await api._establish_session()
+    assert api._session is session
+    await api.close_session()
+    assert not session.closed
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_and_probes_once(monkeypatch) -> None:
+    """An open circuit should reject requests without I/O and let one probe through."""
+    api = ClashAPI("http://127.0.0.1:9090/", "token")
+    api.BACKOFF_BASE = 0
+    attempts = 0
+
+    class DeadSession:
+        closed = False
+
+        def request(self, *args, **kwargs):  # noqa: ANN002, ANN003
+            nonlocal attempts
+            attempts += 1
+            raise aiohttp.ClientConnectionError("refused")
+
+        async def close(self) -> None:
+            return None
+
+    async def fake_establish():
+        api._session = DeadSession()
+
+    monkeypatch.setattr(api, "_establish_session", fake_establish)
+
+    for _ in range(3):
+        await api.async_retryable_request("GET", "version")
+    assert api.breaker.state == CircuitBreaker.OPEN
+    tripped_at = attempts
+
+    with pytest.raises(APICircuitOpenError):
+        await api.async_retryable_request("GET", "version", suppress_errors=False)
+    assert attempts == tripped_at
+
+    api.breaker._opened_at -= CircuitBreaker.RESET_TIMEOUT
+    assert api.breaker.allow()
+    assert api.breaker.state == CircuitBreaker.HALF_OPEN
+    assert not api.breaker.allow()
+    api.breaker.record_success()
+    assert api.breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_identical_gets_share_one_request(monkeypatch) -> None:
+    """Concurrent identical GETs should be coalesced while writes are not."""
+    api = ClashAPI("http://127.0.0.1:9090/", "token")
+    sent: list[tuple[str, str]] = []
+    release = asyncio.Event()
+
+    async def fake_send(method, endpoint, params, json_data, read_line, summarize, track_load):  # noqa: ANN001
+        sent.append((method, endpoint))
+        await release.wait()
+        return {"endpoint": endpoint}
+
+    monkeypatch.setattr(api, "_send_request", fake_send)
+
+    calls = [
+        asyncio.create_task(api.async_request("GET", "connections")),
+        asyncio.create_task(api.async_request("GET", "connections")),
+        asyncio.create_task(api.async_request("GET", "proxies")),
+        asyncio.create_task(api.async_request("PUT", "proxies/GLOBAL", json_data={"name": "a"})),
+    ]
+    await asyncio.sleep(0)
+    calls[0].cancel()
+    release.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    assert sent.count(("GET", "connections")) == 1
+    assert sent.count(("GET", "proxies")) == 1
+    assert results[1] == {"endpoint": "connections"}
+    assert not api._inflight
+
+
+@pytest.mark.asyncio
+async def test_read_cache_serves_repeat_reads_until_a_write(monkeypatch) -> None:
+    """Repeated reads should hit the cache and writes should drop affected entries."""
+    api = ClashAPI("http://127.0.0.1:9090/", "token")
+    sent: list[tuple[str, str]] = []
+
+    async def fake_send(method, endpoint, params, json_data, read_line, summarize, track_load):  # noqa: ANN001
+        sent.append((method, endpoint))
+        api._invalidate_for_request(method, endpoint)
+        return {"endpoint": endpoint, "count": len(sent)}
+
+    monkeypatch.setattr(api, "_send_request", fake_send)
+
+    first_rules = await api.async_request("GET", "rules")
+    await api.async_request("GET", "proxies")
+    assert await api.async_request("GET", "rules") == first_rules
+    await api.async_request("GET", "proxies")
+    assert sent == [("GET", "rules"), ("GET", "proxies")]
+
+    await api.async_request("PUT", "proxies/GLOBAL", json_data={"name": "a"})
+    await api.async_request("GET", "proxies")
+    assert await api.async_request("GET", "rules") == first_rules
+    assert sent[-1] == ("GET", "proxies")
+
+    await api.async_request("PATCH", "configs", json_data={"mode": "rule"})
+    assert await api.async_request("GET", "rules") != first_rules
+
+    key = next(iter(api._read_cache))
+    api._read_cache[key] = (api._read_cache[key][0] - 60, api._read_cache[key][1])
+    sent.clear()
+    await api.async_request("GET", key[0])
+    assert sent == [("GET", key[0])]
+
+
+@pytest.mark.asyncio
+async def test_capability_cache_reprobes_only_when_fingerprint_changes(monkeypatch) -> None:
+    """Cached capabilities should cost one /version check and re-probe in the background on upgrade."""
+    cached = {"proxies": True}
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        capabilities=cached,
+        capabilities_fingerprint="old",
+    )
+    probes = 0
+    version = {"version": "v1.18.0", "meta": True}
+
+    async def fake_request(method, endpoint, **kwargs):  # noqa: ANN001
+        assert endpoint == "version"
+        return version
+
+    async def fake_probe(fingerprint=None):  # noqa: ANN001
+        nonlocal probes
+        probes += 1
+        api._capabilities = {"proxies": True, "group": True}
+        api._fingerprint = fingerprint
+        return api._capabilities
+
+    monkeypatch.setattr(api, "async_request", fake_request)
+    monkeypatch.setattr(api, "_async_probe_capabilities", fake_probe)
+
+    assert await api.async_detect_capabilities() == cached
+    assert api._reprobe_task is not None
+    await api._reprobe_task
+    assert probes == 1
+    assert api.capabilities == {"proxies": True, "group": True}
+    fingerprint = api.capabilities_fingerprint
+    assert fingerprint not in {None, "old"}
+
+    fresh = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        capabilities=api.capabilities,
+        capabilities_fingerprint=fingerprint,
+    )
+    monkeypatch.setattr(fresh, "async_request", fake_request)
+    monkeypatch.setattr(fresh, "_async_probe_capabilities", fake_probe)
+    await fresh.async_detect_capabilities()
+    assert fresh._reprobe_task is None
+    assert probes == 1
+
+
+@pytest.mark.asyncio
+async def test_capability_fingerprint_is_checked_again_after_failed_version(monkeypatch) -> None:
+    """A /version failure at startup should not skip the upgrade check for good."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        capabilities={"proxies": True},
+        capabilities_fingerprint="old",
+    )
+    responses = [{}, {"version": "v1.19.0", "meta": True}]
+    probes = 0
+
+    async def fake_request(method, endpoint, **kwargs):  # noqa: ANN001
+        assert endpoint == "version"
+        return responses.pop(0)
+
+    async def fake_probe(fingerprint=None):  # noqa: ANN001
+        nonlocal probes
+        probes += 1
+        api._fingerprint = fingerprint
+        return api._capabilities
+
+    monkeypatch.setattr(api, "async_request", fake_request)
+    monkeypatch.setattr(api, "_async_probe_capabilities", fake_probe)
+
+    await api.async_detect_capabilities()
+    assert api._reprobe_task is None
+
+    await api.async_detect_capabilities()
+    assert api._reprobe_task is not None
+    await api._reprobe_task
+    assert probes == 1
+    assert api.capabilities_fingerprint not in {None, "old"}
+
+    await api.async_detect_capabilities()
+    assert not responses
+    assert probes == 1
+
+
+@pytest.mark.asyncio
+async def test_websocket_transport_is_repromoted_after_backoff(monkeypatch) -> None:
+    """A failed websocket read should fall back to HTTP and be retried after a backoff."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        capabilities={"traffic": True, "ws_traffic": True},
+    )
+    api.STREAM_WAIT_TIMEOUT = 0.01
+    frames_available = False
+
+    async def fake_consume(self):  # noqa: ANN001
+        if frames_available:
+            self._connection_frames = 0
+            self._store('{"up": 1, "down": 2}')
+        await asyncio.Event().wait()
+
+    async def fake_http(*args, **kwargs):  # noqa: ANN002, ANN003
+        return {"up": 0, "down": 0}
+
+    monkeypatch.setattr(ClashStreamSubscription, "_consume", fake_consume)
+    monkeypatch.setattr(api, "async_retryable_request", fake_http)
+
+    async def fetch():
+        return await api._fetch_endpoint_with_fallback(
+            key="traffic",
+            endpoint="traffic",
+            params=None,
+            read_line=1,
+            ws_endpoint="traffic",
+            suppress_errors=True,
+        )
+
+    assert await fetch() == {"up": 0, "down": 0}
+    assert api.capabilities["ws_traffic"] is True
+    assert api.transport_stats == {
+        "ws_demotions": 1,
+        "ws_promotions": 0,
+        "ws_demoted": ["traffic"],
+    }
+
+    assert await fetch() == {"up": 0, "down": 0}
+    assert "traffic" not in api.streams
+
+    frames_available = True
+    api._ws_demoted["traffic"] = (0.0, 1)
+    assert await fetch() == {"up": 1, "down": 2}
+    assert api.transport_stats == {
+        "ws_demotions": 1,
+        "ws_promotions": 1,
+        "ws_demoted": [],
+    }
+    await api.close_session()
+
+
+@pytest.mark.asyncio
+async def test_fetch_data_deadline_serves_stale_payloads(monkeypatch) -> None:
+    """Endpoints missing the cycle deadline should reuse their last payload and land later."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        available_endpoints=[],
+        capabilities={"traffic": True, "providers_proxies": True},
+    )
+    hang = asyncio.Event()
+    requested: list[str] = []
+
+    async def fake_fetch(key, endpoint, **kwargs):  # noqa: ANN001
+        requested.append(key)
+        if key == "providers_proxies" and len(requested) > 2:
+            await hang.wait()
+        return {"key": key, "tick": len(requested)}
+
+    monkeypatch.setattr(api, "_fetch_endpoint_with_fallback", fake_fetch)
+
+    first = await api.fetch_data(deadline=0.05)
+    assert api.poll_stats["stale_endpoints"] == []
+
+    second = await api.fetch_data(deadline=0.05)
+    assert second["providers_proxies"] == first["providers_proxies"]
+    assert second["traffic"] != first["traffic"]
+    assert api.poll_stats == {
+        "stale_endpoints": ["providers_proxies"],
+        "stale_total": 1,
+        "late_total": 0,
+    }
+
+    await api.fetch_data(deadline=0.05)
+    assert requested.count("providers_proxies") == 2
+
+    hang.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert api.poll_stats["late_total"] == 1
+    assert api._payload_cache["providers_proxies"][1]["tick"] == len(requested)
+    latest = await api.fetch_data(deadline=0.05)
+    assert api.poll_stats["stale_endpoints"] == []
+    assert latest["providers_proxies"]["tick"] == len(requested)
+
+
+@pytest.mark.asyncio
+async def test_fetch_data_deadline_bounds_fingerprint_and_streaming(monkeypatch) -> None:
+    """A slow fingerprint check or streaming detection should not outlast the deadline."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        available_endpoints=[],
+        capabilities={"traffic": True},
+    )
+    fingerprint_release = asyncio.Event()
+    detection_release = asyncio.Event()
+    checks: list[int] = []
+    detections: list[int] = []
+
+    async def fake_fingerprint():  # noqa: ANN202
+        checks.append(1)
+        if len(checks) == 1:
+            await fingerprint_release.wait()
+        return None
+
+    async def fake_fetch(key, endpoint, **kwargs):  # noqa: ANN001
+        return {"key": key}
+
+    async def fake_status(url):  # noqa: ANN001
+        detections.append(1)
+        if len(detections) > len(SERVICE_TABLE):
+            await detection_release.wait()
+        return {"status": "ok"}
+
+    monkeypatch.setattr(api, "async_fingerprint", fake_fingerprint)
+    monkeypatch.setattr(api, "_fetch_endpoint_with_fallback", fake_fetch)
+    monkeypatch.setattr(api, "get_url_status", fake_status)
+
+    await asyncio.wait_for(api.fetch_data(streaming_detection=True, deadline=0.05), 1)
+    assert "capabilities" in api._late_fetches
+    await asyncio.wait_for(api.fetch_data(streaming_detection=True, deadline=0.05), 1)
+    assert checks == [1]
+
+    fingerprint_release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert "capabilities" not in api._late_fetches
+
+    fresh = await asyncio.wait_for(
+        api.fetch_data(streaming_detection=True, deadline=0.05), 1
+    )
+    assert set(fresh["streaming"]) == set(SERVICE_TABLE)
+
+    stale = await asyncio.wait_for(
+        api.fetch_data(streaming_detection=True, deadline=0.05), 1
+    )
+    assert stale["streaming"] == fresh["streaming"]
+    assert api.poll_stats["stale_endpoints"] == ["streaming"]
+
+    detection_release.set()
+    await asyncio.sleep(0.01)
+    assert api._late_fetches == {}
+    assert "streaming" in api._payload_cache
+    await api.close_session()
+
+
+def test_traffic_sampler_window_statistics_wrap_around() -> None:
+    """Window statistics should cover samples since the last read, bounded by capacity."""
+    sampler = TrafficSampler(capacity=8)
+    for value in range(1, 6):
+        sampler.add(value * 10, value)
+
+    assert sampler.window() == {
+        "samples": 5,
+        "up_mean": 30.0,
+        "up_p95": 50,
+        "up_max": 50,
+        "down_mean": 3.0,
+        "down_p95": 5,
+        "down_max": 5,
+    }
+    assert sampler.window() == {}
+
+    for value in range(100, 120):
+        sampler.add(value, 0)
+    window = sampler.window()
+    assert window["samples"] == 8
+    assert window["up_max"] == 119
+    assert window["up_mean"] == 115.5
+    assert window["up_p95"] == 119
+
+
+@pytest.mark.asyncio
+async def test_fetch_data_publishes_sampled_traffic(monkeypatch) -> None:
+    """Traffic sampling should serve the latest streamed sample and its window stats."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        available_endpoints=[],
+        capabilities={"traffic": True, "ws_traffic": False},
+    )
+
+    async def fake_consume(self):  # noqa: ANN001
+        assert self.transport == "http"
+        for up in (100, 300, 200):
+            self._store(json.dumps({"up": up, "down": up // 10}).encode())
+        await asyncio.Event().wait()
+
+    async def unexpected_fetch(*args, **kwargs):  # noqa: ANN002, ANN003
+        raise AssertionError("traffic should come from the sampler")
+
+    monkeypatch.setattr(ClashStreamSubscription, "_consume", fake_consume)
+    monkeypatch.setattr(api, "_fetch_endpoint_with_fallback", unexpected_fetch)
+
+    api._ensure_traffic_sampling(api.capabilities)
+    await asyncio.sleep(0)
+    data = await api.fetch_data(traffic_sampling=True)
+
+    assert data["traffic"] == {"up": 200, "down": 20}
+    assert data["traffic_stats"]["samples"] == 3
+    assert data["traffic_stats"]["up_max"] == 300
+    assert data["traffic_stats"]["up_mean"] == 200.0
+    await api.close_session()
+
+
+@pytest.mark.asyncio
+async def test_traffic_sampler_stream_is_registered_and_stopped_on_close(monkeypatch) -> None:
+    """A replaced sampler stream is stopped before close returns; its successor is pushed."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        available_endpoints=[],
+        capabilities={"traffic": True, "ws_traffic": True},
+    )
+
+    async def fake_consume(self):  # noqa: ANN001
+        if self.transport == "http":
+            self._store(b'{"up": 1, "down": 2}')
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(ClashStreamSubscription, "_consume", fake_consume)
+
+    api._ensure_traffic_sampling(api.capabilities)
+    silent = api.streams["traffic"]
+    assert silent is api._sampler_stream and silent.transport == "ws"
+
+    api._sampler_started -= ClashAPI.STREAM_MAX_AGE + 1
+    api._ensure_traffic_sampling(api.capabilities)
+    replacement = api.streams["traffic"]
+    assert replacement.transport == "http"
+    assert len(api._stopping_streams) == 1
+
+    pushed: list[str] = []
+    replacement.add_listener(pushed.append)
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert pushed == ["traffic"]
+
+    await api.close_session()
+    assert not silent.running and not replacement.running
+    assert not api._stopping_streams
+
+
+@pytest.mark.asyncio
+async def test_traffic_sampler_retries_websocket_after_backoff(monkeypatch) -> None:
+    """A sampler demoted to HTTP should return to the websocket once the core recovers."""
+    api = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        available_endpoints=[],
+        capabilities={"traffic": True, "ws_traffic": True},
+    )
+    recovered = False
+
+    async def fake_consume(self):  # noqa: ANN001
+        if self.transport == "http" or recovered:
+            self._store(b'{"up": 1, "down": 2}')
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(ClashStreamSubscription, "_consume", fake_consume)
+
+    api._ensure_traffic_sampling(api.capabilities)
+    api._sampler_started -= ClashAPI.STREAM_MAX_AGE + 1
+    api._ensure_traffic_sampling(api.capabilities)
+    fallback = api._sampler_stream
+    assert fallback.transport == "http"
+    assert api.transport_stats["ws_demoted"] == ["traffic"]
+
+    api._ensure_traffic_sampling(api.capabilities)
+    assert api._sampler_stream is fallback
+
+    recovered = True
+    api._ws_demoted["traffic"] = (0.0, 1)
+    api._ensure_traffic_sampling(api.capabilities)
+    retried = api._sampler_stream
+    assert retried.transport == "ws" and api.streams["traffic"] is retried
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert not fallback.running
+
+    api._ensure_traffic_sampling(api.capabilities)
+    assert api.transport_stats == {
+        "ws_demotions": 1,
+        "ws_promotions": 1,
+        "ws_demoted": [],
+    }
+    await api.close_session()
+
+@pytest.mark.asyncio
+async def test_bulk_close_adapts_concurrency_and_reports_each_id(monkeypatch) -> None:
+    """Bulk closes should grow concurrency, retry transient errors and report every id."""
+    api = ClashAPI("http://127.0.0.1:9090/", "token")
+    in_flight = 0
+    peak = 0
+    flaky = {"conn-3": 1}
+
+    async def fake_request(method, endpoint, **kwargs):  # noqa: ANN001
+        nonlocal in_flight, peak
+        conn_id = endpoint.rsplit("/", 1)[-1]
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            if flaky.get(conn_id):
+                flaky[conn_id] -= 1
+                raise APITimeoutError("slow core")
+            if conn_id == "conn-7":
+                raise APIClientError("bad id")
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(api, "_request", fake_request)
+
+    ids = [f"conn-{index}" for index in range(200)]
+    report = await api.async_close_connections(ids, initial_concurrency=2)
+
+    assert report["requested"] == 200
+    assert report["closed"] == 199
+    assert report["failed"] == 1
+    assert report["retried"] == 1
+    assert report["results"]["conn-3"] == "closed"
+    assert report["results"]["conn-7"] == "bad id"
+    assert report["peak_concurrency"] > 2
+    assert peak <= ClashAPI.BULK_CLOSE_MAX_CONCURRENCY
+
+
+@pytest.mark.asyncio
+async def test_delay_tests_are_bounded_deduplicated_and_deadlined(monkeypatch) -> None:
+    """Each proxy should be tested once, within the concurrency bound and its deadline."""
+    api = ClashAPI("http://127.0.0.1:9090/", "token")
+    api.DELAY_TEST_SLACK = 0
+    in_flight = 0
+    peak = 0
+    calls = []
+
+    async def fake_request(method, endpoint, **kwargs):  # noqa: ANN001
+        nonlocal in_flight, peak
+        name = endpoint.split("/")[1]
+        calls.append(name)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(1 if name == "slow" else 0.001)
+            if name == "down":
+                raise APIClientError("timeout")
+            return {"delay": len(calls)}
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(api, "_request", fake_request)
+
+    names = [f"node-{index}" for index in range(12)] + ["node-1", "slow", "down"]
+    results = await api.async_test_delays(names, "http://test", 50, max_concurrency=3)
+
+    assert sorted(calls) == sorted(dict.fromkeys(names))
+    assert peak <= 3
+    assert results["slow"] == {"delay": None, "error": "deadline exceeded"}
+    assert results["down"] == {"delay": None, "error": "timeout"}
+    assert all(results[f"node-{index}"]["delay"] for index in range(12))
+
+
+@pytest.mark.asyncio
+async def test_fetch_data_prefers_group_endpoint_for_proxies(monkeypatch) -> None:
+    """With /group available, only groups are fetched and keyed like /proxies."""
+    requested: list[str] = []
+
+    async def fake_fetch(key, endpoint, **kwargs):  # noqa: ANN001
+        requested.append(endpoint)
+        if endpoint == "group":
+            return {"proxies": [{"name": "Auto", "type": "URLTest", "all": ["a"]}]}
+        return {"proxies": {"Auto": {"name": "Auto"}, "a": {"name": "a"}}}
+
+    slim = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        available_endpoints=[],
+        capabilities={"proxies": True, "group_detail": True},
+    )
+    monkeypatch.setattr(slim, "_fetch_endpoint_with_fallback", fake_fetch)
+    data = await slim.fetch_data()
+    assert requested == ["group"]
+    assert data["proxies"] == {
+        "proxies": {"Auto": {"name": "Auto", "type": "URLTest", "all": ["a"]}}
+    }
+
+    full = ClashAPI(
+        "http://127.0.0.1:9090/",
+        "token",
+        available_endpoints=[],
+        capabilities={"proxies": True, "group_detail": False},
+    )
+    monkeypatch.setattr(full, "_fetch_endpoint_with_fallback", fake_fetch)
+    data = await full.fetch_data()
+    assert requested == ["group", "proxies"]
+    assert set(data["proxies"]["proxies"]) == {"Auto", "a"}
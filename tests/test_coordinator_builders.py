@@ -2,14 +2,34 @@
 
 from __future__ import annotations
 
+import asyncio
+import tracemalloc
 from types import SimpleNamespace
 from unittest.mock import AsyncMock
 
+import aiohttp
 import pytest
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.update_coordinator import UpdateFailed
 
-from custom_components.clash_controller.coordinator import ClashControllerCoordinator
+from custom_components.clash_controller.api import (
+    CircuitBreaker,
+    ClashAPI,
+    RequestLoadStats,
+)
+from custom_components.clash_controller.base import BaseEntity
+from custom_components.clash_controller.coordinator import (
+    ClashControllerCoordinator,
+    ConnectionDeltaTracker,
+    LatencyHistory,
+)
+from custom_components.clash_controller.graph import ProxyGraph
+
+
+def _graph(proxies: dict) -> ProxyGraph:
+    graph = ProxyGraph()
+    graph.update_proxies(proxies["proxies"])
+    return graph
 
 
 def test_build_proxy_entities_urltest_with_fixed_is_selector() -> None:
@@ -27,7 +47,7 @@ def test_build_proxy_entities_urltest_with_fixed_is_selector() -> None:
         }
     }
 
-    entities = ClashControllerCoordinator._build_proxy_entities(proxies)
+    entities = ClashControllerCoordinator._build_proxy_entities(_graph(proxies))
 
     assert len(entities) == 1
     entity = entities[0]
@@ -49,7 +69,7 @@ def test_build_proxy_entities_urltest_without_fixed_is_sensor() -> None:
         }
     }
 
-    entities = ClashControllerCoordinator._build_proxy_entities(proxies)
+    entities = ClashControllerCoordinator._build_proxy_entities(_graph(proxies))
 
     assert len(entities) == 1
     entity = entities[0]
@@ -104,6 +124,7 @@ def test_build_provider_entities_with_healthcheck() -> None:
     assert custom_button.translation_placeholders == {"provider_name": "HK Group"}
     assert custom_button.enabled_default is False
     assert custom_button.action["args"][1] == "providers/proxies/HK%20Group/healthcheck"
+    assert custom_button.action["kwargs"]["track_load"] is False
     assert custom_button.action["kwargs"]["params"]["timeout"] == 3000
 
 
@@ -139,9 +160,723 @@ async def test_async_update_data_fails_when_core_returns_no_data() -> None:
             "providers_proxies": True,
             "provider_healthcheck": False,
         },
+        load_stats=RequestLoadStats(),
     )
     coordinator.device = object()
     coordinator.streaming_detection = False
+    coordinator.traffic_sampling = False
+    coordinator.connection_tracking = False
+    coordinator.tier_intervals = {"fast": 0, "medium": 60, "slow": 300}
+    coordinator.poll_deadline = 10
+    coordinator.poll_interval = 60
+    coordinator.effective_interval = 60.0
 
     with pytest.raises(UpdateFailed, match="No data returned from Clash core."):
         await ClashControllerCoordinator._async_update_data(coordinator)
+    assert coordinator.effective_interval == 120
+
+
+@pytest.mark.asyncio
+async def test_push_updates_coalesce_stream_frames() -> None:
+    """A burst of streamed frames should publish once per push window."""
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator.hass = SimpleNamespace(loop=asyncio.get_running_loop())
+    coordinator.api = SimpleNamespace(
+        streams={"traffic": SimpleNamespace(frame={"up": 5, "down": 6}, frame_id=1)},
+        capabilities={"traffic": True},
+        device_id="dev",
+        load_stats=RequestLoadStats(),
+        breaker=CircuitBreaker(),
+        transport_stats={},
+        poll_stats={},
+    )
+    coordinator.streaming_detection = False
+    coordinator.poll_interval = 60
+    coordinator.effective_interval = 60.0
+    coordinator.push_interval = 0.05
+    coordinator.last_update_success = True
+    coordinator._last_response = {"traffic": {"up": 1, "down": 1}}
+    coordinator._push_pending = set()
+    coordinator._push_timer = None
+    coordinator._data_by_unique_id = {}
+    coordinator._proxy_entity_cache = {}
+
+    published = []
+    coordinator.async_update_listeners = lambda: published.append(coordinator.data)
+
+    for _ in range(5):
+        coordinator._async_handle_stream_frame("traffic")
+    await asyncio.sleep(0.1)
+
+    assert len(published) == 1
+    states = {item.unique_key: item.state for item in published[0]}
+    assert states == {
+        "upload_speed": 5,
+        "download_speed": 6,
+        "effective_poll_interval": 60.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_streamed_connections_frame_is_tracked_once(monkeypatch) -> None:
+    """A frame read by the poll and again by a push flush must not be diffed twice."""
+    frame = {
+        "uploadTotal": 10,
+        "downloadTotal": 20,
+        "connections": [{"id": "a", "upload": 1, "download": 2}],
+    }
+    stream = SimpleNamespace(frame=frame, frame_id=7)
+    compacted = {}
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator.hass = SimpleNamespace(loop=asyncio.get_running_loop())
+    coordinator.api = SimpleNamespace(
+        streams={"connections": stream},
+        frame_ids={"connections": 7},
+        last_fetched={"connections"},
+        compact_payload=compacted.__setitem__,
+    )
+    coordinator.connection_tracking = True
+    coordinator.connection_tracker = ConnectionDeltaTracker()
+    coordinator._tracked_frame_id = None
+    coordinator.push_interval = 0.01
+    coordinator.last_update_success = True
+    coordinator._push_pending = set()
+    coordinator._push_timer = None
+    coordinator._build_entity_data = lambda response: []
+    coordinator.async_update_listeners = lambda: None
+    updates = []
+    update = coordinator.connection_tracker.update
+    monkeypatch.setattr(
+        coordinator.connection_tracker,
+        "update",
+        lambda connections: updates.append(connections) or update(connections),
+    )
+
+    response = {"connections": dict(frame)}
+    coordinator._ingest_connections(
+        response, fresh=True, frame_id=coordinator.api.frame_ids["connections"]
+    )
+    coordinator._last_response = response
+    assert compacted["connections"] == {
+        "uploadTotal": 10,
+        "downloadTotal": 20,
+        "connectionCount": 1,
+    }
+
+    coordinator._async_handle_stream_frame("connections")
+    await asyncio.sleep(0.05)
+    assert len(updates) == 1
+
+    stream.frame_id = 8
+    coordinator._async_handle_stream_frame("connections")
+    await asyncio.sleep(0.05)
+    assert len(updates) == 2
+
+
+def test_adaptive_interval_backs_off_and_recovers() -> None:
+    """Slow or failing requests should stretch the interval up to the ceiling and decay back."""
+    coordinator = object.__new__(ClashControllerCoordinator)
+    stats = RequestLoadStats()
+    coordinator.api = SimpleNamespace(load_stats=stats)
+    coordinator.poll_interval = 10
+    coordinator.effective_interval = 10.0
+
+    for _ in range(5):
+        stats.record(5.0, False)
+        coordinator._adapt_update_interval()
+    assert coordinator.effective_interval == 80
+    assert coordinator.update_interval.total_seconds() == 80
+
+    for _ in range(10):
+        stats.record(0.05, False)
+    for _ in range(20):
+        coordinator._adapt_update_interval()
+    assert coordinator.effective_interval == 10
+
+    stats.record(None, True)
+    coordinator._adapt_update_interval()
+    assert coordinator.effective_interval == 20
+
+
+@pytest.mark.asyncio
+async def test_failed_delay_tests_do_not_stretch_poll_interval() -> None:
+    """503 answers to delay tests are test results, not signs of core overload."""
+    api = ClashAPI("http://127.0.0.1:9090/", "token")
+
+    class Response:
+        status = 503
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):  # noqa: ANN002
+            return None
+
+        def raise_for_status(self) -> None:
+            raise aiohttp.ClientResponseError(None, (), status=503)
+
+    class Session:
+        closed = False
+
+        def request(self, *args, **kwargs):  # noqa: ANN002, ANN003
+            return Response()
+
+        async def close(self) -> None:
+            return None
+
+    api._session = Session()
+    results = await api.async_test_delays(
+        [f"node-{index}" for index in range(20)], "http://test", 50
+    )
+    assert all(result["delay"] is None for result in results.values())
+
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator.api = api
+    coordinator.poll_interval = 10
+    coordinator.effective_interval = 10.0
+    coordinator._adapt_update_interval()
+    assert api.load_stats.samples == 0
+    assert coordinator.effective_interval == 10
+
+    await api.async_request("GET", "version")
+    assert api.load_stats.samples == 1
+    assert api.load_stats.error_rate == 1.0
+
+
+def test_connection_delta_tracker_reports_churn_and_throughput() -> None:
+    """Consecutive snapshots should yield opened/closed rates and per-connection throughput."""
+    tracker = ConnectionDeltaTracker()
+
+    first = tracker.update(
+        [
+            {"id": "a", "upload": 100, "download": 1000},
+            {"id": "b", "upload": 0, "download": 0},
+        ]
+    )
+    assert first == {"live": 2}
+    tracker._taken_at -= 10
+
+    second = tracker.update(
+        [
+            {"id": "a", "upload": 200, "download": 11000, "metadata": {"host": "a.example"}},
+            {"id": "c", "upload": 0, "download": 0},
+        ]
+    )
+
+    assert second["live"] == 2
+    assert second["opened_rate"] == 0.1
+    assert second["closed_rate"] == 0.1
+    assert second["throughput_max"] == 1010.0
+    assert second["top_connections"][0] == {"id": "a", "host": "a.example", "rate": 1010.0}
+
+
+@pytest.mark.asyncio
+async def test_rule_table_is_cached_until_rule_sources_change() -> None:
+    """Rule queries should reuse the indexed table until providers or config change."""
+    rules = [
+        {"type": "DomainSuffix", "payload": "google.com", "proxy": "Proxy"},
+        {"type": "Domain", "payload": "www.google.cn", "proxy": "DIRECT"},
+        {"type": "IPCIDR", "payload": "10.0.0.0/8", "proxy": "DIRECT"},
+        {"type": "RuleSet", "payload": "ads", "proxy": "REJECT"},
+    ]
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator.hass = SimpleNamespace(
+        async_add_executor_job=AsyncMock(side_effect=lambda func, *args: func(*args))
+    )
+    coordinator.api = SimpleNamespace(
+        async_request=AsyncMock(return_value={"rules": rules}),
+        capabilities_fingerprint="fp",
+        rules_generation=0,
+    )
+    coordinator.rule_table = None
+    coordinator._rule_table_generation = 0
+    coordinator._rule_table_checked = 0.0
+    coordinator.tier_intervals = {"fast": 0, "medium": 0, "slow": 300}
+    coordinator._last_response = {
+        "configs": {"mode": "rule"},
+        "providers_rules": {"providers": {"ads": {"updatedAt": "t1"}}},
+    }
+
+    table = await coordinator.async_get_rule_table()
+    assert await coordinator.async_get_rule_table() is table
+    assert coordinator.api.async_request.await_count == 1
+
+    assert table.query(payloads=("google",)) == rules[:2]
+    assert table.query(types=("domain",), proxies=("direct",)) == [rules[1]]
+    assert table.query(types=("ipcidr",), payloads=("google",)) == []
+
+    coordinator._last_response["providers_rules"]["providers"]["ads"]["updatedAt"] = "t2"
+    assert await coordinator.async_get_rule_table() is table
+    assert coordinator.api.async_request.await_count == 2
+
+    coordinator.api.async_request.return_value = {"rules": rules[1:]}
+    coordinator._last_response["providers_rules"]["providers"]["ads"]["updatedAt"] = "t3"
+    rebuilt = await coordinator.async_get_rule_table()
+    assert rebuilt is not table
+    assert rebuilt.query(payloads=("google",)) == [rules[1]]
+
+    # An inline edit keeps every source signature; the digest catches it
+    # once the slow tier has elapsed.
+    edited = [{**rules[1], "proxy": "Proxy"}, *rules[2:]]
+    coordinator.api.async_request.return_value = {"rules": edited}
+    assert await coordinator.async_get_rule_table() is rebuilt
+    coordinator._rule_table_checked -= 301
+    assert (await coordinator.async_get_rule_table()).query(proxies=("proxy",)) == [edited[0]]
+
+    # A config write drops the table even when the rules look unchanged.
+    current = coordinator.rule_table
+    coordinator.api.rules_generation += 1
+    assert await coordinator.async_get_rule_table() is not current
+    assert coordinator.api.async_request.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_batch_latency_deduplicates_ranks_and_caches() -> None:
+    """Shared nodes should be tested once and repeated reads served from cache."""
+    proxies = {
+        "proxies": {
+            "HK": {"name": "HK", "type": "Selector", "all": ["hk-1", "shared", "DIRECT"]},
+            "JP": {"name": "JP", "type": "URLTest", "all": ["jp-1", "shared"]},
+            "GLOBAL": {"name": "GLOBAL", "type": "Selector", "all": ["HK", "JP"]},
+            "hk-1": {"type": "Shadowsocks"},
+            "jp-1": {"type": "Vmess"},
+            "shared": {"type": "Trojan"},
+            "DIRECT": {"type": "Direct"},
+        }
+    }
+    delays = {
+        "hk-1": {"delay": 120},
+        "shared": {"delay": 40},
+        "jp-1": {"delay": None, "error": "timeout"},
+    }
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator._latency_cache = {}
+    coordinator._delay_cache = {}
+    coordinator.latency_history = LatencyHistory()
+    coordinator.proxy_graph = ProxyGraph()
+    coordinator.api = SimpleNamespace(
+        capabilities={"proxies": True, "group_detail": True},
+        async_request=AsyncMock(return_value=proxies),
+        async_test_delays=AsyncMock(return_value=delays),
+    )
+
+    result = await coordinator.async_batch_latency(groups=["all"])
+
+    coordinator.api.async_test_delays.assert_awaited_once_with(
+        ["hk-1", "shared", "jp-1"], "http://www.gstatic.com/generate_204", 5000, 10
+    )
+    assert result["fastest_node"] == "shared"
+    assert result["latency"] == [["shared", 40], ["hk-1", 120]]
+    assert result["failed"] == {"jp-1": "timeout"}
+    assert result["groups"]["JP"] == {"fastest_node": "shared", "latency": [["shared", 40]]}
+    assert set(result["groups"]) == {"HK", "JP"}
+    assert result["stats"]["shared"]["latency_p50"] == 40
+    assert result["stats"]["jp-1"]["loss_rate"] == 1.0
+    assert result["cached"] is False
+
+    again = await coordinator.async_batch_latency(group_pattern="^(HK|JP)$")
+    assert again["cached"] is True
+    assert coordinator.api.async_test_delays.await_count == 1
+
+    await coordinator.async_batch_latency(groups=["HK", "JP"], use_cache=False)
+    assert coordinator.api.async_test_delays.await_count == 2
+    assert coordinator.latency_history.stats("shared")["latency_samples"] == 2
+
+    fetches = coordinator.api.async_request.await_count
+    repeat = await coordinator.async_batch_latency(groups=["all"])
+    assert repeat["cached"] is True
+    assert repeat["stats"]["shared"]["latency_samples"] == 2
+    assert coordinator.api.async_request.await_count == fetches
+
+    delays["extra"] = {"delay": 10}
+    proxies["proxies"]["extra"] = {"type": "Vmess"}
+    await coordinator.async_batch_latency(nodes=["all"])
+    coordinator.api.async_test_delays.assert_awaited_with(
+        ["extra"], "http://www.gstatic.com/generate_204", 5000, 10
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_latency_includes_inline_nodes_with_group_polling() -> None:
+    """Provider nodes in the graph must not hide nodes defined inline in the config."""
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator._latency_cache = {}
+    coordinator._delay_cache = {}
+    coordinator.latency_history = LatencyHistory()
+    coordinator.proxy_graph = ProxyGraph()
+    coordinator.proxy_graph.update_providers(
+        {"sub": {"proxies": [{"name": "sub-1", "type": "Trojan"}]}}
+    )
+    coordinator.proxy_graph.update_proxies(
+        {"Auto": {"name": "Auto", "type": "URLTest", "all": ["sub-1", "inline"]}},
+        groups_only=True,
+    )
+    coordinator.api = SimpleNamespace(
+        capabilities={"proxies": True, "group_detail": True},
+        async_request=AsyncMock(
+            return_value={
+                "proxies": {
+                    "Auto": {"name": "Auto", "type": "URLTest", "all": ["sub-1", "inline"]},
+                    "sub-1": {"name": "sub-1", "type": "Trojan"},
+                    "inline": {"name": "inline", "type": "Vmess"},
+                }
+            }
+        ),
+        async_test_delays=AsyncMock(
+            return_value={"sub-1": {"delay": 50}, "inline": {"delay": 30}}
+        ),
+    )
+
+    result = await coordinator.async_batch_latency(nodes=["all"])
+
+    coordinator.api.async_request.assert_awaited_once()
+    assert result["latency"] == [["inline", 30], ["sub-1", 50]]
+    assert coordinator.proxy_graph.provider_nodes("sub") == ["sub-1"]
+
+
+def test_latency_history_summarizes_bounded_samples() -> None:
+    """History from /proxies should be ingested once and summarized on group entities."""
+    history = LatencyHistory(capacity=4)
+    proxies = {
+        "proxies": {
+            "Auto": {
+                "name": "Auto",
+                "type": "URLTest",
+                "now": "node-a",
+                "all": ["node-a"],
+                "history": [
+                    {"time": "2024-05-01T12:00:00.123456789+08:00", "delay": 100},
+                    {"time": "2024-05-01T12:01:00+08:00", "delay": 0},
+                    {"time": "2024-05-01T12:02:00+08:00", "delay": 300},
+                ],
+            }
+        }
+    }
+
+    history.ingest_proxies(proxies)
+    history.ingest_proxies(proxies)
+    assert history.stats("Auto") == {
+        "latency_samples": 3,
+        "loss_rate": 0.333,
+        "latency_p50": 100,
+        "latency_p95": 300,
+    }
+
+    for delay in (50, 60, 70):
+        history.record("Auto", delay)
+    assert history.stats("Auto")["latency_samples"] == 4
+    assert history.stats("Auto")["latency_p50"] == 60
+
+    entity = ClashControllerCoordinator._build_proxy_entities(_graph(proxies), history)[0]
+    assert "history" not in entity.attributes
+    assert entity.attributes["latency_p95"] == 300
+
+
+def test_latency_history_counts_recorded_results_once() -> None:
+    """Service results should not be counted again when the core's history repeats them."""
+    history = LatencyHistory()
+
+    def node(*entries: tuple[str, int]) -> dict:
+        return {
+            "proxies": {
+                "hk-1": {
+                    "name": "hk-1",
+                    "history": [{"time": at, "delay": delay} for at, delay in entries],
+                }
+            }
+        }
+
+    # The core's clock is far behind Home Assistant's; only its own entry
+    # timestamps decide what is new.
+    history.ingest_proxies(node(("2001-01-01T00:00:00Z", 80)))
+    history.record("hk-1", 40)
+    history.record("hk-1", None)
+    history.ingest_proxies(
+        node(
+            ("2001-01-01T00:00:00Z", 80),
+            ("2001-01-01T00:01:00Z", 40),
+            ("2001-01-01T00:02:00Z", 0),
+            ("2001-01-01T00:03:00Z", 40),
+        )
+    )
+
+    assert history.stats("hk-1") == {
+        "latency_samples": 4,
+        "loss_rate": 0.25,
+        "latency_p50": 40,
+        "latency_p95": 80,
+    }
+
+
+def test_latency_history_parses_only_new_entries_and_prunes_removed_proxies(
+    monkeypatch,
+) -> None:
+    """Repeated history lists should not be re-read; proxies gone from the graph are dropped."""
+    added: list[str] = []
+    add = LatencyHistory.add
+
+    def counting_add(self, name, delay):  # noqa: ANN001
+        added.append(name)
+        add(self, name, delay)
+
+    monkeypatch.setattr(LatencyHistory, "add", counting_add)
+
+    def group(members: list[str], *times: str) -> dict:
+        return {
+            "name": "Auto",
+            "type": "URLTest",
+            "all": members,
+            "history": [{"time": at, "delay": 100} for at in times],
+        }
+
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator.api = SimpleNamespace(
+        capabilities={"proxies": True, "group_detail": True},
+        compact_payload=lambda key, payload: None,
+    )
+    coordinator.latency_history = LatencyHistory()
+    coordinator.proxy_graph = ProxyGraph()
+    history = coordinator.latency_history
+
+    first, second = "2024-05-01T12:00:00+08:00", "2024-05-01T12:01:00+08:00"
+    coordinator._ingest_proxies({"proxies": {"proxies": {"Auto": group(["a", "b"], first)}}})
+    history.record("a", 50)
+    history.record("b", 60)
+    coordinator._ingest_proxies({"proxies": {"proxies": {"Auto": group(["a", "b"], first)}}})
+    assert added == ["Auto", "a", "b"]
+    assert history.stats("Auto")["latency_samples"] == 1
+
+    coordinator._ingest_proxies(
+        {"proxies": {"proxies": {"Auto": group(["a"], first, second)}}}
+    )
+    assert added == ["Auto", "a", "b", "Auto"]
+    assert history.stats("Auto")["latency_samples"] == 2
+    assert history.stats("a")["latency_samples"] == 1
+    assert history.stats("b") == {}
+
+
+def test_proxy_graph_stores_shared_nodes_once_and_compacts_payloads() -> None:
+    """Nodes listed by /proxies and providers should share one object across polls."""
+    node = {"name": "hk-1", "type": "Trojan", "history": [{"delay": 80}]}
+    proxies = {
+        "proxies": {
+            "HK": {"name": "HK", "type": "Selector", "now": "hk-1", "all": ["hk-1"]},
+            "hk-1": dict(node),
+        }
+    }
+    providers = {
+        "providers": {
+            "sub": {"name": "sub", "testUrl": "http://t", "proxies": [dict(node)]}
+        }
+    }
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator.api = SimpleNamespace(
+        capabilities={"proxies": True}, compact_payload=lambda key, payload: None
+    )
+    coordinator.latency_history = LatencyHistory()
+    coordinator.proxy_graph = ProxyGraph()
+
+    response = {"proxies": proxies, "providers_proxies": providers}
+    coordinator._ingest_proxies(response)
+    graph = coordinator.proxy_graph
+    stored = graph.get("hk-1")
+
+    assert stored == {"name": "hk-1", "type": "Trojan"}
+    assert graph.provider_nodes("sub") == ["hk-1"]
+    assert graph.members("HK") == ["hk-1"]
+    assert response["proxies"] == {"groups": 1, "nodes": 1, "providers": 1}
+    assert response["providers_proxies"] == {
+        "providers": {"sub": {"name": "sub", "testUrl": "http://t"}}
+    }
+
+    coordinator._ingest_proxies({"proxies": proxies, "providers_proxies": providers})
+    assert graph.get("hk-1") is stored
+
+    graph.set_selected("HK", "DIRECT")
+    entity = ClashControllerCoordinator._build_proxy_entities(graph)[0]
+    assert entity.state == "DIRECT"
+    assert entity.options == ["hk-1"]
+
+
+def test_proxy_graph_resolves_nested_outbounds_incrementally() -> None:
+    """Outbounds should follow nested selections and only be recomputed where they changed."""
+    proxies = {
+        "Proxy": {"name": "Proxy", "type": "Selector", "now": "Auto", "all": ["Auto", "HK"]},
+        "Auto": {"name": "Auto", "type": "URLTest", "now": "node-a", "all": ["node-a", "node-b"]},
+        "HK": {"name": "HK", "type": "Selector", "now": "node-c", "all": ["node-c"]},
+        "Loop": {"name": "Loop", "type": "Selector", "now": "Loop2", "all": ["Loop2"]},
+        "Loop2": {"name": "Loop2", "type": "Selector", "now": "Loop", "all": ["Loop"]},
+        "node-a": {"name": "node-a"},
+        "node-b": {"name": "node-b"},
+        "node-c": {"name": "node-c"},
+    }
+    graph = ProxyGraph()
+    graph.update_proxies(proxies)
+
+    assert graph.outbound("Proxy") == "node-a"
+    assert graph.outbound("HK") == "node-c"
+    assert graph.outbound("Loop") is None
+    assert graph.outbound("node-b") == "node-b"
+
+    hk_memo = graph._outbound[graph._index["HK"]]
+    proxies["Auto"] = {**proxies["Auto"], "now": "node-b"}
+    graph.update_proxies(proxies)
+    assert graph._index["Proxy"] not in graph._outbound
+    assert graph._outbound[graph._index["HK"]] == hk_memo
+    assert graph.outbound("Proxy") == "node-b"
+
+    graph.set_selected("Proxy", "HK")
+    assert graph.outbound("Proxy") == "node-c"
+    entity = next(
+        e for e in ClashControllerCoordinator._build_proxy_entities(graph) if e.name == "Proxy"
+    )
+    assert entity.attributes["outbound"] == "node-c"
+
+
+def test_entities_skip_unchanged_state_writes() -> None:
+    """Refreshes with identical data should not write state again, local writes reset that."""
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator.api = SimpleNamespace(
+        capabilities={"memory": True},
+        device_id="dev",
+        load_stats=RequestLoadStats(),
+        breaker=CircuitBreaker(),
+        transport_stats={},
+        poll_stats={},
+    )
+    coordinator.streaming_detection = False
+    coordinator.connection_tracking = False
+    coordinator.poll_interval = 60
+    coordinator.effective_interval = 60.0
+    coordinator.last_update_success = True
+    coordinator._data_by_unique_id = {}
+    coordinator._proxy_entity_cache = {}
+
+    first = coordinator._build_entity_data({"memory": {"inuse": 10}})
+    same = coordinator._build_entity_data({"memory": {"inuse": 10}})
+    assert [item.fingerprint for item in first] == [item.fingerprint for item in same]
+
+    entity = object.__new__(BaseEntity)
+    entity.coordinator = coordinator
+    entity.entity_data = first[0]
+    entity._entity_unique_id = first[0].unique_id
+    entity._entity_name = first[0].name
+    entity._attr_available = True
+    entity._written_fingerprint = None
+    writes = []
+    entity.async_write_ha_state = lambda: writes.append(entity.entity_data.state)
+
+    entity._handle_coordinator_update()
+    entity._handle_coordinator_update()
+    assert len(writes) == 1
+
+    coordinator._build_entity_data({"memory": {"inuse": 20}})
+    entity._handle_coordinator_update()
+    assert writes == [10, 20]
+
+    coordinator.last_update_success = False
+    entity._handle_coordinator_update()
+    assert len(writes) == 3
+
+    coordinator.last_update_success = True
+    entity._handle_coordinator_update()
+    entity.async_write_local_state()
+    entity._handle_coordinator_update()
+    assert len(writes) == 6
+
+
+def test_incremental_build_reuses_entities_for_large_payload() -> None:
+    """Steady polls of 2k groups should reuse entity objects and allocate far less."""
+    members = [f"node-{index}" for index in range(20)]
+    proxies = {
+        f"group-{index}": {
+            "name": f"group-{index}",
+            "type": "Selector",
+            "now": members[index % 20],
+            "all": members,
+            "udp": True,
+        }
+        for index in range(2000)
+    }
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator.api = SimpleNamespace(
+        capabilities={"proxies": True},
+        device_id="dev",
+        load_stats=RequestLoadStats(),
+        breaker=CircuitBreaker(),
+        transport_stats={},
+        poll_stats={},
+    )
+    coordinator.streaming_detection = False
+    coordinator.connection_tracking = False
+    coordinator.poll_interval = 60
+    coordinator.effective_interval = 60.0
+    coordinator.latency_history = LatencyHistory()
+    coordinator.proxy_graph = ProxyGraph()
+    coordinator._data_by_unique_id = {}
+    coordinator._proxy_entity_cache = {}
+
+    def poll() -> tuple[list, int]:
+        coordinator.proxy_graph.update_proxies(
+            {name: dict(item) for name, item in proxies.items()}
+        )
+        tracemalloc.start()
+        try:
+            data = coordinator._build_entity_data({})
+            return data, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    first, first_allocated = poll()
+    fingerprints = [item.fingerprint for item in first]
+    second, steady_allocated = poll()
+
+    assert len(first) == 2001
+    assert all(old is new for old, new in zip(first, second))
+    assert [item.fingerprint for item in second] == fingerprints
+    assert steady_allocated * 10 < first_allocated
+
+    proxies["group-7"] = {**proxies["group-7"], "now": "node-19"}
+    third, _ = poll()
+    changed = [
+        item.unique_id
+        for item, fingerprint in zip(third, fingerprints)
+        if item.fingerprint != fingerprint
+    ]
+    assert changed == ["dev_proxy_group_selector_group-7"]
+    assert third[7] is first[7]
+    assert first[7].state == "node-19"
+
+
+def test_rebuilt_entities_refresh_fields_outside_fingerprint() -> None:
+    """Actions and other unfingerprinted fields should follow the latest build."""
+    coordinator = object.__new__(ClashControllerCoordinator)
+    coordinator.api = SimpleNamespace(
+        capabilities={"providers_proxies": True, "provider_healthcheck": True},
+        device_id="dev",
+        async_request=AsyncMock(),
+        load_stats=RequestLoadStats(),
+        breaker=CircuitBreaker(),
+        transport_stats={},
+        poll_stats={},
+    )
+    coordinator.streaming_detection = False
+    coordinator.connection_tracking = False
+    coordinator.poll_interval = 60
+    coordinator.effective_interval = 60.0
+    coordinator.proxy_graph = ProxyGraph()
+    coordinator._data_by_unique_id = {}
+    coordinator._proxy_entity_cache = {}
+
+    def healthcheck_button(url: str):
+        coordinator.proxy_graph.update_providers({"HK": {"testUrl": url}})
+        data = coordinator._build_entity_data({})
+        return next(e for e in data if e.entity_type == "provider_healthcheck_button")
+
+    first = healthcheck_button("http://a.example")
+    fingerprint = first.fingerprint
+    second = healthcheck_button("http://b.example")
+
+    assert second is first
+    assert second.fingerprint == fingerprint
+    assert second.action["kwargs"]["params"]["url"] == "http://b.example"
@@ -10,8 +10,20 @@ import pytest
 from homeassistant.const import CONF_DEVICE_ID
 from homeassistant.exceptions import HomeAssistantError
 
+from custom_components.clash_controller.api import ClashAPI
+from custom_components.clash_controller.coordinator import LatencyHistory
+from custom_components.clash_controller.filters import (
+    AhoCorasick,
+    get_connection_filter,
+)
+from custom_components.clash_controller.rules import RuleTable
 from custom_components.clash_controller.services import (
+    API_DATA,
+    API_ENDPOINT,
+    API_METHOD,
+    API_PARAMS,
     GROUP_NAME,
+    MATCH_HOSTS,
     NODE_NAME,
     TEST_TIMEOUT,
     TEST_URL,
@@ -23,7 +35,8 @@ from custom_components.clash_controller.services import (
 async def test_get_latency_service_quotes_group_name() -> None:
     """Group latency requests should URL-encode group names."""
     coordinator = SimpleNamespace(
-        api=SimpleNamespace(async_request=AsyncMock(return_value={"node-a": 80}))
+        api=SimpleNamespace(async_request=AsyncMock(return_value={"node-a": 80})),
+        latency_history=LatencyHistory(),
     )
     service = ClashServicesSetup.__new__(ClashServicesSetup)
     service._get_coordinator = lambda _device_id: coordinator
@@ -44,6 +57,7 @@ async def test_get_latency_service_quotes_group_name() -> None:
         endpoint="group/A%2FB%20Group/delay",
         params={"url": "http://www.gstatic.com/generate_204", "timeout": 5000},
         suppress_errors=False,
+        track_load=False,
     )
     assert result["fastest_node"] == "node-a"
 
@@ -52,7 +66,8 @@ async def test_get_latency_service_quotes_group_name() -> None:
 async def test_get_latency_service_quotes_node_name() -> None:
     """Node latency requests should URL-encode node names."""
     coordinator = SimpleNamespace(
-        api=SimpleNamespace(async_request=AsyncMock(return_value={"delay": 35}))
+        api=SimpleNamespace(async_request=AsyncMock(return_value={"delay": 35})),
+        latency_history=LatencyHistory(),
     )
     service = ClashServicesSetup.__new__(ClashServicesSetup)
     service._get_coordinator = lambda _device_id: coordinator
@@ -73,8 +88,49 @@ async def test_get_latency_service_quotes_node_name() -> None:
         endpoint="proxies/HK%2FA/delay",
         params={"url": "http://www.gstatic.com/generate_204", "timeout": 5000},
         suppress_errors=False,
+        track_load=False,
+    )
+    assert result == {
+        "latency": {"HK/A": 35},
+        "stats": {
+            "HK/A": {
+                "latency_samples": 1,
+                "loss_rate": 0.0,
+                "latency_p50": 35,
+                "latency_p95": 35,
+            }
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_api_call_service_gets_share_the_read_cache(monkeypatch) -> None:
+    """GET calls through api_call, which always sends a body, should still be cached."""
+    api = ClashAPI("http://127.0.0.1:9090/", "token")
+    sent = []
+
+    async def fake_send(method, endpoint, params, json_data, read_line, summarize, track_load):  # noqa: ANN001
+        sent.append((method, endpoint, json_data))
+        return {"rules": []}
+
+    monkeypatch.setattr(api, "_send_request", fake_send)
+    service = ClashServicesSetup.__new__(ClashServicesSetup)
+    service._get_coordinator = lambda _device_id: SimpleNamespace(api=api)
+    call = SimpleNamespace(
+        data={
+            CONF_DEVICE_ID: "dev1",
+            API_METHOD: "GET",
+            API_ENDPOINT: "rules",
+            API_PARAMS: "",
+            API_DATA: "",
+        }
     )
-    assert result == {"latency": {"HK/A": 35}}
+
+    first = await service.async_api_call_service(call)
+    second = await service.async_api_call_service(call)
+
+    assert first == second == {"response": {"rules": []}}
+    assert sent == [("GET", "rules", None)]
 
 
 @pytest.mark.asyncio
@@ -99,3 +155,124 @@ async def test_get_latency_service_requires_exactly_one_target() -> None:
         await service.async_get_latency_service(
             SimpleNamespace(data={CONF_DEVICE_ID: "dev1"})
         )
+
+
+def test_connection_filter_matches_all_criteria() -> None:
+    """Compiled filters should combine substring, CIDR, domain, chain and port criteria."""
+    connections = [
+        {
+            "id": "a",
+            "chains": ["HK Node", "Proxy"],
+            "rule": "DomainSuffix",
+            "metadata": {
+                "host": "rr3.googlevideo.com",
+                "sourceIP": "192.168.1.20",
+                "destinationIP": "142.250.1.1",
+                "destinationPort": "443",
+                "network": "tcp",
+            },
+        },
+        {
+            "id": "b",
+            "chains": ["DIRECT"],
+            "rule": "GeoIP",
+            "metadata": {
+                "host": "notgooglevideo.com",
+                "sourceIP": "10.0.0.5",
+                "destinationIP": "1.1.1.1",
+                "destinationPort": "53",
+                "network": "udp",
+            },
+        },
+    ]
+    hosts = ", ".join(f"keyword{index}" for index in range(50)) + ", video"
+
+    assert [c["id"] for c in get_connection_filter({"host": hosts}).filter(connections)] == ["a", "b"]
+    assert [
+        c["id"] for c in get_connection_filter({"domain": "googlevideo.com"}).filter(connections)
+    ] == ["a"]
+    assert [
+        c["id"]
+        for c in get_connection_filter(
+            {"src_hostname": "192.168.0.0/16", "port": "400-500", "chain": "hk node"}
+        ).filter(connections)
+    ] == ["a"]
+    assert [
+        c["id"]
+        for c in get_connection_filter(
+            {"des_hostname": "1.1.1", "network": "UDP", "rule": "geoip"}
+        ).filter(connections)
+    ] == ["b"]
+    assert get_connection_filter({"host": "a, b"}) is get_connection_filter({"host": "b,a"})
+    assert not get_connection_filter({})
+
+
+def test_aho_corasick_agrees_with_substring_search() -> None:
+    """The automaton should find exactly the texts containing any pattern."""
+    patterns = ["he", "she", "his", "hers", "usher", "abcd", "bc"]
+    automaton = AhoCorasick(patterns)
+    for text in ["ushers", "ahishers", "xyz", "abxbc", "abcx", "h", "sh", ""]:
+        assert automaton.search(text) == any(p in text for p in patterns)
+
+
+@pytest.mark.asyncio
+async def test_filter_connection_service_closes_matches_with_report() -> None:
+    """Closing filtered connections should hand the matched ids to the bulk closer."""
+    connections = {
+        "connections": [
+            {"id": "a", "metadata": {"host": "example.com"}},
+            {"id": "b", "metadata": {"host": "other.org"}},
+        ]
+    }
+    report = {"requested": 1, "closed": 1, "failed": 0, "results": {"a": "closed"}}
+    coordinator = SimpleNamespace(
+        concurrent_connections=5,
+        api=SimpleNamespace(
+            async_request=AsyncMock(return_value=connections),
+            async_close_connections=AsyncMock(return_value=report),
+        ),
+    )
+    service = ClashServicesSetup.__new__(ClashServicesSetup)
+    service._get_coordinator = lambda _device_id: coordinator
+
+    call = SimpleNamespace(
+        data={CONF_DEVICE_ID: "dev1", "domain": "example.com", "close_connection": True}
+    )
+    result = await service.async_filter_connection_service(call)
+
+    coordinator.api.async_close_connections.assert_awaited_once_with(
+        ["a"], initial_concurrency=5
+    )
+    assert result["connection_number"] == 1
+    assert result["close_report"] == report
+
+
+@pytest.mark.asyncio
+async def test_match_rule_service_returns_first_matching_rule() -> None:
+    """Hosts and addresses should resolve to the first rule that matches them."""
+    rules = [
+        {"type": "DomainKeyword", "payload": "ads", "proxy": "REJECT"},
+        {"type": "IPCIDR", "payload": "10.0.0.0/8", "proxy": "DIRECT"},
+        {"type": "DomainSuffix", "payload": "google.com", "proxy": "Proxy"},
+        {"type": "Domain", "payload": "mail.google.com", "proxy": "DIRECT"},
+        {"type": "GeoIP", "payload": "CN", "proxy": "DIRECT"},
+        {"type": "Match", "payload": "", "proxy": "Final"},
+    ]
+    matcher = RuleTable(rules).matcher
+    coordinator = SimpleNamespace(async_get_rule_matcher=AsyncMock(return_value=matcher))
+    service = ClashServicesSetup.__new__(ClashServicesSetup)
+    service._get_coordinator = lambda _device_id: coordinator
+
+    call = SimpleNamespace(
+        data={
+            CONF_DEVICE_ID: "dev1",
+            MATCH_HOSTS: "mail.google.com, adservice.example\n10.1.2.3,8.8.8.8",
+        }
+    )
+    results = (await service.async_match_rule_service(call))["results"]
+
+    assert [item["proxy"] for item in results] == ["Proxy", "REJECT", "DIRECT", "Final"]
+    assert results[0]["rule"]["index"] == 2
+    assert results[0]["undecided_rule"]["index"] == 1
+    assert results[2]["undecided_rule"] is None
+    assert results[3]["undecided_rule"]["payload"] == "CN"